@@ -6,6 +6,7 @@ import json
 import logging
 import webbrowser
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, jsonify, request, render_template, send_from_directory
 from flask_cors import CORS
 from flask_limiter import Limiter
@@ -23,10 +24,20 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 # 導入課程系統模組
-from modules.course_system.fetcher import fetch_course_update_from_nuk
+from modules.course_system.fetcher import configure_hedging, fetch_sclass_updates_from_nuk, upstream_stats
+from modules.course_system.snapshot import CourseSnapshot
+from modules.course_system.search import CourseSearchIndex
+from modules.course_system.singleflight import SingleFlight
+from modules.course_system.cache import LRUTTLCache
+from modules.course_system.disk_cache import SQLiteCache
+from modules.course_system.watcher import SeatWatcher
+from modules.course_system.seat_stream import SeatHub
+from modules.course_system.schedule import CourseScheduleIndex
+from modules.course_system.timeslots import ALL_SLOTS, parse_slots
 
 # 導入學分系統模組
 from modules.credit_system.scraper import run_selenium_process
+from modules.credit_system.jobs import CreditAnalysisJobs, JobQueueFull, FINISHED_STATES
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s - %(message)s')
@@ -34,7 +45,33 @@ logger = logging.getLogger(__name__)
 
 DATA_FILE = get_resource_path('data/courses_final.json')
 CACHE_TTL = 600  # Cache duration in seconds (10 minutes)
-LOCK_TTL = 30    # Lock duration in seconds
+CACHE_STALE_TTL = 300  # Expired entries are still served this long while one background refresh runs
+CACHE_MAX_ENTRIES = 5000
+# 磁碟快取放在可寫入的工作目錄 (打包後 _MEIPASS 是唯讀的暫存目錄)
+DISK_CACHE_FILE = os.getenv('COURSE_CACHE_DB', os.path.abspath(os.path.join('data', 'course_cache.sqlite3')))
+DISK_CACHE_MAX_AGE = 24 * 3600  # Disk rows older than this are purged at startup
+UPSTREAM_DEADLINE = 20  # Max seconds one upstream fetch may take, retries included
+FETCH_WAIT_TIMEOUT = UPSTREAM_DEADLINE + 5  # Max seconds a request waits on another request's in-flight fetch
+COURSES_MAX_AGE = 60  # Browser cache duration for /api/courses in seconds
+SEARCH_MAX_PAGE_SIZE = 500
+BATCH_MAX_COURSES = 100  # Max courses per /api/course-updates request
+BATCH_FETCH_WORKERS = 4  # Sclass pages fetched in parallel
+SCLASS_MAX_CONCURRENT_FETCHES = 8  # Distinct Sclass pages fetched from the NUK site at once (all callers)
+WATCH_MIN_INTERVAL = 15  # Fastest poll of a watched Sclass (many watchers, no seats left)
+WATCH_MAX_INTERVAL = 300  # Slowest poll; kept below CACHE_TTL so watched courses never expire
+WATCH_LEASE = 600  # Watches lapse unless the client renews them within this many seconds
+WATCH_MAX_POLLS_PER_MINUTE = 30  # Upper bound on watch-driven requests to the NUK site
+SSE_HEARTBEAT = 15  # Seconds between keep-alive comments on an idle seat stream
+SSE_RETRY_MS = 5000  # Reconnect delay suggested to EventSource clients
+# Each open SSE stream holds a worker thread for its whole life; beyond this many, new streams get 503.
+# Keep it well below the server's thread count (waitress `threads`) so the other endpoints still get workers.
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', 8))
+SCHEDULE_MAX_COURSES = 40  # Max required + optional courses per generation request
+SCHEDULE_MAX_RESULTS = 200
+SCHEDULE_MAX_TIMEOUT = 5.0  # Seconds one generation request may search
+CREDIT_MAX_BROWSERS = 2  # Credit analyses (Chrome instances) running at once
+CREDIT_MAX_QUEUED = 10  # Further analyses wait in line; beyond this POST returns 503
+CREDIT_RESULT_TTL = 600  # Seconds a finished analysis stays retrievable
 
 app = Flask(__name__, 
             static_folder=get_resource_path('frontend'), 
@@ -44,40 +81,251 @@ CORS(app)
 # Rate limiter
 limiter = Limiter(app=app, key_func=get_remote_address, default_limits=["200 per hour"])
 
-# --- In-Memory Cache and Lock Implementation ---
-MEMORY_CACHE = {}
-MEMORY_LOCKS = {}
+# 課程資料只在檔案變動時重新載入與序列化
+course_snapshot = CourseSnapshot(DATA_FILE)
+course_search_index = CourseSearchIndex()
+course_snapshot.add_listener(course_search_index.rebuild)
+course_schedule_index = CourseScheduleIndex()
+course_snapshot.add_listener(course_schedule_index.rebuild)
 
-def cache_get(key):
-    """Gets a value from the in-memory cache if it's not expired."""
-    if key in MEMORY_CACHE and (time.time() - MEMORY_CACHE[key]['timestamp']) < CACHE_TTL:
-        return MEMORY_CACHE[key]['data']
-    return None
+# --- In-Memory Cache and Request Coalescing ---
+cache_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+MEMORY_CACHE = LRUTTLCache(max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL,
+                           stale_ttl=CACHE_STALE_TTL, executor=cache_refresh_executor)
+
+DISK_CACHE = SQLiteCache(DISK_CACHE_FILE)
+
+def cache_get(key, refresh=None):
+    """
+    Gets a value from the in-memory cache, falling back to the disk tier on a miss.
+    Stale values trigger refresh() in the background.
+    """
+    value = MEMORY_CACHE.get(key, refresh=refresh)
+    if value is not None:
+        return value
+    stored = DISK_CACHE.get(key, max_age=CACHE_TTL + CACHE_STALE_TTL)
+    if stored is None:
+        return None
+    # 以剩餘的 TTL 放回記憶體 (可能已過期而落在 stale 區間)
+    value, updated_at = stored
+    MEMORY_CACHE.set(key, value, ttl=CACHE_TTL - (time.time() - updated_at))
+    return MEMORY_CACHE.get(key, refresh=refresh)
 
 def cache_set(key, value, ttl=CACHE_TTL):
-    """Sets a value in the in-memory cache with a timestamp."""
-    MEMORY_CACHE[key] = {'data': value, 'timestamp': time.time()}
+    """Sets a value in the in-memory cache with its own TTL."""
+    MEMORY_CACHE.set(key, value, ttl=ttl)
+
+def cache_set_many(items, ttl=CACHE_TTL):
+    """Sets many (key, value) pairs in memory and writes them to the disk tier in one transaction."""
+    for key, value in items:
+        MEMORY_CACHE.set(key, value, ttl=ttl)
+    DISK_CACHE.set_many(items)
+
+# 同一個 Sclass 的並行請求共用同一次上游抓取；同時抓取的 Sclass 數有上限，hedge 的執行緒數依此配置
+sclass_flight = SingleFlight(max_concurrent=SCLASS_MAX_CONCURRENT_FETCHES)
+configure_hedging(SCLASS_MAX_CONCURRENT_FETCHES)
+
+# 每次抓取結果只比對一次，再推送給所有訂閱該課程的 SSE 連線
+seat_hub = SeatHub()
+
+# --- Sclass-level fetching ---
+sclass_fetch_executor = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix='sclass-fetch')
+
+def course_cache_key(year, semester, sclass, cono):
+    return f"course:{year}:{semester}:{sclass}:{cono}"
+
+# Sclass -> time.monotonic() of its last successful fetch
+sclass_fetched_at = {}
+
+def fetch_sclass_into_cache(year, semester, sclass):
+    """
+    Fetches one Sclass page and caches the update of every course on it.
+    Concurrent calls for the same Sclass share a single upstream fetch, so the fetch
+    does not depend on any caller's course: each caller looks up its own cono in the
+    returned dict. Returns {cono: update} or None if the fetch failed; raises
+    TimeoutError if another request's fetch (or a free fetch slot, see
+    SCLASS_MAX_CONCURRENT_FETCHES) did not come within FETCH_WAIT_TIMEOUT.
+    """
+    def fetch():
+        logger.info(f"[FETCH] Fetching Sclass {year}:{semester}:{sclass} from NUK site")
+        updates = fetch_sclass_updates_from_nuk(year=year, semester=semester, sclass=sclass,
+                                                deadline=UPSTREAM_DEADLINE, hedge=True)
+        if updates is not None:
+            sclass_fetched_at[(year, semester, sclass)] = time.monotonic()
+            items = [(course_cache_key(year, semester, sclass, code), update) for code, update in updates.items()]
+            cache_set_many(items, ttl=CACHE_TTL)
+            seat_hub.publish(items)
+        return updates
+
+    return sclass_flight.do(f"sclass:{year}:{semester}:{sclass}", fetch, timeout=FETCH_WAIT_TIMEOUT)
 
-def acquire_lock(lock_key, ttl=LOCK_TTL):
-    """Acquires a simple in-memory lock."""
-    if lock_key in MEMORY_LOCKS and (time.time() - MEMORY_LOCKS[lock_key]) < ttl:
-        return False  # Lock is active
-    MEMORY_LOCKS[lock_key] = time.time()
-    return True
+def sclass_refresh(year, semester, sclass):
+    """
+    Refresh callback for cache_get on a course of this Sclass: refetches the whole page
+    in the background. When several courses of the page go stale together, only the
+    first refresh fetches; the others see the page was fetched after they were requested.
+    """
+    requested_at = time.monotonic()
 
-def release_lock(lock_key):
-    """Releases an in-memory lock."""
-    if lock_key in MEMORY_LOCKS:
-        del MEMORY_LOCKS[lock_key]
+    def refresh():
+        if sclass_fetched_at.get((year, semester, sclass), 0) >= requested_at:
+            return
+        fetch_sclass_into_cache(year, semester, sclass)
+    return refresh
+
+def resolve_sclass_group(year, semester, sclass, conos):
+    """
+    Returns {cono: update or None} for courses of one Sclass, fetching the page
+    at most once for all of them. Stale entries are served and refreshed in the background.
+    """
+    refresh = sclass_refresh(year, semester, sclass)
+    results = {cono: cache_get(course_cache_key(year, semester, sclass, cono), refresh=refresh) for cono in conos}
+    missing = [cono for cono, update in results.items() if update is None]
+    if not missing:
+        return results
+
+    updates = fetch_sclass_into_cache(year, semester, sclass)
+    if updates:
+        for cono in missing:
+            results[cono] = updates.get(cono)
+    return results
+
+def parse_course_items(items):
+    """
+    Validates a list of {year, helf, sclass, cono} objects.
+    Returns (courses, error): courses is a list of (year, semester, sclass, cono) strings.
+    """
+    if not isinstance(items, list) or not items:
+        return None, "Request body must contain a non-empty 'courses' list."
+    if len(items) > BATCH_MAX_COURSES:
+        return None, f"At most {BATCH_MAX_COURSES} courses per request."
+    courses = []
+    for item in items:
+        if not isinstance(item, dict):
+            return None, "Each course must be an object with year, helf, sclass and cono."
+        year, semester, sclass, cono = item.get('year'), item.get('helf'), item.get('sclass'), item.get('cono')
+        if not all([year, semester, sclass, cono]):
+            return None, "Each course must be an object with year, helf, sclass and cono."
+        courses.append((str(year), str(semester), str(sclass), str(cono)))
+    return courses, None
+
+# --- Seat watching ---
+# 被關注的課程由背景排程定期抓取並寫入快取，使用者查詢時直接命中快取
+watch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='seat-watch-fetch')
+seat_watcher = SeatWatcher(
+    fetch=lambda year, semester, sclass: fetch_sclass_into_cache(year, semester, sclass),
+    executor=watch_executor,
+    min_interval=WATCH_MIN_INTERVAL,
+    max_interval=WATCH_MAX_INTERVAL,
+    lease=WATCH_LEASE,
+    max_polls_per_minute=WATCH_MAX_POLLS_PER_MINUTE,
+)
+
+def watch_client_id(body):
+    """Clients may send their own id (one per browser); otherwise the remote address is used."""
+    client = body.get('client')
+    return f"{get_remote_address()}:{client}" if isinstance(client, str) and client else get_remote_address()
 
 # --- 課程系統 API Endpoints ---
 @app.route('/api/courses', methods=['GET'])
 def api_courses():
     """獲取課程列表"""
-    if not os.path.exists(DATA_FILE):
+    snapshot = course_snapshot.current()
+    if snapshot is None:
         return jsonify({"error": f"Data file '{DATA_FILE}' not found."}), 404
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        return jsonify(json.load(f))
+
+    # 先選出要回傳的編碼，再以該編碼自己的 ETag 比對 If-None-Match
+    body, encoding, etag = snapshot.encoded(request.accept_encodings)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={COURSES_MAX_AGE}'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/api/courses/search', methods=['GET'])
+@limiter.limit("120 per minute")
+def api_courses_search():
+    """搜尋課程 (支援分頁、系所篩選與排序)"""
+    if course_snapshot.current() is None:
+        return jsonify({"error": f"Data file '{DATA_FILE}' not found."}), 404
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        page_size = min(SEARCH_MAX_PAGE_SIZE, max(1, int(request.args.get('page_size', 50))))
+    except ValueError:
+        return jsonify({"error": "page and page_size must be integers."}), 400
+
+    result = course_search_index.search(
+        request.args.get('q', ''),
+        departments=request.args.getlist('dept'),
+        page=page,
+        page_size=page_size,
+    )
+    return jsonify(result)
+
+@app.route('/api/courses/fits', methods=['GET'])
+@limiter.limit("120 per minute")
+def api_courses_fits():
+    """
+    查詢可填入空堂的課程：free=<空堂位元遮罩> 或 busy=Mon-1,Mon-2 (已占用的時段)，
+    可再加 dept / credits / type 篩選。位元 d * 16 + p 代表第 d 天 (Mon=0) 的第 p 節 (A=0, 1=1, ..., D=15)。
+    """
+    if course_snapshot.current() is None:
+        return jsonify({"error": f"Data file '{DATA_FILE}' not found."}), 404
+    try:
+        if 'free' in request.args:
+            free = int(request.args['free'], 0) & ALL_SLOTS
+        else:
+            busy = [slot for value in request.args.getlist('busy') for slot in value.split(',') if slot]
+            free = ALL_SLOTS & ~parse_slots(busy)
+        page = max(1, int(request.args.get('page', 1)))
+        page_size = min(SEARCH_MAX_PAGE_SIZE, max(1, int(request.args.get('page_size', 50))))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid free/busy or paging parameters: {e}"}), 400
+
+    result = course_schedule_index.fits(
+        free,
+        departments=request.args.getlist('dept'),
+        credits=request.args.getlist('credits'),
+        types=request.args.getlist('type'),
+        include_untimed=request.args.get('include_untimed', '').lower() in ('1', 'true'),
+        page=page,
+        page_size=page_size,
+    )
+    return jsonify(result)
+
+@app.route('/api/schedules/generate', methods=['POST'])
+@limiter.limit("30 per minute")
+def api_schedules_generate():
+    """產生無衝堂課表：{"required": [...], "optional": [...], "blocked": ["Mon-1", ...], "limit", "timeout"}"""
+    if course_snapshot.current() is None:
+        return jsonify({"error": f"Data file '{DATA_FILE}' not found."}), 404
+    body = request.get_json(silent=True) or {}
+    required, optional = body.get('required') or [], body.get('optional') or []
+    if not isinstance(required, list) or not isinstance(optional, list) or not (required or optional):
+        return jsonify({"error": "Request body must contain a 'required' and/or 'optional' list of course codes or ids."}), 400
+    if len(required) + len(optional) > SCHEDULE_MAX_COURSES:
+        return jsonify({"error": f"At most {SCHEDULE_MAX_COURSES} courses per request."}), 400
+    try:
+        blocked = parse_slots(body.get('blocked') or [])
+        limit = min(SCHEDULE_MAX_RESULTS, max(1, int(body.get('limit', 50))))
+        timeout = min(SCHEDULE_MAX_TIMEOUT, max(0.1, float(body.get('timeout', 2.0))))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = course_schedule_index.generate(
+        [str(c) for c in required],
+        [str(c) for c in optional],
+        blocked=blocked,
+        limit=limit,
+        timeout=timeout,
+        maximal=bool(body.get('maximal', True)),
+    )
+    return jsonify(result)
 
 @app.route('/api/course-update', methods=['GET'])
 @limiter.limit("10 per minute")
@@ -87,44 +335,284 @@ def api_course_update():
     if not all([year, semester, sclass, cono]):
         return jsonify({"error": "Missing required query parameters."}), 400
 
-    cache_key = f"course:{year}:{semester}:{sclass}:{cono}"
-    lock_key = f"lock:{cache_key}"
+    cache_key = course_cache_key(year, semester, sclass, cono)
 
-    cached = cache_get(cache_key)
+    cached = cache_get(cache_key, refresh=sclass_refresh(year, semester, sclass))
     if cached:
         logger.info(f"[CACHE HIT] Serving from memory for {cache_key}")
         return jsonify(cached)
 
-    if not acquire_lock(lock_key):
-        logger.info(f"[WAIT] Another process is fetching {cache_key}. Waiting briefly.")
-        time.sleep(1)
-        cached = cache_get(cache_key)
-        if cached:
-            logger.info(f"[WAIT HIT] {cache_key}")
-            return jsonify(cached)
-        return jsonify({"error": "Data not available after waiting, please try again."}), 503
-
     try:
-        logger.info(f"[FETCH] Fetching {cache_key} from NUK site")
-        result = fetch_course_update_from_nuk(year=year, semester=semester, sclass=sclass, cono=cono)
-        if result is None:
-            return jsonify({"error": f"Course {cono} not found or fetch failed."}), 404
-        
-        cache_set(cache_key, result, ttl=CACHE_TTL)
-        return jsonify(result)
+        updates = fetch_sclass_into_cache(year, semester, sclass)
+    except TimeoutError:
+        logger.warning(f"[WAIT TIMEOUT] In-flight fetch for {cache_key} did not finish in time")
+        return jsonify({"error": "Data not available after waiting, please try again."}), 503
     except Exception:
         logger.exception("Error while fetching course update")
         return jsonify({"error": "Internal server error during fetch."}), 500
-    finally:
-        release_lock(lock_key)
+
+    result = updates.get(cono) if updates else None
+    if result is None:
+        return jsonify({"error": f"Course {cono} not found or fetch failed."}), 404
+    return jsonify(result)
+
+@app.route('/api/course-updates', methods=['POST'])
+@limiter.limit("10 per minute")
+def api_course_updates():
+    """批次更新課程資訊 (同一 Sclass 只向學校請求一次)"""
+    body = request.get_json(silent=True) or {}
+    courses, error = parse_course_items(body.get('courses'))
+    if error:
+        return jsonify({"error": error}), 400
+
+    groups = {}
+    for year, semester, sclass, cono in courses:
+        groups.setdefault((year, semester, sclass), set()).add(cono)
+
+    futures = {
+        group: sclass_fetch_executor.submit(resolve_sclass_group, *group, sorted(conos))
+        for group, conos in groups.items()
+    }
+    group_results = {}
+    for group, future in futures.items():
+        try:
+            group_results[group] = future.result()
+        except Exception:
+            logger.exception(f"Error while fetching Sclass {group}")
+            group_results[group] = {}
+
+    results = []
+    for year, semester, sclass, cono in courses:
+        update = group_results[(year, semester, sclass)].get(cono)
+        entry = {"year": year, "helf": semester, "sclass": sclass, "cono": cono}
+        if update is None:
+            entry["error"] = f"Course {cono} not found or fetch failed."
+        else:
+            entry.update(update)
+        results.append(entry)
+    return jsonify({"results": results})
+
+@app.route('/api/watch', methods=['POST'])
+@limiter.limit("30 per minute")
+def api_watch():
+    """關注課程名額 (租約制，需在 lease 秒內重新送出以續約)"""
+    body = request.get_json(silent=True) or {}
+    courses, error = parse_course_items(body.get('courses'))
+    if error:
+        return jsonify({"error": error}), 400
+
+    client = watch_client_id(body)
+    results = []
+    for year, semester, sclass, cono in courses:
+        seat_watcher.watch(year, semester, sclass, cono, client)
+        entry = {"year": year, "helf": semester, "sclass": sclass, "cono": cono}
+        # 只讀快取 (過期的在背景重新抓取)；尚未抓到的課程由排程稍後補上
+        cached = cache_get(course_cache_key(year, semester, sclass, cono), refresh=sclass_refresh(year, semester, sclass))
+        if cached:
+            entry.update(cached)
+        else:
+            entry["pending"] = True
+        results.append(entry)
+    return jsonify({"lease": WATCH_LEASE, "results": results})
+
+@app.route('/api/watch', methods=['DELETE'])
+@limiter.limit("30 per minute")
+def api_unwatch():
+    """取消關注課程名額"""
+    body = request.get_json(silent=True) or {}
+    courses, error = parse_course_items(body.get('courses'))
+    if error:
+        return jsonify({"error": error}), 400
+
+    client = watch_client_id(body)
+    for year, semester, sclass, cono in courses:
+        seat_watcher.unwatch(year, semester, sclass, cono, client)
+    return jsonify({"removed": len(courses)})
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# 同時開啟的 SSE 串流 (名額與學分分析進度) 共用 SSE_MAX_STREAMS 個名額
+stream_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+stream_counts = {'open': 0, 'rejected': 0}
+stream_counts_lock = threading.Lock()
+
+def sse_response(generate):
+    """
+    Streams generate() as text/event-stream while holding one of SSE_MAX_STREAMS slots,
+    released when the server closes the response. Returns 503 with Retry-After when
+    every slot is taken, instead of tying up yet another worker thread.
+    """
+    if not stream_slots.acquire(blocking=False):
+        with stream_counts_lock:
+            stream_counts['rejected'] += 1
+        response = jsonify({"error": "Too many open streams, please retry later."})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(SSE_RETRY_MS // 1000)
+        return response
+    with stream_counts_lock:
+        stream_counts['open'] += 1
+
+    def release():
+        with stream_counts_lock:
+            stream_counts['open'] -= 1
+        stream_slots.release()
+
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/stream/seats', methods=['GET'])
+@limiter.limit("30 per minute")
+def api_stream_seats():
+    """訂閱課程名額變動 (Server-Sent Events)：?year=&helf=&course=SCLASS:CONO&course=..."""
+    year, semester = request.args.get('year'), request.args.get('helf')
+    pairs = request.args.getlist('course')
+    if not year or not semester or not pairs:
+        return jsonify({"error": "Missing year, helf or course parameters."}), 400
+    if len(pairs) > BATCH_MAX_COURSES:
+        return jsonify({"error": f"At most {BATCH_MAX_COURSES} courses per stream."}), 400
+    courses = {}
+    for pair in pairs:
+        sclass, _, cono = pair.partition(':')
+        if not sclass or not cono:
+            return jsonify({"error": "Each course must be given as SCLASS:CONO."}), 400
+        courses[course_cache_key(year, semester, sclass, cono)] = (sclass, cono)
+    client = f"{get_remote_address()}:sse:{os.urandom(6).hex()}"
+
+    def entry(key, values):
+        sclass, cono = courses[key]
+        return dict({"sclass": sclass, "cono": cono}, **values)
+
+    def watch_all():
+        # 串流中的課程交給監看排程定期抓取，變動時由 seat_hub 推送
+        for sclass, cono in courses.values():
+            seat_watcher.watch(year, semester, sclass, cono, client)
+
+    def generate():
+        current = {key: cache_get(key, refresh=sclass_refresh(year, semester, courses[key][0])) for key in courses}
+        subscription = seat_hub.subscribe(courses, initial=current)
+        try:
+            watch_all()
+            renewed_at = time.monotonic()
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            yield sse_event('snapshot', {"courses": [entry(key, value or {"pending": True})
+                                                     for key, value in current.items()]})
+            while True:
+                changes = subscription.get(timeout=SSE_HEARTBEAT)
+                if changes:
+                    yield sse_event('seats', {"changes": [entry(key, fields) for key, fields in changes.items()]})
+                else:
+                    yield ": keepalive\n\n"
+                if time.monotonic() - renewed_at > WATCH_LEASE / 2:
+                    watch_all()
+                    renewed_at = time.monotonic()
+        finally:
+            seat_hub.unsubscribe(subscription)
+            for sclass, cono in courses.values():
+                seat_watcher.unwatch(year, semester, sclass, cono, client)
+
+    return sse_response(generate)
+
+@app.route('/api/watch-stats', methods=['GET'])
+def api_watch_stats():
+    """名額監看排程與 SSE 訂閱統計"""
+    with stream_counts_lock:
+        connections = dict(stream_counts, max=SSE_MAX_STREAMS)
+    return jsonify({"scheduler": seat_watcher.stats(), "streams": seat_hub.stats(), "connections": connections})
+
+@app.route('/api/cache-stats', methods=['GET'])
+def api_cache_stats():
+    """快取命中/未命中/淘汰統計"""
+    return jsonify({"memory": MEMORY_CACHE.stats(), "disk": DISK_CACHE.stats()})
+
+@app.route('/api/upstream-stats', methods=['GET'])
+def api_upstream_stats():
+    """上游請求延遲、重試預算與 hedge 統計"""
+    return jsonify(upstream_stats())
 
 # --- 學分系統 API Endpoints ---
+# 學分分析會開啟 Chrome 並等待使用者登入 (最多 300 秒)，改在背景工作中執行，不佔用請求執行緒
+credit_jobs = CreditAnalysisJobs(run_selenium_process, max_running=CREDIT_MAX_BROWSERS,
+                                 max_queued=CREDIT_MAX_QUEUED, result_ttl=CREDIT_RESULT_TTL)
+
+def credit_job_response(job):
+    job = {k: v for k, v in job.items() if k != 'version'}
+    job['status_url'] = f"/api/credit-analysis/{job['job_id']}"
+    job['stream_url'] = f"/api/credit-analysis/{job['job_id']}/stream"
+    return job
+
+@app.route('/api/credit-analysis', methods=['POST'])
+@limiter.limit("10 per minute")
+def api_submit_credit_analysis():
+    """送出學分分析工作，立即回傳 job id (202)；進度見 /api/credit-analysis/<job_id>"""
+    body = request.get_json(silent=True) or {}
+    try:
+        # 同一個瀏覽器 (學生) 重新分析時沿用上次的學期解析結果
+        job = credit_jobs.submit(student=watch_client_id(body))
+    except JobQueueFull:
+        response = jsonify({"status": "error", "message": "目前排隊的學分分析過多，請稍後再試。"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    print(f"收到前端請求，已排入學分分析工作 {job['job_id']}")
+    return jsonify(credit_job_response(job)), 202
+
+@app.route('/api/credit-analysis/<job_id>', methods=['GET'])
+def api_credit_analysis_status(job_id):
+    """學分分析工作的狀態、進度與結果 (完成後保留 CREDIT_RESULT_TTL 秒)"""
+    job = credit_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "找不到此分析工作，可能已過期。"}), 404
+    return jsonify(credit_job_response(job))
+
+@app.route('/api/credit-analysis/<job_id>/stream', methods=['GET'])
+def api_credit_analysis_stream(job_id):
+    """以 Server-Sent Events 推送學分分析工作的進度，完成後送出 done 事件並結束"""
+    job = credit_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "找不到此分析工作，可能已過期。"}), 404
+
+    def generate():
+        current = job
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            if current['state'] in FINISHED_STATES:
+                yield sse_event('done', credit_job_response(current))
+                return
+            yield sse_event('progress', credit_job_response(current))
+            version = current['version']
+            while True:
+                latest = credit_jobs.wait(job_id, version, timeout=SSE_HEARTBEAT)
+                if latest is None:
+                    yield sse_event('expired', {"job_id": job_id})
+                    return
+                if latest['version'] != version or latest['state'] in FINISHED_STATES:
+                    current = latest
+                    break
+                yield ": keepalive\n\n"
+
+    return sse_response(generate)
+
+@app.route('/api/credit-analysis-stats', methods=['GET'])
+def api_credit_analysis_stats():
+    """各狀態的學分分析工作數"""
+    return jsonify(credit_jobs.stats())
+
 @app.route('/api/start-credit-analysis', methods=['POST'])
 def api_start_credit_analysis():
-    """啟動學分分析流程"""
+    """舊版同步介面：送出工作並等到完成 (仍受瀏覽器數量上限限制)；新程式請改用 /api/credit-analysis"""
     print("收到前端請求，準備開始學分分析流程...")
-    result = run_selenium_process()
-    return jsonify(result)
+    try:
+        job = credit_jobs.submit(student=watch_client_id(request.get_json(silent=True) or {}))
+    except JobQueueFull:
+        return jsonify({"status": "error", "message": "目前排隊的學分分析過多，請稍後再試。"}), 503
+    while job is not None and job['state'] not in FINISHED_STATES:
+        job = credit_jobs.wait(job['job_id'], job['version'], timeout=SSE_HEARTBEAT)
+    if job is None:
+        return jsonify({"status": "error", "message": "分析工作已過期。"})
+    return jsonify(job['result'])
 
 # --- 主頁面路由 ---
 @app.route('/')
@@ -146,6 +634,10 @@ if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() in ('1', 'true')
     
+    removed = DISK_CACHE.purge(DISK_CACHE_MAX_AGE)
+    if removed:
+        logger.info(f"[DISK CACHE] Purged {removed} expired rows")
+
     # 在背景執行緒中開啟瀏覽器
     threading.Thread(target=open_browser, args=(port,), daemon=True).start()
     
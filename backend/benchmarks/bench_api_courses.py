@@ -0,0 +1,77 @@
+# bench_api_courses.py - /api/courses 效能比較 (舊：每次讀檔+jsonify，新：記憶體快照)
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_api_courses.py --courses 3000 --requests 500 --threads 8
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+from benchmarks.fixtures import make_catalogue
+import app as app_module
+
+
+def legacy_api_courses():
+    """The original handler: parse and re-serialize the whole file on every request."""
+    with open(app_module.DATA_FILE, 'r', encoding='utf-8') as f:
+        return jsonify(json.load(f))
+
+
+def run(client, url, n_requests, threads, headers=None):
+    def one(_):
+        started = time.perf_counter()
+        resp = client.get(url, headers=headers or {})
+        resp.get_data()
+        assert resp.status_code in (200, 304), resp.status_code
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - started
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return n_requests / wall, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/courses serving')
+    parser.add_argument('--courses', type=int, default=3000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, 'courses_final.json')
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump(make_catalogue(args.courses), f, ensure_ascii=False, indent=2)
+
+        app_module.DATA_FILE = data_file
+        app_module.course_snapshot.path = data_file
+        app_module.limiter.enabled = False
+        app_module.app.add_url_rule('/bench/legacy-courses', 'legacy_api_courses', legacy_api_courses)
+        client = app_module.app.test_client()
+
+        etag = client.get('/api/courses').headers['ETag']
+        cases = [
+            ('legacy (json.load + jsonify)', '/bench/legacy-courses', None),
+            ('snapshot identity', '/api/courses', None),
+            ('snapshot gzip', '/api/courses', {'Accept-Encoding': 'gzip'}),
+            ('snapshot br/gzip', '/api/courses', {'Accept-Encoding': 'br, gzip'}),
+            ('snapshot 304', '/api/courses', {'If-None-Match': etag}),
+        ]
+        print(f"{args.courses} courses, {args.requests} requests, {args.threads} threads")
+        print(f"{'case':32} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for name, url, headers in cases:
+            rps, p50, p99 = run(client, url, args.requests, args.threads, headers)
+            print(f"{name:32} {rps:10.1f} {p50:10.2f} {p99:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
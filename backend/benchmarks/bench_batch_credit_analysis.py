@@ -0,0 +1,105 @@
+# bench_batch_credit_analysis.py - 批次學分分析 CLI 的吞吐量與多核心擴展
+#
+# 在暫存目錄產生合成的 ScoreQuery.asp 成績頁面 (部分以 Big5 編碼，另含損壞的檔案)，
+# 以不同的行程數執行 modules.credit_system.batch，量測每秒處理的檔案數並確認：
+#   - 各種行程數的分析結果完全相同
+#   - 損壞的檔案只會產生該檔案的錯誤紀錄
+#   - CLI 輸出的 JSONL / CSV 每個檔案一筆
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_batch_credit_analysis.py --files 400 --workers 1,2,4
+import os
+import io
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from modules.credit_system import batch
+from modules.credit_system.config import COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from fixtures import make_score_json, make_score_semesters, render_score_page
+
+BROKEN_FILES = {
+    'broken_binary.html': bytes(range(256)) * 4,
+    'broken_empty.html': b'<html><body><p>\xe6\x9f\xa5\xe7\x84\xa1\xe8\xb3\x87\xe6\x96\x99</p></body></html>',
+}
+
+
+def make_files(directory, n_files, rng):
+    prefixes = list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING)
+    for i in range(n_files):
+        semesters = make_score_semesters(rng.randrange(2, 9), rng.randrange(6, 10), prefixes, rng)
+        charset = 'big5' if i % 3 == 0 else 'utf-8'
+        with open(os.path.join(directory, f'student_{i:05d}.html'), 'wb') as f:
+            f.write(render_score_page(semesters, charset).encode(charset))
+    for name, content in BROKEN_FILES.items():
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(content)
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = ','.join(str(w) for w in sorted({1, 2, 4, cpus}) if w <= max(cpus, 2))
+    parser = argparse.ArgumentParser(description='Batch credit analysis: throughput vs number of worker processes')
+    parser.add_argument('--files', type=int, default=400, help='Synthetic transcript files')
+    parser.add_argument('--workers', default=default_workers, help='Comma-separated worker counts to try')
+    args = parser.parse_args()
+    rng = random.Random(20)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        transcripts = os.path.join(tmp, 'transcripts')
+        os.makedirs(transcripts)
+        make_files(transcripts, args.files, rng)
+        score_path = os.path.join(tmp, 'score.json')
+        with open(score_path, 'w', encoding='utf-8') as f:
+            json.dump(make_score_json(60, rng)[:-1], f, ensure_ascii=False)  # 不含格式錯誤的科系
+        paths = batch.find_transcripts(transcripts)
+
+        rows, baseline, reference = [], None, None
+        identical = True
+        for workers in (int(w) for w in args.workers.split(',')):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                records = sorted(batch.run_batch(paths, workers, requirements_path=score_path),
+                                 key=lambda r: r['file'])
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            if reference is None:
+                reference = records
+            identical = identical and records == reference
+            rows.append((workers, len(paths) / elapsed, baseline / elapsed))
+
+        errors = {os.path.basename(r['file']) for r in reference if r['status'] == 'error'}
+        isolated = errors == set(BROKEN_FILES) and len(reference) == len(paths)
+
+        jsonl_path, csv_path = os.path.join(tmp, 'report.jsonl'), os.path.join(tmp, 'report.csv')
+        with contextlib.redirect_stderr(io.StringIO()):
+            batch.main([transcripts, '-o', jsonl_path, '--requirements', score_path, '-j', '2'])
+            batch.main([transcripts, '-o', csv_path, '--requirements', score_path, '-j', '2'])
+        with open(jsonl_path, encoding='utf-8') as f:
+            jsonl_records = sorted((json.loads(line) for line in f), key=lambda r: r['file'])
+        with open(csv_path, encoding='utf-8-sig', newline='') as f:
+            csv_rows = list(csv.DictReader(f))
+        cli_ok = jsonl_records == reference and len(csv_rows) == len(paths)
+
+    print(f"{len(paths)} files ({args.files} transcripts + {len(BROKEN_FILES)} broken), {cpus} CPUs available")
+    print(f"{'workers':>7} {'files/s':>9} {'speedup':>8} {'efficiency':>11}")
+    for workers, rate, speedup in rows:
+        print(f"{workers:7} {rate:9.1f} {speedup:8.2f} {speedup / workers:11.0%}")
+    if cpus < max(w for w, _, _ in rows):
+        print(f"note: only {cpus} CPU(s) here, so speedup beyond {cpus} worker(s) cannot show")
+    print(f"results across worker counts {'identical' if identical else 'DIFFER'}")
+    print(f"per-file error isolation: {'PASS' if isolated else 'FAIL'} (errors: {sorted(errors)})")
+    print(f"CLI JSONL/CSV output: {'PASS' if cli_ok else 'FAIL'}")
+    sys.exit(0 if identical and isolated and cli_ok else 1)
+
+
+if __name__ == '__main__':
+    main()
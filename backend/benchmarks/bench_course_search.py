@@ -0,0 +1,90 @@
+# bench_course_search.py - 課程搜尋索引的建置時間、記憶體與查詢延遲
+# 另確認課號的部分字串 (開頭、中間、結尾) 查到的課程與直接比對 code 欄位相同。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_course_search.py --courses 100000
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_catalogue
+from modules.course_system.search import CourseSearchIndex
+
+QUERIES = [
+    ('single CJK char', '陳', None),
+    ('CJK bigram', '程式', None),
+    ('CJK phrase', '資料結構', None),
+    ('teacher name', '林志明', None),
+    ('code prefix', 'cs10', None),
+    ('code infix', '1001', None),
+    ('mixed terms', '英語 演算法', None),
+    ('dept filter', '設計', ['CS', 'DA']),
+    ('no match', '量子重力', None),
+]
+
+
+def linear_scan(courses, term):
+    """What applyFilters in course.js does today, for comparison."""
+    term = term.lower()
+    return [c for c in courses
+            if term in c['name'].lower() or term in c['teacher'].lower() or term in c['code'].lower()]
+
+
+def check_code_substrings(index, courses, queries):
+    """Every course whose code contains the query must be found (extra hits from other fields are fine)."""
+    failures = []
+    for query in queries:
+        found = {id(course) for course in index.search(query, page_size=len(courses))['courses']}
+        if any(id(course) not in found for course in courses if query in course['code'].lower()):
+            failures.append(query)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the course search index')
+    parser.add_argument('--courses', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    data = make_catalogue(args.courses)
+    index = CourseSearchIndex()
+
+    started = time.perf_counter()
+    index.rebuild(data)
+    build_seconds = time.perf_counter() - started
+
+    # 另外建一次索引量測記憶體 (tracemalloc 會拖慢建置，不計入時間)
+    tracemalloc.start()
+    measured = CourseSearchIndex()
+    measured.rebuild(data)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    print(f"{args.courses} courses: build {build_seconds:.2f} s, "
+          f"index memory {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)")
+    print(f"{'query':18} {'hits':>7} {'p50 ms':>9} {'max ms':>9} {'scan ms':>9}")
+    for name, query, depts in QUERIES:
+        latencies = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = index.search(query, departments=depts, page_size=50)
+            latencies.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        linear_scan(data['courses'], query)
+        scan_ms = (time.perf_counter() - started) * 1000
+        print(f"{name:18} {result['total']:7d} {statistics.median(latencies):9.2f} "
+              f"{max(latencies):9.2f} {scan_ms:9.2f}")
+
+    failures = check_code_substrings(index, data['courses'], ['cs', 'cs10', '1001', '001a', '01', 'a', 's100'])
+    print(f"code substrings vs scanning code: {'PASS' if not failures else 'FAIL ' + str(failures)}")
+    sys.exit(0 if not failures else 1)
+
+
+if __name__ == '__main__':
+    main()
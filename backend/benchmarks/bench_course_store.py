@@ -0,0 +1,62 @@
+# bench_course_store.py - 常駐課程資料的記憶體用量：一般 dict vs CourseStore
+#
+# 以 tracemalloc 量測 json 解析出的 dict 清單，與轉成 CourseStore 後 (釋放原始 dict)
+# 的常駐記憶體，並確認 store[i] 與原始資料完全相同。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_course_store.py --courses 3000
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_catalogue
+from modules.course_system.course_store import CourseStore
+
+
+def resident(build):
+    """Returns (object, bytes still allocated after build() returns)."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident memory of the course catalogue: dicts vs CourseStore')
+    parser.add_argument('--courses', type=int, default=3000)
+    args = parser.parse_args()
+
+    text = json.dumps(make_catalogue(args.courses)['courses'], ensure_ascii=False)
+
+    courses, dict_bytes = resident(lambda: json.loads(text))
+    store, store_bytes = resident(lambda: CourseStore(json.loads(text)))
+
+    started = time.perf_counter()
+    CourseStore(courses)
+    build_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    rebuilt = list(store)
+    iterate_ms = (time.perf_counter() - started) * 1000
+    same = rebuilt == courses
+
+    print(f"{args.courses} courses")
+    print(f"{'representation':18} {'resident KiB':>13} {'bytes/course':>13}")
+    print(f"{'list of dicts':18} {dict_bytes / 1024:13.0f} {dict_bytes / args.courses:13.0f}")
+    print(f"{'CourseStore':18} {store_bytes / 1024:13.0f} {store_bytes / args.courses:13.0f}")
+    print(f"{dict_bytes / store_bytes:.1f}x smaller; build {build_ms:.0f} ms, "
+          f"materialize all dicts {iterate_ms:.0f} ms, {len(store._overrides)} courses with overrides")
+    print("round trip identical" if same else "ROUND TRIP DIFFERS")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
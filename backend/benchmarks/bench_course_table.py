@@ -0,0 +1,103 @@
+# bench_course_table.py - QueryResult.asp 表格解析：原本的 BeautifulSoup(html.parser) vs. course_table (lxml)
+#
+# 先把合成的 QueryResult 頁面存成 fixture 檔，再比較兩種解析方式的速度並確認輸出相同。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_course_table.py --pages 20 --rows 100
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from benchmarks.fixtures import make_catalogue, render_query_result
+from modules.course_system.course_table import parse_courses, parse_seat_updates
+
+
+def legacy_parse_courses(html):
+    """The acquire_data.py row parsing before the shared parser."""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', attrs={'border': '1', 'style': 'font-size: 10pt'})
+    courses = []
+    for row in table.find_all('tr')[2:]:
+        cols_tags = row.find_all('td')
+        if len(cols_tags) < 25: continue
+        cols = [c.get_text(strip=True) for c in cols_tags]
+        teacher_names = cols_tags[14].get_text(separator=', ', strip=True)
+        courses.append({
+            "id": f"{cols[2]}-{teacher_names}", "department": cols[0].upper(), "code": cols[2], "dept_code": cols[4],
+            "grade": cols[5], "class_type": cols[6], "name": cols[7], "credits": cols[8], "type": cols[9],
+            "limit": cols[10], "confirmed": cols[11], "online_count": cols[12], "remaining": cols[13],
+            "teacher": teacher_names, "classroom": cols[15],
+            "time": {day: [t.strip() for t in cols[16 + i].split(',') if t.strip()]
+                     for i, day in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])},
+            "prerequisites": cols[23], "note": cols[24],
+        })
+    return courses
+
+
+def legacy_parse_seat_updates(html):
+    """The fetcher.py row parsing before the shared parser."""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', attrs={'border': '1', 'style': 'font-size: 10pt'})
+    updates = {}
+    for row in table.find_all('tr')[2:]:
+        cols = [c.get_text(strip=True) for c in row.find_all('td')]
+        if len(cols) >= 25:
+            updates[cols[2]] = {"confirmed": cols[11], "online_count": cols[12], "remaining": cols[13]}
+    return updates
+
+
+def timeit(fn, pages, repeat):
+    per_page = []
+    for _ in range(repeat):
+        for html in pages:
+            started = time.perf_counter()
+            fn(html)
+            per_page.append(time.perf_counter() - started)
+    return statistics.median(per_page) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark QueryResult table parsing')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    courses = make_catalogue(args.pages * args.rows)['courses']
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.pages):
+            with open(os.path.join(tmp, f'QueryResult_{i + 1}.html'), 'w', encoding='utf-8') as f:
+                f.write(render_query_result(courses[i * args.rows:(i + 1) * args.rows], i + 1, args.pages))
+        pages = []
+        for name in sorted(os.listdir(tmp)):
+            with open(os.path.join(tmp, name), 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+
+    for html in pages:
+        assert parse_courses(html) == legacy_parse_courses(html)
+        assert parse_seat_updates(html) == legacy_parse_seat_updates(html)
+    target = pages[len(pages) // 2]
+    first_code = parse_courses(target)[0]['code']
+    print(f"outputs identical on {len(pages)} pages of {args.rows} rows")
+
+    cases = [
+        ('full rows', legacy_parse_courses, parse_courses),
+        ('seat columns', legacy_parse_seat_updates, parse_seat_updates),
+        ('stop at first code', lambda h: legacy_parse_seat_updates(h).get(first_code),
+         lambda h: parse_seat_updates(h, stop_at_code=first_code)),
+    ]
+    print(f"{'case':20} {'bs4 ms/page':>12} {'lxml ms/page':>13} {'speed-up':>9}")
+    for name, legacy, fast in cases:
+        legacy_ms = timeit(legacy, pages, args.repeat)
+        fast_ms = timeit(fast, pages, args.repeat)
+        print(f"{name:20} {legacy_ms:12.2f} {fast_ms:13.2f} {legacy_ms / fast_ms:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# bench_course_update_burst.py - 同一課程的並行請求突發：請求合併 (singleflight) 下的等待時間
+#
+# 以假的上游取代學校網站，同時送出大量 /api/course-update 請求，量測整體與最慢請求的時間。
+# 其中一個請求帶不存在的課號。正確性 (只有一次上游請求、沒有 503、只有該請求 404)
+# 由 tests/test_course_update_burst.py 檢查。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_course_update_burst.py --concurrency 100 --upstream-delay 3
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from modules.course_system.disk_cache import SQLiteCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent /api/course-update burst for one course')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--upstream-delay', type=float, default=3.0)
+    args = parser.parse_args()
+
+    upstream_calls = []
+    calls_lock = threading.Lock()
+
+    def fake_upstream(year, semester, sclass, expected_cono=None, **kwargs):
+        with calls_lock:
+            upstream_calls.append((year, semester, sclass))
+        time.sleep(args.upstream_delay)
+        return {"CS101": {"confirmed": "40", "online_count": "3", "remaining": "5"}}
+
+    app_module.fetch_sclass_updates_from_nuk = fake_upstream
+    app_module.limiter.enabled = False
+    app_module.MEMORY_CACHE.clear()
+    app_module.DISK_CACHE = SQLiteCache(os.path.join(tempfile.mkdtemp(), 'burst_cache.sqlite3'))
+    client = app_module.app.test_client()
+    start_barrier = threading.Barrier(args.concurrency)
+
+    def one(i):
+        cono = 'CS999' if i == 0 else 'CS101'  # 一個過期 / 錯誤的課號
+        start_barrier.wait()
+        started = time.perf_counter()
+        resp = client.get(f'/api/course-update?year=114&helf=1&sclass=CS&cono={cono}')
+        return resp.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in results)
+    slowest = max(latency for _, latency in results)
+    print(f"{args.concurrency} concurrent requests in {wall:.2f} s (slowest {slowest:.2f} s)")
+    print(f"upstream calls: {len(upstream_calls)}, status codes: {dict(statuses)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# bench_credit_classifier.py - 課程分類：前綴字典樹 vs 原本逐一掃描對應表
+#
+# 產生數千門課的合成成績單 (含大小寫混用、無法辨識與邊界前綴的課號)，
+# 比較 CourseClassifier 與原本的線性掃描速度。兩者輸出相同由 tests/test_credit_classifier.py 檢查。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_credit_classifier.py --courses 5000
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.credit_system import calculator, credit_deficit_calculator
+from modules.credit_system.classifier import CourseClass, get_classifier
+from modules.credit_system.config import (CC_SUBCATEGORY_MAPPING, COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING,
+                                          GENERAL_SUBCATEGORY_MAPPING)
+
+
+class LegacyClassifier:
+    """The linear scans calculator.py / credit_deficit_calculator.py did before the trie."""
+
+    def __init__(self, mapping, department_mapping=None):
+        self.mapping = mapping
+        self.department_mapping = department_mapping or {}
+        self.sorted_prefixes = sorted(mapping.keys(), key=len, reverse=True)
+
+    def classify(self, course_id):
+        category = None
+        for prefix in self.sorted_prefixes:
+            if course_id.startswith(prefix):
+                category = self.mapping[prefix]
+                break
+        cc_subcategory = None
+        for subcode, subname in CC_SUBCATEGORY_MAPPING.items():
+            if len(course_id) > 2 and course_id[2:2 + len(subcode)] == subcode:
+                cc_subcategory = subname
+                break
+        if not course_id.startswith('CC'):
+            cc_subcategory = None
+        general_subcategory = None
+        for prefix, subname in GENERAL_SUBCATEGORY_MAPPING.items():
+            if course_id.startswith(prefix):
+                general_subcategory = subname
+                break
+        departments = tuple(dept for prefix, dept in self.department_mapping.items()
+                            if course_id.lower().startswith(prefix.lower()))
+        return CourseClass(category, cc_subcategory, general_subcategory, departments)
+
+
+def make_transcript(n_courses, rng):
+    prefixes = (list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING)
+                + ['CC' + code for code in CC_SUBCATEGORY_MAPPING] + ['XY', 'Q', 'C', 'cc', 'Cc'])
+    semesters = []
+    for s in range(max(1, n_courses // 10)):
+        courses = []
+        for _ in range(10):
+            prefix = rng.choice(prefixes)
+            if rng.random() < 0.2:
+                prefix = ''.join(ch.upper() if rng.random() < 0.5 else ch.lower() for ch in prefix)
+            courses.append({
+                "id": f"{prefix}{rng.randrange(0, 999):03d}{rng.choice(['', 'A', 'B'])}",
+                "name": "課程", "credits": rng.choice(['3', '2', '1', '0', '', 'x']),
+                "type": rng.choice(['必修', '選修', ' 必修 ', '通識', '']),
+                "midterm_score": "", "final_score": rng.choice(['95', '60', '59', '0', '', '抵免']),
+                "remark": rng.choice(['', '', '', '棄選']),
+            })
+        semesters.append({"semester_name": f"{110 + s // 2}-{s % 2 + 1}", "courses": courses, "summary": {}})
+    return semesters
+
+
+def run_with(classifier_factory, transcripts):
+    original = calculator.get_classifier, credit_deficit_calculator.get_classifier
+    calculator.get_classifier = credit_deficit_calculator.get_classifier = classifier_factory
+    try:
+        outputs = []
+        started = time.perf_counter()
+        for transcript in transcripts:
+            categorized = calculator.categorize_and_calculate_credits(transcript, COURSE_CODE_MAPPING)
+            department = credit_deficit_calculator.get_department_from_course_prefix(categorized)
+            outputs.append((categorized, department))
+        return outputs, time.perf_counter() - started
+    finally:
+        calculator.get_classifier, credit_deficit_calculator.get_classifier = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Course classification: prefix trie vs linear mapping scans')
+    parser.add_argument('--courses', type=int, default=5000, help='Courses per synthetic transcript')
+    parser.add_argument('--transcripts', type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(18)
+    transcripts = [make_transcript(args.courses, rng) for _ in range(args.transcripts)]
+    ids = [c['id'] for t in transcripts for s in t for c in s['courses']]
+
+    legacy = LegacyClassifier(COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING)
+    trie = get_classifier(COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING)
+    started = time.perf_counter()
+    for i in ids:
+        legacy.classify(i)
+    legacy_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for i in ids:
+        trie._classify(i)
+    trie_s = time.perf_counter() - started
+
+    _, legacy_total = run_with(lambda mapping, dept=None: LegacyClassifier(mapping, dept), transcripts)
+    _, trie_total = run_with(get_classifier, transcripts)
+
+    print(f"{args.transcripts} transcripts x {args.courses} courses ({len(set(ids))} distinct ids)")
+    print(f"{'classifier':22} {'lookup us':>10} {'full analysis s':>16}")
+    print(f"{'linear scans':22} {legacy_s / len(ids) * 1e6:10.2f} {legacy_total:16.3f}")
+    print(f"{'prefix trie':22} {trie_s / len(ids) * 1e6:10.2f} {trie_total:16.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# bench_credit_jobs.py - 學分分析：同步請求 vs 背景工作佇列
+#
+# 以 waitress (少量 worker threads) 啟動 app，run_selenium_process 換成模擬「等待使用者登入」的假流程。
+# 多位使用者同時開始分析時，量測其他 API 的回應延遲：
+#   - 舊的 /api/start-credit-analysis：每個請求在分析期間佔住一個 worker thread
+#   - 新的 /api/credit-analysis：POST 立即回傳 job id，之後以 GET 查詢進度
+# 並確認同時執行的分析數不超過上限、SSE 進度串流、佇列滿時回 503、結果過期後回 404。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_credit_jobs.py --users 8 --login-wait 2
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import contextlib
+import http.client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waitress.server import create_server
+
+import app as app_module
+from modules.credit_system.jobs import CreditAnalysisJobs
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+class FakeAnalysis:
+    """Stands in for run_selenium_process: waits for a 'login', then returns a result; tracks concurrency."""
+
+    def __init__(self, login_wait):
+        self.login_wait = login_wait
+        self.lock = threading.Lock()
+        self.running = self.max_running = self.calls = 0
+
+    def __call__(self, progress=None, student=None):
+        with self.lock:
+            self.running += 1
+            self.calls += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if progress:
+                progress('waiting_login', '請在開啟的瀏覽器視窗中登入...')
+            time.sleep(self.login_wait)
+            if progress:
+                progress('analyzing', '原始成績資料解析完成，正在分析學分...')
+            return {"status": "success", "message": "成績獲取與分類成功！", "data": {"deficit_analysis": {}}}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def request(port, method, path, timeout=120):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request(method, path)
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read() or b'null')
+    finally:
+        conn.close()
+
+
+def probe_latencies(port, stop, interval=0.05):
+    """Latency of a cheap endpoint while analyses are in progress."""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        request(port, 'GET', '/api/credit-analysis-stats')
+        latencies.append(time.perf_counter() - started)
+        time.sleep(interval)
+    return latencies
+
+
+def run_phase(port, users, user_flow):
+    stop = threading.Event()
+    probes = []
+    prober = threading.Thread(target=lambda: probes.extend(probe_latencies(port, stop)))
+    prober.start()
+    results = [None] * users
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, user_flow(port))) for i in range(users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    stop.set()
+    prober.join()
+    return results, probes, wall
+
+
+def legacy_user(port):
+    status, body = request(port, 'POST', '/api/start-credit-analysis')
+    return status == 200 and body['status'] == 'success', None
+
+
+def job_user(port):
+    started = time.perf_counter()
+    status, job = request(port, 'POST', '/api/credit-analysis')
+    submit_latency = time.perf_counter() - started
+    if status != 202:
+        return False, submit_latency
+    while job['state'] not in ('succeeded', 'failed'):
+        time.sleep(0.1)
+        status, job = request(port, 'GET', job['status_url'])
+    return job['state'] == 'succeeded' and job['result']['status'] == 'success', submit_latency
+
+
+def follow_stream(port, path):
+    """Reads one job's SSE stream to the end; returns the event names in order."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    events = []
+    try:
+        conn.request('GET', path)
+        resp = conn.getresponse()
+        for raw in resp.fp:
+            line = raw.decode('utf-8').rstrip('\n')
+            if line.startswith('event: '):
+                events.append(line[7:])
+                if events[-1] in ('done', 'expired'):
+                    break
+    finally:
+        conn.close()
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Credit analysis: blocking request vs background job queue')
+    parser.add_argument('--users', type=int, default=8, help='Users starting an analysis at the same time')
+    parser.add_argument('--login-wait', type=float, default=2.0, help='Seconds the fake analysis waits for a login')
+    parser.add_argument('--threads', type=int, default=4, help='waitress worker threads')
+    parser.add_argument('--max-browsers', type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    fake = FakeAnalysis(args.login_wait)
+    app_module.limiter.enabled = False
+    app_module.SSE_HEARTBEAT = 1
+    app_module.credit_jobs = CreditAnalysisJobs(fake, max_running=args.max_browsers, max_queued=args.users * 2,
+                                                result_ttl=60)
+    server = create_server(app_module.app, host='127.0.0.1', port=0, threads=args.threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    port = server.effective_port
+
+    rows, ok = [], True
+    quiet = contextlib.redirect_stdout(io.StringIO())  # app 的進度訊息
+    quiet.__enter__()
+    for name, flow in (('blocking request', legacy_user), ('job queue', job_user)):
+        fake.max_running = 0
+        results, probes, wall = run_phase(port, args.users, flow)
+        succeeded = sum(1 for success, _ in results if success)
+        submits = [latency for _, latency in results if latency is not None]
+        ok = ok and succeeded == args.users and fake.max_running <= args.max_browsers
+        rows.append((name, succeeded, wall, percentile(probes, 0.5), percentile(probes, 0.99), max(probes, default=0),
+                     percentile(submits, 0.99) if submits else None, fake.max_running))
+
+    # SSE 進度串流：progress ... done
+    status, job = request(port, 'POST', '/api/credit-analysis')
+    events = follow_stream(port, job['stream_url'])
+    stream_ok = status == 202 and events[0] == 'progress' and events[-1] == 'done'
+
+    # 佇列已滿時回 503；結果過期後回 404
+    app_module.credit_jobs = CreditAnalysisJobs(FakeAnalysis(0.5), max_running=1, max_queued=1, result_ttl=0.5)
+    responses = [request(port, 'POST', '/api/credit-analysis') for _ in range(3)]
+    statuses = [status for status, _ in responses]
+    queue_ok = statuses == [202, 202, 503]
+    time.sleep(2.0)  # 兩個工作各 0.5 秒，完成後再過 0.5 秒過期
+    expired_status, _ = request(port, 'GET', responses[0][1]['status_url'])
+    ttl_ok = expired_status == 404 and sum(app_module.credit_jobs.stats().values()) == 0
+    quiet.__exit__(None, None, None)
+
+    print(f"{args.users} users start an analysis at once; {args.threads} waitress threads, "
+          f"{args.max_browsers} browsers at most, {args.login_wait:.1f} s login wait")
+    print(f"{'endpoint':18} {'ok':>4} {'wall s':>7} {'other API p50 ms':>17} {'p99 ms':>8} {'max ms':>8} "
+          f"{'POST p99 ms':>12} {'browsers':>9}")
+    for name, succeeded, wall, p50, p99, worst, submit_p99, browsers in rows:
+        submit = f"{submit_p99 * 1000:12.1f}" if submit_p99 is not None else f"{'-':>12}"
+        print(f"{name:18} {succeeded:4} {wall:7.2f} {p50 * 1000:17.1f} {p99 * 1000:8.1f} {worst * 1000:8.1f} "
+              f"{submit} {browsers:9}")
+    print(f"SSE progress stream: {'PASS' if stream_ok else 'FAIL'} ({' -> '.join(events)})")
+    print(f"503 when the queue is full: {'PASS' if queue_ok else 'FAIL'} ({statuses})")
+    print(f"finished jobs expire after the TTL: {'PASS' if ttl_ok else 'FAIL'}")
+    ok = ok and stream_ok and queue_ok and ttl_ok
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# bench_disk_cache.py - 磁碟快取 (SQLite WAL) 讀取延遲 vs. 向上游抓取
+#
+# 上游以本機 stub server 模擬 (可用 --upstream-latency 模擬學校網站的回應時間)。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_disk_cache.py --courses 3000 --lookups 200 --upstream-latency 0.3
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_catalogue
+from benchmarks.stub_nuk import StubNukServer
+from modules.course_system import fetcher
+from modules.course_system.disk_cache import SQLiteCache
+
+
+def cache_key(course):
+    return f"course:114:1:{course['department']}:{course['code']}"
+
+
+def summarize(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:28} {len(latencies):7d} {statistics.median(latencies) * 1000:10.3f} {p99 * 1000:10.3f}")
+
+
+def read_worker(args):
+    path, keys = args
+    cache = SQLiteCache(path)
+    latencies = []
+    for key in keys:
+        started = time.perf_counter()
+        assert cache.get(key) is not None
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Disk cache read latency vs upstream fetch')
+    parser.add_argument('--courses', type=int, default=3000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--upstream-samples', type=int, default=20)
+    parser.add_argument('--upstream-latency', type=float, default=0.0)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    catalogue = make_catalogue(args.courses)
+    courses = catalogue['courses']
+    rng = random.Random(1)
+
+    stub = StubNukServer(catalogue, latency=args.upstream_latency).start()
+    fetcher.FORM_URL, fetcher.LIST_URL = stub.form_url, stub.list_url
+
+    print(f"{'case':28} {'samples':>7} {'p50 ms':>10} {'p99 ms':>10}")
+    upstream = []
+    for course in rng.sample(courses, args.upstream_samples):
+        started = time.perf_counter()
+        result = fetcher.fetch_course_update_from_nuk('114', '1', course['department'], course['code'])
+        upstream.append(time.perf_counter() - started)
+        assert result is not None
+    stub.stop()
+    summarize('upstream fetch (stub)', upstream)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'course_cache.sqlite3')
+        cache = SQLiteCache(path)
+        started = time.perf_counter()
+        cache.set_many([(cache_key(c), {"confirmed": c['confirmed'], "online_count": c['online_count'],
+                                         "remaining": c['remaining']}) for c in courses])
+        print(f"bulk write of {len(courses)} rows: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        keys = [cache_key(c) for c in rng.choices(courses, k=args.lookups)]
+        cold = SQLiteCache(path)
+        started = time.perf_counter()
+        cold.get(keys[0])
+        print(f"first read incl. connection open: {(time.perf_counter() - started) * 1000:.3f} ms")
+        summarize('disk read (1 process)', read_worker((path, keys)))
+
+        with Pool(args.processes) as pool:
+            per_process = pool.map(read_worker, [(path, keys)] * args.processes)
+        summarize(f'disk read ({args.processes} processes)', [l for lats in per_process for l in lats])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# bench_fetch_tail_latency.py - fetch_sclass_updates_from_nuk 的尾端延遲：有/無 hedged requests
+#
+# stub server 以 --slow-rate 的機率慢 --slow-latency 秒回應 (模擬學校伺服器偶發卡頓)，
+# 並以 --error-rate 的機率回 503。
+# 另確認一次 query_sclass 的多個請求 (表單頁 + 查詢) 合計不超過 expires：每個請求都慢時
+# 在期限到時放棄，而不是每個請求各等一個完整的 timeout；逾時放棄的 hedged attempts 也會停止，
+# 不會佔住 configure_hedging 配置的執行緒，下一次抓取可以立即開始。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_fetch_tail_latency.py --calls 200 --slow-rate 0.1 --slow-latency 3 --deadline 5
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_catalogue
+from benchmarks.stub_nuk import StubNukServer
+from modules.course_system import fetcher
+
+
+def reset_fetcher_state():
+    fetcher._retry_budget = fetcher.RetryBudget()
+    fetcher._attempt_latency = fetcher.LatencyTracker()
+    fetcher._call_latency = fetcher.LatencyTracker(size=100000)
+    for key in fetcher._counters:
+        fetcher._counters[key] = 0
+
+
+def check_expiry(catalogue, delay, budget):
+    """Form GET and result POST each take `delay`; query_sclass must give up `budget` seconds in."""
+    stub = StubNukServer(catalogue, latency=delay).start()
+    fetcher.FORM_URL, fetcher.LIST_URL = stub.form_url, stub.list_url
+    client = fetcher.NukCourseClient(timeout=delay * 10)
+    started = time.monotonic()
+    try:
+        client.query_sclass('114', '1', catalogue['courses'][0]['department'], expires=started + budget)
+        outcome = 'answered'
+    except Exception as e:
+        outcome = type(e).__name__
+    elapsed = time.monotonic() - started
+    stub.stop()
+    return outcome, elapsed, outcome != 'answered' and elapsed < budget + delay / 2
+
+
+def check_abandoned_attempts(catalogue, sclass):
+    """A pool sized for one fetch: after a hedged fetch times out, the next one must not queue."""
+    slow = {'on': False}
+    stub = StubNukServer(catalogue, latency=lambda: 3.0 if slow['on'] else 0.02).start()
+    fetcher.FORM_URL, fetcher.LIST_URL = stub.form_url, stub.list_url
+    reset_fetcher_state()
+    fetcher.configure_hedging(1)
+    for _ in range(fetcher._attempt_latency.min_samples):
+        fetcher.fetch_sclass_updates_from_nuk('114', '1', sclass, deadline=2.0)
+    slow['on'] = True
+    timed_out = fetcher.fetch_sclass_updates_from_nuk('114', '1', sclass, deadline=1.0, hedge=True) is None
+    slow['on'] = False
+    started = time.monotonic()
+    answered = fetcher.fetch_sclass_updates_from_nuk('114', '1', sclass, deadline=2.0, hedge=True) is not None
+    elapsed = time.monotonic() - started
+    stub.stop()
+    fetcher.configure_hedging(fetcher.HEDGE_MAX_FETCHES)
+    return timed_out, elapsed, timed_out and answered and elapsed < 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tail latency of upstream fetches with and without hedging')
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--base-latency', type=float, default=0.03)
+    parser.add_argument('--slow-rate', type=float, default=0.1)
+    parser.add_argument('--slow-latency', type=float, default=3.0)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--deadline', type=float, default=5.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(3)
+
+    def latency():
+        return args.slow_latency if rng.random() < args.slow_rate else args.base_latency
+
+    catalogue = make_catalogue(1000)
+    stub = StubNukServer(catalogue, latency=latency, error_rate=args.error_rate).start()
+    fetcher.FORM_URL, fetcher.LIST_URL = stub.form_url, stub.list_url
+    sclasses = [c['department'] for c in catalogue['courses']]
+
+    print(f"{args.calls} calls, {args.slow_rate:.0%} of requests take {args.slow_latency:.1f} s, "
+          f"{args.error_rate:.0%} return 503, deadline {args.deadline:.1f} s")
+    print(f"{'mode':10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'POSTs':>6} "
+          f"{'hedges':>7} {'failed':>7}")
+    for hedge in (False, True):
+        reset_fetcher_state()
+        # 先累積足夠的延遲樣本，hedge 才知道 p95
+        for sclass in sclasses[:fetcher._attempt_latency.min_samples]:
+            fetcher.fetch_sclass_updates_from_nuk('114', '1', sclass, deadline=args.deadline)
+        reset_attempts = fetcher._attempt_latency
+        reset_fetcher_state()
+        fetcher._attempt_latency = reset_attempts
+        stub.requests = {'GET': 0, 'POST': 0}
+
+        def one(i):
+            return fetcher.fetch_sclass_updates_from_nuk('114', '1', sclasses[i % len(sclasses)],
+                                                         deadline=args.deadline, hedge=hedge)
+
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(one, range(args.calls)))
+        stats = fetcher.upstream_stats()
+        call = stats['call_latency']
+        print(f"{'hedged' if hedge else 'plain':10} {call['p50_ms']:8.0f} {call['p95_ms']:8.0f} "
+              f"{call['p99_ms']:8.0f} {call['max_ms']:8.0f} {stub.requests['POST']:6d} "
+              f"{stats['hedges']:7d} {stats['failures']:7d}")
+    stub.stop()
+
+    outcome, elapsed, ok = check_expiry(catalogue, delay=1.0, budget=1.5)
+    print(f"query_sclass with 1.0 s requests and 1.5 s left: {outcome} after {elapsed:.2f} s "
+          f"{'PASS' if ok else 'FAIL'}")
+    timed_out, elapsed, pool_ok = check_abandoned_attempts(catalogue, sclasses[0])
+    print(f"fetch after a hedged fetch timed out (pool of 2): {elapsed * 1000:.0f} ms "
+          f"{'PASS' if pool_ok else 'FAIL'}{'' if timed_out else ' (first fetch did not time out)'}")
+    sys.exit(0 if ok and pool_ok else 1)
+
+
+if __name__ == '__main__':
+    main()
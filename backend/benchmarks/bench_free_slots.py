@@ -0,0 +1,85 @@
+# bench_free_slots.py - 空堂課程查詢：時段索引 vs 逐門課掃描
+#
+# 以隨機的空堂 (模擬已排了幾門課的課表) 與系所 / 學分 / 類別篩選查詢，
+# 比較 CourseScheduleIndex.fits 與逐門課檢查 time 字典 (前端目前的作法)，並確認結果相同。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_free_slots.py --courses 3000 --queries 200
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import DEPARTMENTS, TYPES, make_catalogue
+from modules.course_system.schedule import CourseScheduleIndex
+from modules.course_system.timeslots import ALL_SLOTS, compile_time
+
+
+def scan_fits(courses, busy_slots, departments, credits, types):
+    """Reference: check every course's time dict against the busy "day-period" keys."""
+    matches = []
+    for course in courses:
+        slots = [f"{day}-{p}" for day, periods in course['time'].items() for p in periods]
+        if not slots or any(slot in busy_slots for slot in slots):
+            continue
+        if departments and course['department'] not in departments:
+            continue
+        if credits and course['credits'] not in credits:
+            continue
+        if types and course['type'] not in types:
+            continue
+        matches.append(course)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Free-slot course lookup: slot index vs full scan')
+    parser.add_argument('--courses', type=int, default=3000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(16)
+
+    catalogue = make_catalogue(args.courses)
+    index = CourseScheduleIndex()
+    started = time.perf_counter()
+    index.rebuild(catalogue)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = []
+    for _ in range(args.queries):
+        timetable = rng.sample(catalogue['courses'], rng.randint(0, 8))
+        busy = 0
+        for course in timetable:
+            busy |= compile_time(course['time'])
+        departments = rng.sample(DEPARTMENTS, rng.choice([0, 0, 1, 2]))
+        credits = rng.sample(['1', '2', '3'], rng.choice([0, 0, 1]))
+        types = rng.sample(TYPES, rng.choice([0, 0, 1]))
+        busy_slots = {f"{day}-{p}" for course in timetable for day, periods in course['time'].items() for p in periods}
+        queries.append((ALL_SLOTS & ~busy, busy_slots, departments, credits, types))
+
+    index_times, scan_times, mismatches = [], [], 0
+    for free, busy_slots, departments, credits, types in queries:
+        started = time.perf_counter()
+        result = index.fits(free, departments, credits, types, page_size=args.courses)
+        index_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        expected = scan_fits(catalogue['courses'], busy_slots, departments, credits, types)
+        scan_times.append(time.perf_counter() - started)
+        if [c['id'] for c in result['courses']] != [c['id'] for c in expected]:
+            mismatches += 1
+
+    print(f"{args.courses} courses, index built in {build_ms:.1f} ms, {args.queries} queries")
+    print(f"{'lookup':18} {'mean ms':>8} {'p99 ms':>8}")
+    for name, times in (('slot index', index_times), ('full scan', scan_times)):
+        p99 = sorted(times)[int(len(times) * 0.99) - 1]
+        print(f"{name:18} {statistics.mean(times) * 1000:8.3f} {p99 * 1000:8.3f}")
+    print(f"mismatches: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
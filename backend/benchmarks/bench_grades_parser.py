@@ -0,0 +1,105 @@
+# bench_grades_parser.py - 歷年成績解析：BeautifulSoup 與直接使用 lxml 的 parse_grades_html
+#
+# 量測 10 / 15 / 20 學期的成績頁面，每份頁面的解析時間。原本的 BeautifulSoup 實作 (reference_parse)
+# 與亂數頁面產生函式 (random_page) 也供 tests/test_grades_parser.py 的黃金輸出比對使用。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_grades_parser.py --repeats 30
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_incremental_analysis import random_semester
+from benchmarks.fixtures import make_score_semesters, render_score_page
+from modules.credit_system.config import CC_SUBCATEGORY_MAPPING, COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from modules.credit_system.parser import parse_grades_html
+
+PREFIXES = list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING) + ['CC' + code for code in CC_SUBCATEGORY_MAPPING]
+
+
+def reference_parse(html_source):
+    """parse_grades_html as it was before the lxml rewrite (golden reference)."""
+    soup = BeautifulSoup(html_source, 'lxml')
+    all_semesters_data = []
+    semester_titles = soup.find_all('font', {'face': '標楷體', 'color': '#0000FF'})
+    for title_tag in semester_titles:
+        semester_data = {"semester_name": title_tag.b.get_text(strip=True), "courses": [], "summary": {}}
+        courses_table = title_tag.find_parent('p').find_next_sibling('table')
+        if not courses_table: continue
+        course_rows = courses_table.find_all('tr')[1:]
+        for row in course_rows:
+            cells = row.find_all('td')
+            if len(cells) == 7:
+                course_info = {"id": cells[0].get_text(strip=True), "name": cells[1].get_text(strip=True), "credits": cells[2].get_text(strip=True), "type": cells[3].get_text(strip=True), "midterm_score": cells[4].get_text(strip=True), "final_score": cells[5].get_text(strip=True), "remark": cells[6].get_text(strip=True)}
+                semester_data["courses"].append(course_info)
+        summary_table = courses_table.find_next_sibling('p').find('table')
+        if summary_table:
+            summary_cells = summary_table.find_all('td')
+            for cell in summary_cells:
+                text = cell.get_text(strip=True)
+                if '：' in text:
+                    key, value = text.split('：', 1)
+                    semester_data["summary"][key] = value
+        all_semesters_data.append(semester_data)
+    return all_semesters_data
+
+
+def decorate(rng, text):
+    """Cell markup the real site (or a browser's page_source) may wrap around a value."""
+    return rng.choice([
+        text, text, text, f'  {text}\n', f'&nbsp;{text}&nbsp;', f'<b>{text}</b>', f'{text}<!-- 備註 -->',
+        f'<span> {text[:1]} </span>{text[1:]}', f'{text}<script>var x = "<td>";</script>',
+        f'{text}<style>td {{ color: red }}</style>', f'{text}<br>', f'<font color="red">{text}</font>',
+        f'<table><tr><td>{text}</td></tr></table>', '&lt;' + text + '&amp;', f'{text}<template><b>x</b></template>',
+    ])
+
+
+def random_page(rng, n_semesters):
+    if rng.random() < 0.5:
+        semesters = make_score_semesters(n_semesters, rng.randrange(6, 12), PREFIXES, rng)
+    else:
+        semesters = [random_semester(rng, PREFIXES, i) for i in range(n_semesters)]
+    for semester in semesters:
+        for course in semester['courses']:
+            for key in course:
+                course[key] = decorate(rng, course[key])
+        semester['summary'] = {decorate(rng, key): decorate(rng, value) for key, value in semester['summary'].items()}
+    return semesters
+
+
+def time_parsers(sizes, repeats, rng):
+    rows = []
+    for n_semesters in sizes:
+        html = render_score_page(make_score_semesters(n_semesters, 10, PREFIXES, rng))
+        timings = []
+        for parse in (reference_parse, parse_grades_html):
+            started = time.perf_counter()
+            for _ in range(repeats):
+                result = parse(html)
+            timings.append((time.perf_counter() - started) / repeats)
+        rows.append((n_semesters, len(html), timings[0], timings[1], result == reference_parse(html)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='parse_grades_html: BeautifulSoup vs lxml latency')
+    parser.add_argument('--repeats', type=int, default=30, help='Parses per page size')
+    args = parser.parse_args()
+    rng = random.Random(24)
+
+    rows = time_parsers((10, 15, 20), args.repeats, rng)
+
+    print(f"{'semesters':>9} {'page KB':>8} {'bs4 ms':>8} {'lxml ms':>8} {'speedup':>8}")
+    for n_semesters, size, bs4_s, lxml_s, same in rows:
+        print(f"{n_semesters:9} {size / 1024:8.0f} {bs4_s * 1000:8.2f} {lxml_s * 1000:8.2f} "
+              f"{bs4_s / lxml_s:7.1f}x{'' if same else '  DIFFERS'}")
+
+
+if __name__ == '__main__':
+    main()
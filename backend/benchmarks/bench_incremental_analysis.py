@@ -0,0 +1,147 @@
+# bench_incremental_analysis.py - 成績頁面的增量分析 (TranscriptCache)：重新分析的時間
+#
+# 量測「只有最新學期改變」時，同一位學生重新解析並分析成績頁面的時間 (完整重算 vs TranscriptCache)。
+# 亂數成績資料的產生函式 (random_semester、mutate、malform) 也供
+# tests/test_incremental_analysis.py 的等價性檢查使用。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_incremental_analysis.py --semesters 8 --reruns 100
+import os
+import re
+import sys
+import copy
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_score_semesters, render_score_page
+from modules.credit_system import calculator
+from modules.credit_system.classifier import get_classifier
+from modules.credit_system.config import COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from modules.credit_system.parser import parse_grades_html
+from modules.credit_system.transcript_cache import TranscriptCache
+
+# XY 是沒有博雅通識子分類的前綴，cc 會分類為核心通識但不以 CC 開頭：兩者都應歸入「其他 (無法辨識)」
+UNPLACED_MAPPING = dict(COURSE_CODE_MAPPING, XY='博雅通識', cc='核心通識')
+UNPLACED_PREFIXES = ('XY', 'cc')
+
+
+def random_course(rng, prefixes):
+    prefix = rng.choice(prefixes)
+    if rng.random() < 0.1:
+        prefix = ''.join(ch.upper() if rng.random() < 0.5 else ch.lower() for ch in prefix)
+    return {
+        "id": f"{prefix}{rng.randrange(0, 999):03d}{rng.choice(['', 'A'])}",
+        "name": "課程", "credits": rng.choice(['3', '3', '2', '1', '0', '2.3', '0.1', '', 'x']),
+        "type": rng.choice(['必修', '選修', ' 必修 ', '通識', '']),
+        "midterm_score": "", "final_score": rng.choice(['95', '60', '59.9', '0', '', '抵免', '77.7']),
+        "remark": rng.choice(['', '', '', '棄選']),
+    }
+
+
+def random_semester(rng, prefixes, index):
+    return {"semester_name": f"{110 + index // 2}-{index % 2 + 1}",
+            "courses": [random_course(rng, prefixes) for _ in range(rng.randrange(0, 12))], "summary": {}}
+
+
+def outcome(function, *args):
+    """The result, or the exception type when the call raises (both implementations must agree)."""
+    try:
+        return function(*args)
+    except Exception as e:
+        return type(e)
+
+
+def mutate(rng, semesters, prefixes):
+    """One rerun of the same student: usually a new or updated latest semester, sometimes any other edit."""
+    semesters = copy.deepcopy(semesters)
+    action = rng.choice(['append', 'append', 'grade', 'grade', 'edit', 'remove', 'swap', 'same'])
+    if action == 'append' or not semesters:
+        semesters.append(random_semester(rng, prefixes, len(semesters)))
+    elif action == 'grade':
+        for course in semesters[-1]['courses']:
+            course['final_score'] = rng.choice(['95', '60', '59', '抵免'])
+    elif action == 'edit':
+        semester = rng.choice(semesters)
+        if semester['courses']:
+            rng.choice(semester['courses'])['credits'] = rng.choice(['3', '2', '2.3'])
+        else:
+            semester['courses'].append(random_course(rng, prefixes))
+    elif action == 'remove':
+        semesters.pop(rng.randrange(len(semesters)))
+    elif action == 'swap' and len(semesters) > 1:
+        i, j = rng.sample(range(len(semesters)), 2)
+        semesters[i], semesters[j] = semesters[j], semesters[i]
+    return semesters
+
+
+def malform(rng, html):
+    """A page the block splitter must not get wrong: a missing tag, a stray one, or a near-miss title."""
+    action = rng.choice(['drop_close', 'drop_p', 'stray', 'lowercase_title', 'quote_title', 'duplicate'])
+    if action == 'drop_close':
+        tags = [m.start() for m in re.finditer(r'</(table|p|tr|font)>', html)]
+        if tags:
+            at = rng.choice(tags)
+            return html[:at] + html[html.index('>', at) + 1:]
+    elif action == 'drop_p':
+        titles = [m.start() for m in re.finditer('<p><font face="標楷體"', html)]
+        if titles:
+            at = rng.choice(titles)
+            return html[:at] + html[at + 3:]
+    elif action == 'stray':
+        at = rng.choice([m.start() for m in re.finditer('<', html)])
+        return html[:at] + rng.choice(['<table>', '<div>', '<p>', '</p>', '<font size="2">']) + html[at:]
+    elif action == 'lowercase_title':
+        return html.replace('color="#0000FF"', 'color="#0000ff"', 1)
+    elif action == 'quote_title':
+        return html.replace('<font face="標楷體" color="#0000FF">', "<font color='#0000FF' face=標楷體>", 1)
+    elif action == 'duplicate':
+        blocks = html.split('<p><font face=')
+        if len(blocks) > 1:
+            i = rng.randrange(1, len(blocks))
+            blocks.insert(i, blocks[i])
+            return '<p><font face='.join(blocks)
+    return html
+
+
+def time_reruns(n_semesters, reruns, rng):
+    """A student whose newest semester changes between reruns, analysed from the transcript page."""
+    prefixes = list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING)
+    semesters = make_score_semesters(n_semesters, 9, prefixes, rng)
+    pages = []
+    for _ in range(reruns):
+        semesters[-1] = make_score_semesters(n_semesters, 9, prefixes, rng)[-1]
+        # 每次重新分析都是新讀到的頁面字串 (字串的雜湊值尚未快取)
+        pages.append(''.join(list(render_score_page(semesters))))
+    get_classifier(COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING)  # 編譯不計入時間
+
+    started = time.perf_counter()
+    full = [calculator.analyze_grades(parse_grades_html(page)) for page in pages]
+    full_s = time.perf_counter() - started
+    cache = TranscriptCache()
+    calculator.analyze_grades(cache.parse(pages[0]), cache=cache)  # 第一次分析
+    started = time.perf_counter()
+    cached = [calculator.analyze_grades(cache.parse(page), cache=cache) for page in pages]
+    cached_s = time.perf_counter() - started
+    return full_s / reruns, cached_s / reruns, full == cached, cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental transcript analysis: rerun latency')
+    parser.add_argument('--semesters', type=int, default=8, help='Semesters of the timed student')
+    parser.add_argument('--reruns', type=int, default=100)
+    args = parser.parse_args()
+    rng = random.Random(23)
+
+    full_s, cached_s, same, rerun_stats = time_reruns(args.semesters, args.reruns, rng)
+
+    print(f"rerun with only the newest of {args.semesters} semesters changed:")
+    print(f"  full parse + analysis   {full_s * 1000:8.2f} ms")
+    print(f"  with TranscriptCache    {cached_s * 1000:8.2f} ms  ({rerun_stats['hits']} hits, "
+          f"{rerun_stats['misses']} misses; results {'identical' if same else 'DIFFER'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# bench_requirements_registry.py - 學分要求：每次重新讀取 score.json vs RequirementsRegistry 快取
+#
+# 在暫存目錄寫入合成的 data/score.json，量測 calculate_deficit_with_department
+# 每次分析的延遲 (原本每次呼叫都重新開檔解析)，並確認：
+#   - 兩種作法的分析結果完全相同
+#   - 格式錯誤的科系會被略過、可用科系代碼前綴查詢
+#   - 修改檔案後 (mtime 改變) 會自動重新載入，多執行緒同時查詢不會出錯
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_requirements_registry.py --analyses 2000 --departments 60
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.credit_system import calculator, credit_deficit_calculator
+from modules.credit_system.config import DEPARTMENT_PREFIX_MAPPING
+from modules.credit_system.requirements import RequirementsRegistry
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_credit_classifier import make_transcript
+from fixtures import make_score_json
+
+
+class LegacyRegistry:
+    """What calculate_credit_deficit did before: re-open and re-parse score.json on every lookup."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def lookup(self, department):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        requirements = {}
+        for dept_info in data:
+            dept_name = dept_info.get('科系', '')
+            if dept_name:
+                requirements[dept_name] = {
+                    '系必修': dept_info.get('系必修', 0),
+                    '領域選修': dept_info.get('領域選修', 0),
+                    '校定必修': dept_info.get('校定必修', 0),
+                    '通識選修': dept_info.get('通識選修', 0),
+                    '總學分': dept_info.get('畢業學分', 0)
+                }
+        if department in requirements:
+            return department, requirements[department]
+        return None, None
+
+
+def run_analyses(registry, transcripts, departments):
+    original = credit_deficit_calculator.get_requirements_registry
+    credit_deficit_calculator.get_requirements_registry = lambda: registry
+    try:
+        outputs = []
+        started = time.perf_counter()
+        for transcript, department in zip(transcripts, departments):
+            outputs.append(calculator.calculate_deficit_with_department(transcript, department))
+        return outputs, time.perf_counter() - started
+    finally:
+        credit_deficit_calculator.get_requirements_registry = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Graduation requirements: re-read score.json per call vs cached registry')
+    parser.add_argument('--analyses', type=int, default=2000)
+    parser.add_argument('--departments', type=int, default=60, help='Departments in the synthetic score.json')
+    parser.add_argument('--courses', type=int, default=60, help='Courses per synthetic transcript')
+    args = parser.parse_args()
+    rng = random.Random(19)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'score.json')
+        data = make_score_json(args.departments, rng)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        names = [d['科系'] for d in data[:-1]]
+        pool = [make_transcript(args.courses, rng) for _ in range(20)]
+        transcripts = [pool[i % len(pool)] for i in range(args.analyses)]
+        departments = [rng.choice(names + ['不存在學系']) for _ in range(args.analyses)]
+
+        registry = RequirementsRegistry(path, check_interval=0.05)
+        legacy_out, legacy_s = run_analyses(LegacyRegistry(path), transcripts, departments)
+        cached_out, cached_s = run_analyses(registry, transcripts, departments)
+        same_output = legacy_out == cached_out
+
+        checks = {
+            'invalid entry skipped': '格式錯誤學系' not in registry.all() and len(registry.errors) == 1,
+            'prefix lookup': registry.lookup('CS') == registry.lookup(DEPARTMENT_PREFIX_MAPPING['cs']),
+        }
+
+        # 多執行緒查詢的同時改寫檔案：每次查詢都要拿到完整的一筆資料
+        target = names[0]
+        failures = []
+
+        def reader(_):
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                entry = registry.get(target)
+                if entry is None or entry['總學分'] not in (128, 132):
+                    failures.append(entry)
+
+        def writer():
+            for total in (132, 128, 132):
+                time.sleep(0.1)
+                for d in data:
+                    d['畢業學分'] = total if d['科系'] != '格式錯誤學系' else 128
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(reader, range(8)))
+        writer_thread.join()
+        time.sleep(0.1)
+        checks['thread-safe lookups'] = not failures
+        checks['hot reload on mtime change'] = registry.get(target)['總學分'] == 132
+
+    print(f"{args.analyses} analyses x {args.courses} courses, {len(names)} departments in score.json")
+    print(f"{'requirements':22} {'per analysis ms':>16} {'total s':>9}")
+    print(f"{'re-read score.json':22} {legacy_s / args.analyses * 1000:16.3f} {legacy_s:9.3f}")
+    print(f"{'cached registry':22} {cached_s / args.analyses * 1000:16.3f} {cached_s:9.3f}")
+    print(f"analysis output {'identical' if same_output else 'DIFFERS'}")
+    for name, passed in checks.items():
+        print(f"{name}: {'PASS' if passed else 'FAIL'}")
+    sys.exit(0 if same_output and all(checks.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
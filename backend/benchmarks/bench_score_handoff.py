@@ -0,0 +1,173 @@
+# bench_score_handoff.py - 登入後讀取成績：瀏覽器 page_source vs cookie 交給 requests
+#
+# 以本機 stub (benchmarks/stub_aca.py) 模擬登入、選單與歷年成績頁面。
+#   1. HTTP 交接 (不需要 Chrome)：以登入後的 cookie 用 fetch_grades 讀取成績，
+#      確認解析結果與產生的成績相同、未登入時回傳 None (會改用瀏覽器讀取)，並量測延遲。
+#   2. 完整流程 (需要 Chrome / chromedriver)：以 headless Chrome 執行 run_selenium_process
+#      與原本的流程 (每次 ChromeDriverManager().install()、以瀏覽器讀取成績頁面)，
+#      量測每次分析的 time-to-result 與整個行程樹 (含 Chrome) 的 peak RSS。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_score_handoff.py --analyses 5
+#   CHROMEDRIVER_PATH=/usr/bin/chromedriver python benchmarks/bench_score_handoff.py --analyses 5
+import io
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import threading
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.fixtures import make_score_semesters
+from benchmarks.stub_aca import COOKIE_NAME, StubAcaServer
+from modules.credit_system import scraper
+from modules.credit_system.calculator import analyze_grades
+from modules.credit_system.config import COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from modules.credit_system.parser import parse_grades_html
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def tree_rss(root_pid):
+    """RSS in bytes of root_pid and all its descendants (Linux /proc)."""
+    parents, rss = {}, {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                stat = f.read()
+            with open(f'/proc/{name}/statm') as f:
+                rss[int(name)] = int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            continue
+        parents[int(name)] = int(stat.rsplit(')', 1)[1].split()[1])
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(child for child, parent in parents.items() if parent == pid)
+    return total
+
+
+class PeakRss:
+    """Samples tree_rss(self) in the background and keeps the maximum."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def legacy_run_selenium_process():
+    """The flow before the cookie handoff: driver path resolved per run, transcript read through the browser."""
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    driver = None
+    try:
+        service = Service(os.getenv('CHROMEDRIVER_PATH') or scraper.ChromeDriverManager().install())
+        driver = scraper.webdriver.Chrome(service=service)
+        driver.get(scraper.LOGIN_URL)
+        WebDriverWait(driver, 300).until(EC.url_contains(scraper.SUCCESS_URL_KEYWORD))
+        driver.get(scraper.SCORE_QUERY_URL)
+        grades_data = parse_grades_html(driver.page_source)
+        return {"status": "success", "data": analyze_grades(grades_data, mapping=COURSE_CODE_MAPPING)}
+    finally:
+        if driver:
+            driver.quit()
+
+
+def check_http_handoff(stub, semesters, iterations):
+    session = requests.Session()
+    session.cookies.set(COOKIE_NAME, stub.login())
+    started = time.perf_counter()
+    for _ in range(iterations):
+        grades = scraper.fetch_grades(session)
+    per_fetch = (time.perf_counter() - started) / iterations
+    anonymous = scraper.fetch_grades(requests.Session())
+    return grades == semesters and anonymous is None, per_fetch
+
+
+def headless_chrome():
+    from selenium.webdriver.chrome.options import Options
+    options = Options()
+    for argument in ('--headless=new', '--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu'):
+        options.add_argument(argument)
+    real_chrome = scraper.webdriver.Chrome
+    return lambda service=None, **kwargs: real_chrome(service=service, options=options)
+
+
+def run_full(flow, analyses):
+    times, peaks, ok = [], [], True
+    for _ in range(analyses):
+        with PeakRss() as rss, contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = flow()
+            times.append(time.perf_counter() - started)
+        peaks.append(rss.peak)
+        ok = ok and result.get('status') == 'success'
+    return ok, times, peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transcript retrieval after login: browser page_source vs cookie handoff')
+    parser.add_argument('--analyses', type=int, default=5, help='Full analyses per flow (needs Chrome)')
+    parser.add_argument('--fetches', type=int, default=50, help='HTTP handoff fetches to time')
+    parser.add_argument('--login-ms', type=int, default=200, help='Delay before the stub login page submits itself')
+    args = parser.parse_args()
+    rng = random.Random(22)
+    semesters = make_score_semesters(8, 9, list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING), rng)
+    stub = StubAcaServer(semesters, auto_login_ms=args.login_ms).start()
+    scraper.LOGIN_URL, scraper.SCORE_QUERY_URL = stub.login_url, stub.score_url
+
+    handoff_ok, per_fetch = check_http_handoff(stub, semesters, args.fetches)
+    print(f"HTTP handoff: {'PASS' if handoff_ok else 'FAIL'} "
+          f"(fetch + parse {per_fetch * 1000:.1f} ms per transcript; anonymous session falls back to the browser)")
+
+    chrome = shutil.which('google-chrome') or shutil.which('chromium') or shutil.which('chromium-browser')
+    full_ok = True
+    if not chrome:
+        print("full flow: skipped (no Chrome / Chromium found on PATH)")
+    else:
+        scraper.webdriver.Chrome = headless_chrome()
+        rows = []
+        for name, flow in (('browser page_source', legacy_run_selenium_process),
+                           ('cookie handoff', scraper.run_selenium_process)):
+            ok, times, peaks = run_full(flow, args.analyses)
+            full_ok = full_ok and ok
+            rows.append((name, ok, times, peaks))
+        print(f"{args.analyses} analyses per flow, {args.login_ms} ms simulated login")
+        print(f"{'flow':22} {'first s':>8} {'median s':>9} {'peak RSS MB':>12}")
+        for name, ok, times, peaks in rows:
+            print(f"{name:22} {times[0]:8.2f} {sorted(times)[len(times) // 2]:9.2f} "
+                  f"{max(peaks) / 2 ** 20:12.0f}{'' if ok else '  FAILED'}")
+        print(f"stub requests: {stub.requests}")
+    stub.stop()
+    ok = handoff_ok and full_ok
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+# bench_seat_stream.py - /api/stream/seats 負載測試：大量並行 SSE 訂閱者
+#
+# 以 waitress 啟動 app，上游換成本機 stub server。許多訂閱者各自訂閱幾門課程，
+# 期間隨機改動 stub 上的剩餘名額，量測變動推送到訂閱者的延遲、漏送數量，
+# 以及上游請求數 (應只取決於被關注的 Sclass 數量，與訂閱者人數無關)。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_seat_stream.py --subscribers 500 --duration 10
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waitress.server import create_server
+
+import app as app_module
+from benchmarks.fixtures import make_catalogue
+from benchmarks.stub_nuk import StubNukServer
+from modules.course_system import fetcher
+from modules.course_system.disk_cache import SQLiteCache
+from modules.course_system.watcher import SeatWatcher
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+class Subscriber(threading.Thread):
+    def __init__(self, port, query):
+        super().__init__(daemon=True)
+        self.port, self.query = port, query
+        self.ready = threading.Event()
+        self.received = []  # (monotonic time, sclass, cono, remaining)
+        self.error = None
+        self._conn = None
+
+    def run(self):
+        try:
+            self._conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            self._conn.request('GET', f'/api/stream/seats?{self.query}')
+            resp = self._conn.getresponse()
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+            event = None
+            for raw in resp.fp:
+                line = raw.decode('utf-8').rstrip('\n')
+                if line.startswith('event: '):
+                    event = line[7:]
+                elif line.startswith('data: '):
+                    data = json.loads(line[6:])
+                    if event == 'snapshot':
+                        self.ready.set()
+                    elif event == 'seats':
+                        now = time.monotonic()
+                        for change in data['changes']:
+                            if change.get('remaining') is not None:
+                                self.received.append((now, change['sclass'], change['cono'], change['remaining']))
+        except Exception as e:
+            if self._conn is not None:
+                self.error = e
+        finally:
+            self.ready.set()
+
+    def stop(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and conn.sock is not None:
+            conn.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent SSE subscribers on /api/stream/seats')
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--courses-per-subscriber', type=int, default=3)
+    parser.add_argument('--sclasses', type=int, default=5, help='Number of departments the watched courses come from')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--change-interval', type=float, default=0.5)
+    parser.add_argument('--time-scale', type=float, default=0.01, help='Multiplier applied to the watch intervals')
+    parser.add_argument('--upstream-latency', type=float, default=0.02)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    rng = random.Random(14)
+
+    catalogue = make_catalogue(2000)
+    stub = StubNukServer(catalogue, latency=args.upstream_latency).start()
+    fetcher.FORM_URL, fetcher.LIST_URL = stub.form_url, stub.list_url
+
+    app_module.limiter.enabled = False
+    app_module.MEMORY_CACHE.clear()
+    app_module.DISK_CACHE = SQLiteCache(os.path.join(tempfile.mkdtemp(), 'stream_cache.sqlite3'))
+    app_module.seat_watcher = SeatWatcher(
+        fetch=lambda year, semester, sclass: app_module.fetch_sclass_into_cache(year, semester, sclass),
+        executor=ThreadPoolExecutor(max_workers=2),
+        min_interval=app_module.WATCH_MIN_INTERVAL * args.time_scale,
+        max_interval=app_module.WATCH_MAX_INTERVAL * args.time_scale,
+        lease=app_module.WATCH_LEASE,
+        max_polls_per_minute=10 ** 6,
+    )
+    app_module.SSE_HEARTBEAT = 2
+
+    # waitress 每條串流佔用一個 worker thread；threads 需大於同時連線數 (串流上限也放寬到訂閱者人數)
+    app_module.SSE_MAX_STREAMS = args.subscribers
+    app_module.stream_slots = threading.BoundedSemaphore(args.subscribers)
+    server = create_server(app_module.app, host='127.0.0.1', port=0, threads=args.subscribers + 16,
+                           connection_limit=args.subscribers + 100, send_bytes=1,
+                           asyncore_use_poll=True)
+    threading.Thread(target=server.run, daemon=True).start()
+
+    departments = sorted({c['department'] for c in catalogue['courses']})[:args.sclasses]
+    pool = [c for c in catalogue['courses'] if c['department'] in departments]
+    subscribers = []
+    for _ in range(args.subscribers):
+        chosen = rng.sample(pool, args.courses_per_subscriber)
+        query = urlencode([('year', '114'), ('helf', '1')] +
+                          [('course', f"{c['department']}:{c['code']}") for c in chosen])
+        subscriber = Subscriber(server.effective_port, query)
+        subscriber.courses = {(c['department'], c['code']) for c in chosen}
+        subscribers.append(subscriber)
+        subscriber.start()
+
+    started = time.perf_counter()
+    for subscriber in subscribers:
+        subscriber.ready.wait(30)
+    connect_wall = time.perf_counter() - started
+    failed = [s for s in subscribers if s.error is not None]
+    time.sleep(1.0)  # 讓初次抓取的結果先送完
+
+    watched = sorted({course for s in subscribers for course in s.courses})
+    by_key = {(c['department'], c['code']): c for c in pool}
+    posts_before = stub.requests['POST']
+    changes = []  # (monotonic time, sclass, cono, remaining)
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        sclass, cono = rng.choice(watched)
+        course = by_key[(sclass, cono)]
+        course['remaining'] = str(int(course['remaining']) + rng.randint(1, 5))
+        changes.append((time.monotonic(), sclass, cono, course['remaining']))
+        time.sleep(args.change_interval)
+    time.sleep(max(2.0, app_module.WATCH_MAX_INTERVAL * args.time_scale * 1.2))
+    posts = stub.requests['POST'] - posts_before
+    hub_stats = app_module.seat_hub.stats()
+
+    latencies, expected, missed = [], 0, 0
+    for changed_at, sclass, cono, remaining in changes:
+        for subscriber in subscribers:
+            if (sclass, cono) not in subscriber.courses:
+                continue
+            expected += 1
+            got = [t for t, s, c, r in subscriber.received if (s, c, r) == (sclass, cono, remaining)]
+            # 同一課程在下次抓取前被改兩次時，中間值會被合併；以之後第一次收到的新值計
+            later = [t for t, s, c, r in subscriber.received if (s, c) == (sclass, cono) and t >= changed_at]
+            if got:
+                latencies.append(got[0] - changed_at)
+            elif later:
+                latencies.append(later[0] - changed_at)
+            else:
+                missed += 1
+
+    for subscriber in subscribers:
+        subscriber.stop()
+    server.close()
+    stub.stop()
+
+    print(f"{args.subscribers} subscribers x {args.courses_per_subscriber} courses "
+          f"({len(watched)} distinct courses in {args.sclasses} Sclasses), connected in {connect_wall:.2f} s, "
+          f"{len(failed)} failed")
+    print(f"{len(changes)} seat changes, {expected} expected deliveries, {missed} missed")
+    print(f"delivery latency: p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms, max {max(latencies, default=0) * 1000:.0f} ms")
+    print(f"upstream POSTs during changes: {posts} ({posts / args.duration:.1f}/s)")
+    print(f"hub: {hub_stats}")
+    ok = not failed and missed == 0 and expected > 0
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
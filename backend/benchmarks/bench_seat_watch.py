@@ -0,0 +1,121 @@
+# bench_seat_watch.py - 名額監看排程：抓取頻率分配，以及關注中課程的查詢是否都命中快取
+#
+# 以假的上游取代學校網站，並把排程間隔縮小 (預設 1/100) 以便在數秒內觀察。
+# 各 Sclass 的關注人數與剩餘名額不同；熱門、名額將滿的 Sclass 應被抓得較頻繁，
+# 而關注中的課程在 /api/course-update 上不應觸發任何同步的上游請求。
+# 另確認 /api/course-updates 與 /api/watch 遇到過期 (stale) 的快取時直接回傳並在背景重新抓取，
+# 同一個 Sclass 的多門課一起過期時只抓取一次。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_seat_watch.py --duration 5
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from modules.course_system.disk_cache import SQLiteCache
+from modules.course_system.watcher import SeatWatcher
+
+# (Sclass, watchers, remaining seats)
+SCENARIO = [('CS', 20, 0), ('EE', 20, 30), ('AM', 1, 0), ('LA', 1, 30), ('FI', 5, 3)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seat-watch scheduler poll distribution and cache coverage')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--time-scale', type=float, default=0.01, help='Multiplier applied to the watch intervals')
+    parser.add_argument('--upstream-delay', type=float, default=0.02)
+    args = parser.parse_args()
+
+    remaining = {sclass: seats for sclass, _, seats in SCENARIO}
+    polls = Counter()
+    request_time_calls = []
+    in_requests = threading.Event()
+    lock = threading.Lock()
+
+    def fake_upstream(year, semester, sclass, expected_cono=None, **kwargs):
+        with lock:
+            polls[sclass] += 1
+            if in_requests.is_set() and threading.current_thread() is threading.main_thread():
+                request_time_calls.append(sclass)
+        time.sleep(args.upstream_delay)
+        return {f"{sclass}{i}": {"confirmed": "40", "online_count": "3", "remaining": str(remaining[sclass])}
+                for i in range(3)}
+
+    app_module.fetch_sclass_updates_from_nuk = fake_upstream
+    app_module.limiter.enabled = False
+    app_module.MEMORY_CACHE.clear()
+    app_module.DISK_CACHE = SQLiteCache(os.path.join(tempfile.mkdtemp(), 'watch_cache.sqlite3'))
+    app_module.seat_watcher = SeatWatcher(
+        fetch=lambda year, semester, sclass: app_module.fetch_sclass_into_cache(year, semester, sclass),
+        executor=ThreadPoolExecutor(max_workers=2),
+        min_interval=app_module.WATCH_MIN_INTERVAL * args.time_scale,
+        max_interval=app_module.WATCH_MAX_INTERVAL * args.time_scale,
+        lease=app_module.WATCH_LEASE,
+        max_polls_per_minute=10 ** 6,
+    )
+    client = app_module.app.test_client()
+
+    for sclass, watchers, _ in SCENARIO:
+        for w in range(watchers):
+            courses = [{"year": "114", "helf": "1", "sclass": sclass, "cono": f"{sclass}{i}"} for i in range(3)]
+            resp = client.post('/api/watch', json={"client": f"user{w}", "courses": courses})
+            assert resp.status_code == 200, resp.get_json()
+
+    time.sleep(args.duration)
+    stats = app_module.seat_watcher.stats()
+
+    # 關注中的課程：查詢應全部命中快取，不等待上游
+    in_requests.set()
+    latencies = []
+    for sclass, _, _ in SCENARIO:
+        for i in range(3):
+            started = time.perf_counter()
+            resp = client.get(f'/api/course-update?year=114&helf=1&sclass={sclass}&cono={sclass}{i}')
+            latencies.append(time.perf_counter() - started)
+            assert resp.status_code == 200, resp.get_json()
+    in_requests.clear()
+
+    print(f"{'Sclass':8} {'watchers':>8} {'remaining':>9} {'polls':>6}")
+    for sclass, watchers, seats in SCENARIO:
+        print(f"{sclass:8} {watchers:8d} {seats:9d} {polls[sclass]:6d}")
+    print(f"scheduler: {stats}")
+    print(f"course-update on watched courses: max {max(latencies) * 1000:.1f} ms, "
+          f"upstream calls during requests: {len(request_time_calls)}")
+
+    # 過期的快取：先回傳舊值，背景只重新抓取一次
+    remaining['ZZ'] = 7
+    courses = [{"year": "114", "helf": "1", "sclass": "ZZ", "cono": f"ZZ{i}"} for i in range(3)]
+    for course in courses:
+        app_module.cache_set(app_module.course_cache_key("114", "1", "ZZ", course['cono']),
+                             {"confirmed": "40", "online_count": "3", "remaining": "1"}, ttl=0.001)
+    time.sleep(0.01)
+    batch = client.post('/api/course-updates', json={"courses": courses}).get_json()['results']
+    time.sleep(args.upstream_delay * 10)
+    refreshed = client.post('/api/course-updates', json={"courses": courses}).get_json()['results']
+    stale_ok = ([entry.get('remaining') for entry in batch] == ['1'] * 3 and polls['ZZ'] == 1
+                and [entry.get('remaining') for entry in refreshed] == ['7'] * 3)
+    for course in courses:
+        app_module.cache_set(app_module.course_cache_key("114", "1", "ZZ", course['cono']),
+                             {"confirmed": "40", "online_count": "3", "remaining": "1"}, ttl=0.001)
+    time.sleep(0.01)
+    watched = client.post('/api/watch', json={"client": "stale", "courses": courses}).get_json()['results']
+    stale_ok = stale_ok and not any(entry.get('pending') for entry in watched)
+    print(f"stale entries served and refreshed once per Sclass: {'PASS' if stale_ok else 'FAIL'} "
+          f"({polls['ZZ']} fetches)")
+
+    ok = (stale_ok and not request_time_calls and max(latencies) < args.upstream_delay
+          and polls['CS'] > polls['EE'] and polls['CS'] > polls['AM'] > polls['LA'] and polls['FI'] > polls['LA'])
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
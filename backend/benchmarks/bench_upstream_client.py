@@ -0,0 +1,81 @@
+# bench_upstream_client.py - 課程名額查詢：每次新 session + GET 表單 vs. NukCourseClient (連線池 + 表單快取)
+#
+# 上游為本機 stub server；--connect-latency 模擬每條新連線的 TLS 交握成本。
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/bench_upstream_client.py --lookups 100 --threads 8 --connect-latency 0.05 --upstream-latency 0.02
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_catalogue
+from benchmarks.stub_nuk import StubNukServer
+from modules.course_system import fetcher
+from modules.course_system.course_table import parse_hidden_inputs, parse_seat_updates
+
+
+def legacy_lookup(year, semester, sclass):
+    """One attempt of the old flow: fresh session, GET the form page, then POST."""
+    session = fetcher._make_session()
+    headers = {'User-Agent': random.choice(fetcher.USER_AGENTS)}
+    form_resp = session.get(fetcher.FORM_URL, headers=headers, timeout=15)
+    form_resp.encoding = 'big5'
+    payload = {'OpenYear': year, 'Helf': semester, 'Pclass': 'A', 'Sclass': sclass, 'Page': '1'}
+    payload.update(parse_hidden_inputs(form_resp.text))
+    r = session.post(fetcher.LIST_URL, data=payload, headers=headers, timeout=15)
+    r.encoding = 'utf-8'
+    session.close()
+    return parse_seat_updates(r.text)
+
+
+def run(stub, lookup, sclasses, threads):
+    stub.requests = {'GET': 0, 'POST': 0}
+    stub.connections = 0
+
+    def one(sclass):
+        started = time.perf_counter()
+        assert lookup('114', '1', sclass)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(one, sclasses))
+    wall = time.perf_counter() - started
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return wall, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-call sessions with the pooled NukCourseClient')
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--lookups', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--connect-latency', type=float, default=0.05)
+    parser.add_argument('--upstream-latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    catalogue = make_catalogue(args.courses)
+    stub = StubNukServer(catalogue, latency=args.upstream_latency, connect_latency=args.connect_latency).start()
+    fetcher.FORM_URL, fetcher.LIST_URL = stub.form_url, stub.list_url
+    rng = random.Random(7)
+    sclasses = [rng.choice(catalogue['courses'])['department'] for _ in range(args.lookups)]
+
+    client = fetcher.NukCourseClient(pool_size=args.threads)
+    print(f"{args.lookups} lookups, {args.threads} threads, connect {args.connect_latency * 1000:.0f} ms, "
+          f"request {args.upstream_latency * 1000:.0f} ms")
+    print(f"{'client':28} {'wall s':>8} {'p50 ms':>8} {'p99 ms':>8} {'GETs':>6} {'POSTs':>6} {'conns':>6}")
+    for name, lookup in [('new session per call', legacy_lookup), ('NukCourseClient', client.query_sclass)]:
+        wall, p50, p99 = run(stub, lookup, sclasses, args.threads)
+        print(f"{name:28} {wall:8.2f} {p50:8.1f} {p99:8.1f} {stub.requests['GET']:6d} "
+              f"{stub.requests['POST']:6d} {stub.connections:6d}")
+    stub.stop()
+
+
+if __name__ == '__main__':
+    main()
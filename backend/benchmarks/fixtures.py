@@ -0,0 +1,145 @@
+# fixtures.py - 產生效能測試用的合成資料 (完全離線)
+import random
+
+from modules.credit_system.config import DEPARTMENT_PREFIX_MAPPING
+
+DEPARTMENTS = ['CS', 'EE', 'AM', 'AC', 'AP', 'CE', 'CM', 'LS', 'AE', 'FI', 'IM', 'AB', 'LA', 'GL',
+               'FL', 'WL', 'EL', 'KH', 'DA', 'CC', 'LI', 'SC', 'SO', 'GR', 'IN']
+NAME_PARTS = ['程式設計', '資料結構', '演算法', '微積分', '線性代數', '普通物理', '有機化學', '經濟學',
+              '會計學', '民法', '英文', '日文', '體育', '建築設計', '統計學', '作業系統', '計算機網路',
+              '機器學習', '財務管理', '行銷管理', '憲法', '刑法', '生物學', '材料科學', '電路學']
+SURNAMES = ['陳', '林', '黃', '張', '李', '王', '吳', '劉', '蔡', '楊', '許', '鄭', '謝', '郭']
+GIVEN = ['志明', '淑芬', '家豪', '怡君', '俊傑', '雅婷', '建宏', '美玲', '宗翰', '佩君']
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+PERIODS = ['A', '1', '2', '3', '4', 'B', '5', '6', '7', '8', 'C', '9', '10', '11', '12', 'D']
+TYPES = ['必修', '選修']
+
+
+def make_course(i, rng):
+    """Builds one course dict with the same shape acquire_all_courses produces."""
+    dept = rng.choice(DEPARTMENTS)
+    code = f"{dept}{1000 + i % 9000}{chr(65 + (i // 9000) % 26)}"
+    teacher = ', '.join(rng.choice(SURNAMES) + rng.choice(GIVEN) for _ in range(rng.choice([1, 1, 1, 2])))
+    time_slots = {day: [] for day in DAYS}
+    day = rng.choice(DAYS[:5])
+    start = rng.randrange(1, len(PERIODS) - 3)
+    time_slots[day] = PERIODS[start:start + rng.choice([2, 3])]
+    limit = rng.choice([30, 45, 60, 80, 120])
+    confirmed = rng.randrange(0, limit + 1)
+    online = rng.randrange(0, 20)
+    return {
+        "id": f"{code}-{teacher}", "department": dept, "code": code, "dept_code": dept.lower(),
+        "grade": str(rng.randrange(1, 5)), "class_type": rng.choice(['', '甲', '乙']),
+        "name": rng.choice(NAME_PARTS) + rng.choice(['', '(一)', '(二)', '實習', '專題']),
+        "credits": str(rng.choice([1, 2, 3, 3, 3])), "type": rng.choice(TYPES),
+        "limit": str(limit), "confirmed": str(confirmed), "online_count": str(online),
+        "remaining": str(max(0, limit - confirmed)), "teacher": teacher,
+        "classroom": f"{rng.choice(['工學院', '理學院', '法學院', '管理學院', '人文社會科學院'])}{rng.randrange(101, 520)}",
+        "time": time_slots, "prerequisites": rng.choice(['', '', '限本系', '需先修微積分']),
+        "note": rng.choice(['', '', '英語授課', '遠距教學', '彈性課程']),
+    }
+
+
+def make_catalogue(n_courses, seed=114):
+    """Returns a full courses_final.json style dict with n_courses synthetic courses."""
+    rng = random.Random(seed)
+    return {
+        "query_params": {"OpenYear": "114", "Helf": "1"},
+        "courses": [make_course(i, rng) for i in range(n_courses)],
+    }
+
+
+def _td(text):
+    return f'<td>{text}</td>'
+
+
+def render_course_row(course):
+    """Renders one course as a QueryResult.asp table row (25 columns)."""
+    teacher = '<br>'.join(course['teacher'].split(', '))
+    cols = [
+        _td(course['department'].lower()), _td(''), _td(course['code']), _td(''), _td(course['dept_code']),
+        _td(course['grade']), _td(course['class_type']), _td(f"<a href='#'>{course['name']}</a>"),
+        _td(course['credits']), _td(course['type']), _td(course['limit']), _td(course['confirmed']),
+        _td(course['online_count']), _td(course['remaining']), f'<td>{teacher}</td>', _td(course['classroom']),
+    ]
+    cols += [_td(','.join(course['time'][day])) for day in DAYS]
+    cols += [_td(course['prerequisites']), _td(course['note'])]
+    return '<tr>' + ''.join(cols) + '</tr>'
+
+
+def render_query_result(courses, page=1, max_page=1):
+    """Renders a QueryResult.asp style page (two header rows, page buttons) for the given courses."""
+    buttons = ''.join(f'<input type="button" value="{p}" onclick="goPage({p})">' for p in range(1, max_page + 1))
+    header = ('<tr><td colspan="25">114 學年度第 1 學期 開課資料</td></tr>'
+              '<tr>' + ''.join(_td(f'欄位{i}') for i in range(25)) + '</tr>')
+    rows = ''.join(render_course_row(course) for course in courses)
+    return (
+        '<html><head><meta charset="utf-8"></head><body>'
+        f'<form>{buttons}</form>'
+        f'<table border="1" style="font-size: 10pt">{header}{rows}</table>'
+        f'<p>目前在第 {page} 頁</p></body></html>'
+    )
+
+
+def render_query_form(token='abc123'):
+    """Renders the QueryCourse.asp form page with its hidden inputs."""
+    return (
+        '<html><body><form method="post" action="QueryResult.asp">'
+        '<input type="hidden" name="__VIEWSTATE" value="dDwtMTA4NzQ2NzQ1Ozs+">'
+        f'<input type="hidden" name="Token" value="{token}">'
+        '<select name="Sclass"></select></form></body></html>'
+    )
+
+
+SCORE_TYPES = ['必修', '選修', '通識']
+FINAL_SCORES = ['95', '88', '76', '60', '59', '42', '通過', '抵免', '']
+
+
+def make_score_semesters(n_semesters, courses_per_semester, course_prefixes, rng):
+    """Builds parse_grades_html style semesters ({semester_name, courses, summary}) of one synthetic student."""
+    semesters = []
+    for s in range(n_semesters):
+        courses = [{
+            "id": f"{rng.choice(course_prefixes)}{rng.randrange(100, 999)}{rng.choice(['', 'A', 'B'])}",
+            "name": rng.choice(NAME_PARTS) + rng.choice(['', '(一)', '(二)', '實習']),
+            "credits": rng.choice(['3', '3', '2', '1', '0']), "type": rng.choice(SCORE_TYPES),
+            "midterm_score": rng.choice(['', '80', '55']), "final_score": rng.choice(FINAL_SCORES),
+            "remark": rng.choice(['', '', '', '棄選', '停修']),
+        } for _ in range(courses_per_semester)]
+        earned = sum(int(c['credits']) for c in courses)
+        semesters.append({
+            "semester_name": f"{110 + s // 2}學年度第{s % 2 + 1}學期",
+            "courses": courses,
+            "summary": {"修習學分": str(earned), "實得學分": str(earned - 2), "學期平均": f"{rng.uniform(60, 95):.2f}"},
+        })
+    return semesters
+
+
+def render_score_page(semesters, charset='utf-8'):
+    """Renders semesters as a ScoreQuery.asp style page: a blue title, a course table and a summary per semester."""
+    parts = [f'<html><head><meta charset="{charset}"><title>歷年成績查詢</title></head><body>']
+    for semester in semesters:
+        parts.append(f'<p><font face="標楷體" color="#0000FF"><b>{semester["semester_name"]}</b></font></p>')
+        parts.append('<table border="1"><tr><td>課號</td><td>課名</td><td>學分</td><td>修別</td>'
+                     '<td>期中成績</td><td>學期成績</td><td>備註</td></tr>')
+        for course in semester['courses']:
+            parts.append('<tr>' + ''.join(_td(course[key]) for key in (
+                'id', 'name', 'credits', 'type', 'midterm_score', 'final_score', 'remark')) + '</tr>')
+        parts.append('</table><p><font size="2"><table><tr>')
+        parts.append(''.join(_td(f'{key}：{value}') for key, value in semester['summary'].items()))
+        parts.append('</tr></table></font></p>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def make_score_json(n_departments, rng):
+    """Builds a data/score.json style requirement list; the last entry is a malformed department."""
+    names = list(dict.fromkeys(DEPARTMENT_PREFIX_MAPPING.values()))
+    names += [f'合成學系{i}' for i in range(max(0, n_departments - len(names)))]
+    data = [{
+        '科系': name, '系必修': rng.randrange(40, 80), '領域選修': rng.randrange(10, 40),
+        '校定必修': rng.randrange(4, 12), '通識選修': rng.randrange(16, 30), '畢業學分': 128,
+        '備註': '合成資料' * 20,
+    } for name in names]
+    data.append({'科系': '格式錯誤學系', '系必修': '四十', '畢業學分': 128})
+    return data
@@ -0,0 +1,123 @@
+# stub_aca.py - 本機模擬 aca.nuk.edu.tw 的登入、選單與歷年成績頁面 (效能測試用)
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fixtures import render_score_page
+
+COOKIE_NAME = 'ASPSESSIONIDSTUB'
+
+
+class StubAcaServer:
+    """
+    Serves /Student2/login.asp, /Student2/Menu.asp and /Student2/SO/ScoreQuery.asp.
+    POSTing the login form sets a session cookie and redirects to Menu.asp; the menu and
+    score pages redirect back to the login page without that cookie. The score page is
+    rendered from `semesters` in Big5, like the real site. With `auto_login_ms` the login
+    page submits itself after that many milliseconds, standing in for the user typing.
+    """
+
+    def __init__(self, semesters, auto_login_ms=None, latency=0.0):
+        self.semesters = semesters
+        self.auto_login_ms = auto_login_ms
+        self.latency = latency
+        self.sessions = set()
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/Student2"
+
+    @property
+    def login_url(self):
+        return f"{self.base_url}/login.asp"
+
+    @property
+    def score_url(self):
+        return f"{self.base_url}/SO/ScoreQuery.asp"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def login(self):
+        """Creates a session the way a successful login would and returns its cookie value."""
+        token = secrets.token_hex(8)
+        with self._lock:
+            self.sessions.add(token)
+        return token
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _count(self):
+                path = self.path.split('?')[0].rsplit('/', 1)[-1]
+                with stub._lock:
+                    stub.requests[path] = stub.requests.get(path, 0) + 1
+
+            def _logged_in(self):
+                for part in self.headers.get('Cookie', '').split(';'):
+                    name, _, value = part.strip().partition('=')
+                    if name == COOKIE_NAME and value in stub.sessions:
+                        return True
+                return False
+
+            def _redirect(self, location, cookie=None):
+                self.send_response(302)
+                self.send_header('Location', location)
+                if cookie:
+                    self.send_header('Set-Cookie', f'{COOKIE_NAME}={cookie}; path=/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def _send(self, body, charset):
+                if stub.latency:
+                    threading.Event().wait(stub.latency)
+                data = body.encode(charset)
+                self.send_response(200)
+                self.send_header('Content-Type', f'text/html; charset={charset}')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._count()
+                path = self.path.split('?')[0]
+                if path.endswith('/login.asp'):
+                    script = ('' if stub.auto_login_ms is None else
+                              f'<script>setTimeout(function(){{document.forms[0].submit();}}, {stub.auto_login_ms});</script>')
+                    self._send('<html><body><form method="post" action="login.asp">'
+                               '<input name="Account"><input name="Password" type="password">'
+                               f'<input type="submit" value="登入"></form>{script}</body></html>', 'utf-8')
+                elif not self._logged_in():
+                    self._redirect('/Student2/login.asp')
+                elif path.endswith('/Menu.asp'):
+                    self._send('<html><body><a href="SO/ScoreQuery.asp">歷年成績</a></body></html>', 'utf-8')
+                elif path.endswith('/ScoreQuery.asp'):
+                    self._send(render_score_page(stub.semesters, 'big5'), 'big5')
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                self._count()
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._redirect('/Student2/Menu.asp', cookie=stub.login())
+
+        return Handler
@@ -0,0 +1,151 @@
+# stub_nuk.py - 本機模擬 course.nuk.edu.tw 的 QueryCourse / QueryResult 頁面 (效能測試用)
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from benchmarks.fixtures import render_query_form, render_query_result
+
+PAGE_SIZE = 100
+
+
+class StubNukServer:
+    """
+    Serves synthetic QueryCourse.asp (GET) and QueryResult.asp (POST) pages from a catalogue.
+    POST with Sclass returns every course of that department; without Sclass it pages the
+    whole catalogue PAGE_SIZE courses at a time. `latency` adds a fixed delay per request and
+    `empty_page_rate` is the share of result pages returned as the deceptive empty table.
+    `connect_latency` is paid once per new TCP connection, standing in for the TLS handshake.
+    `latency` may also be a callable returning the delay, e.g. to model a slow tail, and
+    `error_rate` is the share of requests answered with HTTP 503.
+    With `sessions=True` every form GET starts a session (cookie plus a matching hidden
+    Token); a POST whose cookie and Token do not name a live session gets the empty table,
+    like the real site after its session expired (see expire_sessions).
+    """
+
+    def __init__(self, catalogue, latency=0.0, empty_page_rate=0.0, connect_latency=0.0, error_rate=0.0,
+                 sessions=False):
+        self.courses = catalogue['courses']
+        self.latency = latency
+        self.empty_page_rate = empty_page_rate
+        self.connect_latency = connect_latency
+        self.error_rate = error_rate
+        self.sessions = sessions
+        self.live_sessions = set()
+        self._session_count = 0
+        self.requests = {'GET': 0, 'POST': 0}
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._by_sclass = {}
+        for course in self.courses:
+            self._by_sclass.setdefault(course['department'].upper(), []).append(course)
+        self.max_page = max(1, -(-len(self.courses) // PAGE_SIZE))
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/QueryCourse"
+
+    @property
+    def form_url(self):
+        return f"{self.base_url}/QueryCourse.asp"
+
+    @property
+    def list_url(self):
+        return f"{self.base_url}/QueryResult.asp"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def result_page(self, sclass=None, page=1):
+        if self.empty_page_rate and random.random() < self.empty_page_rate:
+            return render_query_result([], page=page, max_page=self.max_page)
+        if sclass:
+            return render_query_result(self._by_sclass.get(sclass.upper(), []))
+        start = (page - 1) * PAGE_SIZE
+        return render_query_result(self.courses[start:start + PAGE_SIZE], page=page, max_page=self.max_page)
+
+    def new_session(self):
+        with self._lock:
+            self._session_count += 1
+            token = f"s{self._session_count}"
+            self.live_sessions.add(token)
+        return token
+
+    def expire_sessions(self):
+        with self._lock:
+            self.live_sessions.clear()
+
+    def _count(self, method):
+        with self._lock:
+            self.requests[method] += 1
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+                if stub.connect_latency:
+                    time.sleep(stub.connect_latency)
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, charset, cookie=None):
+                delay = stub.latency() if callable(stub.latency) else stub.latency
+                if delay:
+                    time.sleep(delay)
+                status = 503 if stub.error_rate and random.random() < stub.error_rate else 200
+                data = body.encode(charset) if status == 200 else b'Service Unavailable'
+                self.send_response(status)
+                self.send_header('Content-Type', f'text/html; charset={charset}')
+                self.send_header('Content-Length', str(len(data)))
+                if cookie:
+                    self.send_header('Set-Cookie', f'ASPSESSIONID={cookie}; path=/')
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客戶端已放棄 (deadline 到期或 hedge 的另一個請求先回來)
+                    self.close_connection = True
+
+            def do_GET(self):
+                stub._count('GET')
+                if stub.sessions:
+                    token = stub.new_session()
+                    self._send(render_query_form(token), 'big5', cookie=token)
+                else:
+                    self._send(render_query_form(), 'big5')
+
+            def do_POST(self):
+                stub._count('POST')
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                sclass = form.get('Sclass', [''])[0]
+                page = int(form.get('Page', ['1'])[0])
+                if stub.sessions:
+                    token = form.get('Token', [''])[0]
+                    cookie = self.headers.get('Cookie', '')
+                    with stub._lock:
+                        valid = token in stub.live_sessions and f'ASPSESSIONID={token}' in cookie
+                    if not valid:
+                        self._send(render_query_result([], page=page, max_page=stub.max_page), 'utf-8')
+                        return
+                self._send(stub.result_page(sclass, page), 'utf-8')
+
+        return Handler
@@ -0,0 +1,282 @@
+# suite.py - 離線效能測試套件：以合成資料量測各熱點階段，與儲存的基準比較並標出退步
+#
+# 每個階段在 small / medium / large 三種規模的合成資料上計時 (自動決定每個樣本的迴圈次數，
+# 取多個樣本的中位數)。結果可存成基準 (JSON)，之後的執行會與基準比較，
+# 中位數比基準慢超過門檻 (預設 25%) 的項目標為 REGRESSION，並以結束碼 1 結束。
+# 執行期間禁止連線到本機以外的位址，確保完全離線。
+#
+# 階段：
+#   credit.parse_grades_html  歷年成績頁面解析 (8 / 14 / 20 學期)
+#   credit.categorize         categorize_and_calculate_credits (8 / 14 / 20 學期)
+#   credit.deficit            calculate_credit_deficit，score.json 含 20 / 60 / 200 個科系
+#   credit.analyze_grades     頁面解析 + 推測科系 + 學分缺額 (8 / 14 / 20 學期)
+#   course.parse_courses      QueryResult.asp 開課資料列解析 (acquire_data.py；50 / 200 / 800 列)
+#   course.parse_seat_updates QueryResult.asp 餘額解析 (fetcher.py；50 / 200 / 800 列)
+#   api.courses               GET /api/courses (500 / 3000 / 10000 門課，未壓縮與 gzip)
+#
+# 用法 (在 backend 目錄下執行):
+#   python benchmarks/suite.py                      # 全部階段，與 benchmarks/baseline.json 比較
+#   python benchmarks/suite.py --save               # 把這次的結果存為基準
+#   python benchmarks/suite.py -k credit --sizes small,medium --threshold 0.15
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import (make_catalogue, make_score_json, make_score_semesters, render_query_result,
+                                 render_score_page)
+from modules.credit_system import credit_deficit_calculator
+from modules.credit_system.calculator import (analyze_grades, categorize_and_calculate_credits,
+                                              extract_current_credits_from_categorized_data)
+from modules.credit_system.config import CC_SUBCATEGORY_MAPPING, COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from modules.credit_system.parser import parse_grades_html
+from modules.course_system.course_table import parse_courses, parse_seat_updates
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SIZES = ('small', 'medium', 'large')
+PREFIXES = list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING) + ['CC' + code for code in CC_SUBCATEGORY_MAPPING]
+
+STAGES = []
+
+
+def stage(name, scale):
+    """Registers a stage. setup(n, rng, workdir) builds the fixture for size n and returns the callable to time."""
+    def register(setup):
+        STAGES.append((name, dict(zip(SIZES, scale)), setup))
+        return setup
+    return register
+
+
+@stage('credit.parse_grades_html', (8, 14, 20))
+def setup_parse_grades(n_semesters, rng, workdir):
+    html = render_score_page(make_score_semesters(n_semesters, 10, PREFIXES, rng))
+    return lambda: parse_grades_html(html)
+
+
+@stage('credit.categorize', (8, 14, 20))
+def setup_categorize(n_semesters, rng, workdir):
+    semesters = make_score_semesters(n_semesters, 10, PREFIXES, rng)
+    return lambda: categorize_and_calculate_credits(semesters, COURSE_CODE_MAPPING)
+
+
+def use_score_json(n_departments, rng, workdir):
+    path = os.path.join(workdir, f'score_{n_departments}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(make_score_json(n_departments, rng)[:-1], f, ensure_ascii=False)
+    credit_deficit_calculator.use_requirements_file(path)
+
+
+@stage('credit.deficit', (20, 60, 200))
+def setup_deficit(n_departments, rng, workdir):
+    use_score_json(n_departments, rng, workdir)
+    semesters = make_score_semesters(8, 10, PREFIXES, rng)
+    current = extract_current_credits_from_categorized_data(
+        categorize_and_calculate_credits(semesters, COURSE_CODE_MAPPING))
+    # 一次以科系全名、一次以代碼前綴查詢
+    departments = (DEPARTMENT_PREFIX_MAPPING['cs'], 'cs')
+    return lambda: [credit_deficit_calculator.calculate_credit_deficit(d, current) for d in departments]
+
+
+@stage('credit.analyze_grades', (8, 14, 20))
+def setup_analyze(n_semesters, rng, workdir):
+    use_score_json(60, rng, workdir)
+    html = render_score_page(make_score_semesters(n_semesters, 10, PREFIXES, rng))
+    return lambda: analyze_grades(parse_grades_html(html))
+
+
+@stage('course.parse_courses', (50, 200, 800))
+def setup_parse_courses(n_rows, rng, workdir):
+    html = render_query_result(make_catalogue(n_rows, seed=rng.randrange(1 << 30))['courses'], 1, 5)
+    return lambda: parse_courses(html)
+
+
+@stage('course.parse_seat_updates', (50, 200, 800))
+def setup_parse_seat_updates(n_rows, rng, workdir):
+    html = render_query_result(make_catalogue(n_rows, seed=rng.randrange(1 << 30))['courses'], 1, 5)
+    return lambda: parse_seat_updates(html)
+
+
+def api_client(n_courses, rng, workdir):
+    import app as app_module
+    data_file = os.path.join(workdir, f'courses_{n_courses}.json')
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(make_catalogue(n_courses, seed=rng.randrange(1 << 30)), f, ensure_ascii=False, indent=2)
+    app_module.DATA_FILE = data_file
+    app_module.limiter.enabled = False
+    # 立刻載入新的檔案，不等快照的 mtime 檢查間隔
+    snapshot = app_module.course_snapshot
+    snapshot.path, interval, snapshot.check_interval = data_file, snapshot.check_interval, 0
+    snapshot.current()
+    snapshot.check_interval = interval
+    return app_module.app.test_client()
+
+
+def get_ok(client, url, headers=None):
+    resp = client.get(url, headers=headers or {})
+    resp.get_data()
+    assert resp.status_code == 200, resp.status_code
+
+
+@stage('api.courses', (500, 3000, 10000))
+def setup_api_courses(n_courses, rng, workdir):
+    client = api_client(n_courses, rng, workdir)
+    return lambda: get_ok(client, '/api/courses')
+
+
+@stage('api.courses.gzip', (500, 3000, 10000))
+def setup_api_courses_gzip(n_courses, rng, workdir):
+    client = api_client(n_courses, rng, workdir)
+    return lambda: get_ok(client, '/api/courses', {'Accept-Encoding': 'gzip'})
+
+
+def measure(fn, samples, sample_time):
+    """Seconds per call: the median and minimum over `samples` samples of about `sample_time` seconds each."""
+    fn()  # 預熱 (快取、延遲建立的索引)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= sample_time / 4:
+            break
+        loops *= 2
+    loops = max(1, int(loops * sample_time / max(elapsed, 1e-9)))
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - started) / loops)
+    return {'median': statistics.median(timings), 'min': min(timings), 'loops': loops}
+
+
+@contextlib.contextmanager
+def offline():
+    """Refuses connections to anything but the loopback interface while the suite runs."""
+    real_connect = socket.socket.connect
+
+    def connect(sock, address):
+        host = address[0] if isinstance(address, tuple) else address
+        if sock.family in (socket.AF_INET, socket.AF_INET6) and host not in ('127.0.0.1', '::1', 'localhost'):
+            raise OSError(f"benchmark suite is offline: refused connection to {address}")
+        return real_connect(sock, address)
+
+    socket.socket.connect = connect
+    try:
+        yield
+    finally:
+        socket.socket.connect = real_connect
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def environment():
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'platform': platform.platform(terse=True), 'cpus': os.cpu_count()}
+
+
+def format_seconds(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline micro-benchmark suite with stored baselines')
+    parser.add_argument('-k', '--filter', default='', help='Only run stages whose name contains this text')
+    parser.add_argument('--sizes', default=','.join(SIZES), help='Comma-separated sizes (small,medium,large)')
+    parser.add_argument('--samples', type=int, default=5, help='Timed samples per benchmark')
+    parser.add_argument('--sample-time', type=float, default=0.2, help='Approximate seconds per sample')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Store this run as the baseline (merged into the file)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Flag a regression when the median is this fraction slower than the baseline')
+    parser.add_argument('--json', help='Also write this run\'s results to a JSON file')
+    parser.add_argument('--list', action='store_true', help='List the stages and sizes, then exit')
+    args = parser.parse_args()
+
+    sizes = [size for size in args.sizes.split(',') if size]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+    selected = [(name, scale, setup) for name, scale, setup in STAGES if args.filter in name]
+    if args.list:
+        for name, scale, _ in selected:
+            print(f"{name:28} " + '  '.join(f"{size}={scale[size]}" for size in SIZES))
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get('environment') != environment():
+        print(f"note: baseline was recorded on {baseline.get('environment')}, "
+              f"this is {environment()}; compare with care")
+    baseline_results = (baseline or {}).get('results', {})
+
+    results, regressions = {}, []
+    print(f"{'benchmark':36} {'n':>6} {'median':>11} {'min':>11} {'baseline':>11} {'change':>8}")
+    with offline(), tempfile.TemporaryDirectory() as workdir, open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stderr(devnull):
+        for name, scale, setup in selected:
+            for size in sizes:
+                key = f"{name}[{size}]"
+                rng = random.Random(f"{name}/{size}")
+                with contextlib.redirect_stdout(devnull):
+                    timing = measure(setup(scale[size], rng, workdir), args.samples, args.sample_time)
+                timing['n'] = scale[size]
+                results[key] = timing
+                previous = baseline_results.get(key)
+                change, flag = '', ''
+                if previous:
+                    ratio = timing['median'] / previous['median'] - 1
+                    change = f"{ratio:+.0%}"
+                    if ratio > args.threshold:
+                        flag = '  REGRESSION'
+                        regressions.append((key, ratio))
+                    elif ratio < -args.threshold:
+                        flag = '  faster'
+                print(f"{key:36} {scale[size]:6} {format_seconds(timing['median']):>11} "
+                      f"{format_seconds(timing['min']):>11} "
+                      f"{format_seconds(previous['median']) if previous else '-':>11} {change:>8}{flag}",
+                      flush=True)
+
+    run = {'environment': environment(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+    if args.save:
+        merged = dict(baseline_results if baseline and baseline.get('environment') == run['environment'] else {})
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(dict(run, results=merged), f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline} ({len(merged)} benchmarks)")
+        return
+
+    if not baseline_results:
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: "
+              + ', '.join(f"{key} {ratio:+.0%}" for key, ratio in regressions))
+        print("FAIL")
+        sys.exit(1)
+    print(f"no regressions beyond {args.threshold:.0%}")
+    print("PASS")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,97 +1,132 @@
-# acquire_data.py 
+# acquire_data.py
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import os
 import json
 import time
+import hashlib
 import random
+import queue
+import argparse
+import threading
 import warnings
 from urllib3.exceptions import InsecureRequestWarning
 
-def acquire_all_courses():
+try:
+    from modules.course_system.course_table import parse_courses, parse_page_numbers
+except ImportError:  # 直接在此目錄以腳本執行時
+    from course_table import parse_courses, parse_page_numbers
+
+BASE_URL = "https://course.nuk.edu.tw/QueryCourse/QueryResult.asp"
+OUTPUT_FILENAME = "courses_final.json"
+STATE_FILENAME = "courses_state.json"      # 增量模式：上次各頁與各課程的內容雜湊
+CHANGELOG_FILENAME = "courses_changes.jsonl"  # 增量模式：每次執行一行的異動紀錄
+STREAM_FILENAME = "courses_final.ndjson"        # 串流模式：每頁解析完立即附加一行
+CHECKPOINT_FILENAME = "courses_checkpoint.json"  # 串流模式：已完成的頁數
+
+# --- Define Query Parameters Here ---
+YEAR = '114'
+SEMESTER = '1'
+PCLASS = 'A'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Content-Type': 'application/x-www-form-urlencoded', 'Origin': 'https://course.nuk.edu.tw',
+    'Referer': 'https://course.nuk.edu.tw/QueryCourse/QueryCourse.asp'
+}
+
+
+def _new_session():
+    session = requests.Session()
+    session.verify = False
+    return session
+
+
+def _parse_page(page, html):
+    page_courses = parse_courses(html)
+    if len(page_courses) == 0:
+        raise ValueError("Server returned a deceptive empty page.")
+    return page_courses
+
+
+def fetch_page(session, page, process=_parse_page):
     """
-    This definitive script uses a post-parsing check to reliably handle 
-    the server's deceptive empty pages and will not stop until it gets all data.
+    Fetches one result page and returns process(page, html).
+    The default processor parses the courses and raises on the deceptive empty page.
     """
-    print("--- Launching the Definitive Data Acquisition Script ---")
-    print("This script will run slowly and patiently to ensure all data is captured.")
+    payload = {'OpenYear': YEAR, 'Helf': SEMESTER, 'Pclass': PCLASS, 'Page': str(page)}
+    resp = session.post(BASE_URL, data=payload, headers=HEADERS, timeout=45)
+    resp.encoding = 'utf-8'
+    return process(page, resp.text)
 
-    warnings.filterwarnings("ignore", category=InsecureRequestWarning)
-    BASE_URL = "https://course.nuk.edu.tw/QueryCourse/QueryResult.asp"
-    OUTPUT_FILENAME = "courses_final.json"
-    
-    # --- Define Query Parameters Here ---
-    YEAR = '114'
-    SEMESTER = '1'
-    PCLASS = 'A'
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Content-Type': 'application/x-www-form-urlencoded', 'Origin': 'https://course.nuk.edu.tw',
-        'Referer': 'https://course.nuk.edu.tw/QueryCourse/QueryCourse.asp'
-    }
 
-    # -- Step 1: Reliably determine the total number of pages --
+def _describe(result):
+    """result is a page's course list, None for an unchanged page, or a course count (stream mode)."""
+    if result is None:
+        return "unchanged"
+    return f"fetched with {result if isinstance(result, int) else len(result)} courses"
+
+
+def fetch_max_page():
+    """Reliably determines the total number of pages, retrying until it succeeds."""
     max_page = 0
     while max_page == 0:
         try:
             print("\nInvestigating total number of pages...")
-            session = requests.Session()
-            session.verify = False
+            session = _new_session()
             payload_page1 = {'OpenYear': YEAR, 'Helf': SEMESTER, 'Pclass': PCLASS, 'Page': '1'}
-            resp_page1 = session.post(BASE_URL, data=payload_page1, headers=headers, timeout=45)
+            resp_page1 = session.post(BASE_URL, data=payload_page1, headers=HEADERS, timeout=45)
             resp_page1.encoding = 'utf-8'
-            soup_page1 = BeautifulSoup(resp_page1.text, 'html.parser')
-            page_buttons = soup_page1.find_all('input', {'type': 'button', 'onclick': True})
-            page_numbers = [int(btn['value']) for btn in page_buttons if btn.get('value') and btn.get('value').isdigit()]
+            page_numbers = parse_page_numbers(resp_page1.text)
             if not page_numbers: raise ValueError("Could not find page number buttons on page 1. Retrying.")
             max_page = max(page_numbers)
             print(f"Investigation complete. Total pages found: {max_page}")
         except Exception as e:
             print(f" > Failed to determine total pages: {e}. Retrying in 15 seconds...")
             time.sleep(2)
+    return max_page
 
-    # -- Step 2: Loop through all pages with the definitive retry logic --
-    all_courses = []
-    for page in range(1, max_page + 1):
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: each success raises the limit by about one slot per
+    window of successful pages, each failure halves it.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=16):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.active = 0
+        self.peak = int(self.limit)
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+
+    def release(self, success):
+        with self._cond:
+            self.active -= 1
+            if success:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit / 2)
+            self.peak = max(self.peak, int(self.limit))
+            self._cond.notify_all()
+
+
+def _crawl_sequential(max_page, process=_parse_page, pages=None):
+    results = {}
+    for page in (pages if pages is not None else range(1, max_page + 1)):
         page_completed = False
         while not page_completed:
             try:
                 print(f"\nAttempting to fetch page {page}/{max_page}...")
-                session = requests.Session()
-                session.verify = False
-                payload = {'OpenYear': YEAR, 'Helf': SEMESTER, 'Pclass': PCLASS, 'Page': str(page)}
-                resp = session.post(BASE_URL, data=payload, headers=headers, timeout=45)
-                resp.encoding = 'utf-8'
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                
-                # --- THIS IS THE CORRECTED LINE ---
-                table = soup.find('table', attrs={'border': '1', 'style': 'font-size: 10pt'})
-
-                if not table: raise ValueError("Server response did not contain the course table.")
-
-                rows = table.find_all('tr')[2:]
-                page_courses = []
-                for row in rows:
-                    cols_tags = row.find_all('td')
-                    if len(cols_tags) < 25: continue
-                    cols = [c.get_text(strip=True) for c in cols_tags]
-                    teacher_names = cols_tags[14].get_text(separator=', ', strip=True)
-                    
-                    course = {
-                        "id": f"{cols[2]}-{teacher_names}", "department": cols[0].upper(), "code": cols[2], "dept_code": cols[4], 
-                        "grade": cols[5], "class_type": cols[6], "name": cols[7], "credits": cols[8], "type": cols[9], 
-                        "limit": cols[10], "confirmed": cols[11], "online_count": cols[12], "remaining": cols[13], 
-                        "teacher": teacher_names, "classroom": cols[15],
-                        "time": {"Mon": [t.strip() for t in cols[16].split(',') if t.strip()],"Tue": [t.strip() for t in cols[17].split(',') if t.strip()],"Wed": [t.strip() for t in cols[18].split(',') if t.strip()],"Thu": [t.strip() for t in cols[19].split(',') if t.strip()],"Fri": [t.strip() for t in cols[20].split(',') if t.strip()],"Sat": [t.strip() for t in cols[21].split(',') if t.strip()],"Sun": [t.strip() for t in cols[22].split(',') if t.strip()],},
-                        "prerequisites": cols[23], "note": cols[24],
-                    }
-                    page_courses.append(course)
-                
-                if len(page_courses) == 0 and page <= max_page:
-                    raise ValueError("Server returned a deceptive empty page.")
-
-                print(f"  > Success! Page {page} fetched with {len(page_courses)} courses.")
-                all_courses.extend(page_courses)
+                results[page] = fetch_page(_new_session(), page, process)
+                print(f"  > Success! Page {page} {_describe(results[page])}.")
                 page_completed = True
 
             except Exception as e:
@@ -99,12 +134,344 @@ def acquire_all_courses():
                 print(f"  > Failed to process page {page}: {e}")
                 print(f"  > Waiting {wait_time:.0f} seconds before retrying...")
                 time.sleep(wait_time)
-        
+
         if page <= max_page:
             human_delay = 0.1
             print(f"  > Page complete. Pausing for {human_delay:.1f} seconds...")
             time.sleep(human_delay)
-    
+    return results
+
+
+def _crawl_parallel(max_page, workers, max_workers, process=_parse_page, pages=None):
+    """
+    Fetches pages with a bounded worker pool. Each worker keeps one keep-alive session;
+    the number of pages in flight adapts to errors and deceptive empty pages.
+    """
+    concurrency = AdaptiveConcurrency(initial=workers, minimum=1, maximum=max_workers)
+    pages = list(pages if pages is not None else range(1, max_page + 1))
+    pending = queue.Queue()
+    for page in pages:
+        pending.put(page)
+    results = {}
+    results_lock = threading.Lock()
+    failures = [0]
+
+    def worker():
+        session = _new_session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        while True:
+            with results_lock:
+                if len(results) == len(pages):
+                    return
+            try:
+                page = pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            concurrency.acquire()
+            try:
+                result = fetch_page(session, page, process)
+            except Exception as e:
+                concurrency.release(success=False)
+                with results_lock:
+                    failures[0] += 1
+                print(f"  > Failed to process page {page}: {e} (concurrency now {int(concurrency.limit)})")
+                pending.put(page)
+                # 失敗後稍微退避，並加一點抖動避免同時重試
+                time.sleep(0.5 + random.random())
+                continue
+            concurrency.release(success=True)
+            with results_lock:
+                results[page] = result
+                done = len(results)
+            print(f"  > Page {page} {_describe(result)}. ({done}/{len(pages)})")
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"  > Retries: {failures[0]}, peak concurrency: {concurrency.peak}")
+    return results
+
+
+def _hash_text(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _hash_course(course):
+    return _hash_text(json.dumps(course, ensure_ascii=False, sort_keys=True))
+
+
+def _load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json_atomic(path, data, indent=2):
+    # 先寫暫存檔再替換，避免 app 讀到寫到一半的檔案
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def _diff_courses(old_courses, new_courses, old_hashes=None, new_hashes=None):
+    """
+    Returns (added_ids, removed_ids, {id: {field: [old, new]}}) between two course lists.
+    old_hashes / new_hashes ({id: _hash_course(course)}, e.g. the stored state) decide which
+    ids exist and which changed; missing ones are computed from the course lists.
+    """
+    old_by_id = {c['id']: c for c in old_courses}
+    if old_hashes is None:
+        old_hashes = {cid: _hash_course(c) for cid, c in old_by_id.items()}
+    if new_hashes is None:
+        new_hashes = {c['id']: _hash_course(c) for c in new_courses}
+    added = [cid for cid in new_hashes if cid not in old_hashes]
+    removed = [cid for cid in old_hashes if cid not in new_hashes]
+    changed = {}
+    for course in new_courses:
+        cid = course['id']
+        if cid not in old_hashes or old_hashes[cid] == new_hashes[cid]:
+            continue
+        old = old_by_id.get(cid, {})
+        changed[cid] = {field: [old.get(field), value] for field, value in course.items() if old.get(field) != value}
+    return added, removed, changed
+
+
+def _incremental_processor(previous_page_hashes):
+    """Skips parsing of pages whose content hash matches the previous run."""
+    page_hashes = {}
+
+    def process(page, html):
+        digest = _hash_text(html)
+        if previous_page_hashes.get(str(page)) == digest:
+            page_hashes[page] = digest
+            return None
+        page_courses = _parse_page(page, html)
+        page_hashes[page] = digest
+        return page_courses
+
+    return process, page_hashes
+
+
+def _apply_incremental(max_page, results, page_hashes, previous_data, previous_state):
+    """
+    Patches the previous dataset with the re-parsed pages, writes the change log and the
+    new state. Returns the final data and whether anything changed.
+    """
+    previous_courses = {c['id']: c for c in previous_data['courses']}
+    previous_pages = previous_state.get('page_courses', {})
+
+    all_courses, page_courses, changed_pages = [], {}, []
+    for page in range(1, max_page + 1):
+        result = results[page]
+        if result is None:
+            result = [previous_courses[cid] for cid in previous_pages.get(str(page), []) if cid in previous_courses]
+        else:
+            changed_pages.append(page)
+        page_courses[str(page)] = [c['id'] for c in result]
+        all_courses.extend(result)
+
+    course_hashes = {c['id']: _hash_course(c) for c in all_courses}
+    added, removed, changed = _diff_courses(previous_data['courses'], all_courses,
+                                            previous_state.get('course_hashes'), course_hashes)
+    dirty = bool(added or removed or changed or max_page != previous_state.get('max_page'))
+    if dirty:
+        entry = {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "pages": changed_pages,
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+        }
+        with open(CHANGELOG_FILENAME, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"  > Changes: {len(changed_pages)} pages re-parsed, {len(added)} added, "
+              f"{len(removed)} removed, {len(changed)} changed.")
+        if removed:
+            print(f"  > Removed: {', '.join(removed[:20])}{' ...' if len(removed) > 20 else ''}")
+    else:
+        print(f"  > No course changes ({len(changed_pages)} pages re-parsed).")
+
+    state = {
+        "max_page": max_page,
+        "page_hashes": {str(page): digest for page, digest in page_hashes.items()},
+        "page_courses": page_courses,
+        "course_hashes": course_hashes,
+    }
+    _write_json_atomic(STATE_FILENAME, state, indent=None)
+    return all_courses, dirty
+
+
+class _PageStream:
+    """
+    Appends each finished page to an NDJSON file ({"page": n, "courses": [...]} per line)
+    and records it in a checkpoint file, so a restarted crawl can skip finished pages.
+    """
+
+    def __init__(self, max_page):
+        self.max_page = max_page
+        self._lock = threading.Lock()
+        checkpoint = _load_json(CHECKPOINT_FILENAME)
+        resumable = (checkpoint and os.path.exists(STREAM_FILENAME)
+                     and checkpoint.get('OpenYear') == YEAR and checkpoint.get('Helf') == SEMESTER
+                     and checkpoint.get('max_page') == max_page)
+        self.completed = set(checkpoint['completed']) if resumable else set()
+        if resumable:
+            self._truncate_partial_line()
+        else:
+            open(STREAM_FILENAME, 'w', encoding='utf-8').close()
+            self._write_checkpoint()
+
+    @staticmethod
+    def _truncate_partial_line():
+        # 中斷時最後一行可能沒寫完，截到最後一個換行
+        with open(STREAM_FILENAME, 'rb+') as f:
+            data_end = f.seek(0, os.SEEK_END)
+            if data_end == 0:
+                return
+            f.seek(max(0, data_end - 65536))
+            tail = f.read()
+            if tail.endswith(b"\n"):
+                return
+            cut = tail.rfind(b"\n")
+            f.truncate(data_end - len(tail) + cut + 1 if cut >= 0 else 0)
+
+    def _write_checkpoint(self):
+        _write_json_atomic(CHECKPOINT_FILENAME, {
+            "OpenYear": YEAR, "Helf": SEMESTER, "max_page": self.max_page,
+            "completed": sorted(self.completed),
+        }, indent=None)
+
+    def remaining_pages(self):
+        return [page for page in range(1, self.max_page + 1) if page not in self.completed]
+
+    def process(self, page, html):
+        page_courses = _parse_page(page, html)
+        line = json.dumps({"page": page, "courses": page_courses}, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(STREAM_FILENAME, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.completed.add(page)
+            self._write_checkpoint()
+        return len(page_courses)
+
+
+def compact_stream(max_page):
+    """
+    Builds courses_final.json from the NDJSON stream in page order, holding one page in
+    memory at a time. Returns the number of courses written.
+    """
+    offsets = {}
+    with open(STREAM_FILENAME, 'rb') as f:
+        offset = 0
+        for line in f:
+            if line.endswith(b"\n"):
+                # 同一頁重複寫入時以最後一次為準
+                offsets[json.loads(line)['page']] = offset
+            offset += len(line)
+    missing = [page for page in range(1, max_page + 1) if page not in offsets]
+    if missing:
+        raise ValueError(f"Stream is missing pages {missing}; rerun to resume the crawl.")
+
+    total = 0
+    tmp_path = f"{OUTPUT_FILENAME}.tmp"
+    with open(STREAM_FILENAME, 'rb') as src, open(tmp_path, 'w', encoding='utf-8') as out:
+        query_params = json.dumps({"OpenYear": YEAR, "Helf": SEMESTER}, ensure_ascii=False)
+        out.write(f'{{"query_params": {query_params}, "courses": [')
+        for page in range(1, max_page + 1):
+            src.seek(offsets[page])
+            for course in json.loads(src.readline())['courses']:
+                out.write((",\n" if total else "\n") + json.dumps(course, ensure_ascii=False))
+                total += 1
+        out.write("\n]}\n")
+    os.replace(tmp_path, OUTPUT_FILENAME)
+    return total
+
+
+def _acquire_streaming(parallel, workers, max_workers, started):
+    max_page = fetch_max_page()
+    stream = _PageStream(max_page)
+    pages = stream.remaining_pages()
+    if stream.completed:
+        print(f"Resuming from checkpoint: {len(stream.completed)}/{max_page} pages already done.")
+
+    if pages:
+        if parallel:
+            _crawl_parallel(max_page, workers, max_workers, stream.process, pages)
+        else:
+            _crawl_sequential(max_page, stream.process, pages)
+    elapsed = time.perf_counter() - started
+
+    print("\nCompacting the page stream into the final JSON file...")
+    total = compact_stream(max_page)
+    os.remove(CHECKPOINT_FILENAME)
+    os.remove(STREAM_FILENAME)
+    print(f"\nTask Complete! Total courses fetched: {total} ")
+    print(f"Crawled {len(pages)} pages in {elapsed:.1f} s ({len(pages) / elapsed:.2f} pages/sec).")
+    print(f"Success! The definitive course data has been saved to '{OUTPUT_FILENAME}'.")
+
+
+def acquire_all_courses(parallel=False, workers=4, max_workers=8, incremental=False, stream=False):
+    """
+    This definitive script uses a post-parsing check to reliably handle
+    the server's deceptive empty pages and will not stop until it gets all data.
+    With parallel=True pages are fetched concurrently (see _crawl_parallel).
+    With incremental=True only pages whose content hash changed since the last run
+    are re-parsed, the previous dataset is patched and a change log line is appended.
+    With stream=True each page is appended to an NDJSON file as soon as it is parsed,
+    an interrupted crawl resumes from its checkpoint, and the final JSON is compacted
+    from the stream at the end.
+    """
+    if incremental and stream:
+        raise ValueError("incremental and stream modes cannot be combined.")
+    print("--- Launching the Definitive Data Acquisition Script ---")
+    if parallel:
+        print(f"Parallel mode: starting with {workers} workers, up to {max_workers}.")
+    else:
+        print("This script will run slowly and patiently to ensure all data is captured.")
+
+    warnings.filterwarnings("ignore", category=InsecureRequestWarning)
+    started = time.perf_counter()
+
+    if stream:
+        _acquire_streaming(parallel, workers, max_workers, started)
+        return
+
+    process = _parse_page
+    if incremental:
+        previous_data = _load_json(OUTPUT_FILENAME)
+        previous_state = _load_json(STATE_FILENAME)
+        if not previous_data or not previous_state:
+            print("Incremental mode: no previous data/state found, running a full crawl.")
+            previous_data = {"courses": []}
+            previous_state = {}
+        process, page_hashes = _incremental_processor(previous_state.get('page_hashes', {}))
+
+    # -- Step 1: Reliably determine the total number of pages --
+    max_page = fetch_max_page()
+
+    # -- Step 2: Loop through all pages with the definitive retry logic --
+    if parallel:
+        results = _crawl_parallel(max_page, workers, max_workers, process)
+    else:
+        results = _crawl_sequential(max_page, process)
+
+    if incremental:
+        all_courses, dirty = _apply_incremental(max_page, results, page_hashes, previous_data, previous_state)
+    else:
+        all_courses = [course for page in range(1, max_page + 1) for course in results[page]]
+        dirty = True
+    elapsed = time.perf_counter() - started
+
     # --- Create the final structured data object ---
     final_data = {
         "query_params": {
@@ -115,9 +482,25 @@ def acquire_all_courses():
     }
 
     print(f"\nTask Complete! Total courses fetched: {len(all_courses)} ")
-    with open(OUTPUT_FILENAME, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, ensure_ascii=False, indent=2)
+    print(f"Crawled {max_page} pages in {elapsed:.1f} s ({max_page / elapsed:.2f} pages/sec).")
+    if not dirty:
+        print(f"Nothing changed; '{OUTPUT_FILENAME}' left untouched.")
+        return
+    _write_json_atomic(OUTPUT_FILENAME, final_data)
     print(f"Success! The definitive course data has been saved to '{OUTPUT_FILENAME}'.")
 
+
 if __name__ == "__main__":
-    acquire_all_courses()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Download the full course catalogue into courses_final.json")
+    parser.add_argument('--parallel', action='store_true', help="fetch pages concurrently with adaptive concurrency")
+    parser.add_argument('--workers', type=int, default=4, help="initial number of pages in flight (parallel mode)")
+    parser.add_argument('--max-workers', type=int, default=8, help="upper bound on pages in flight (parallel mode)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="re-parse only pages that changed since the last run and write a change log")
+    parser.add_argument('--stream', action='store_true',
+                        help="append each page to an NDJSON file with checkpoints so an interrupted crawl can resume")
+    args = parser.parse_args()
+    if args.incremental and args.stream:
+        parser.error("--incremental and --stream cannot be combined")
+    acquire_all_courses(parallel=args.parallel, workers=args.workers, max_workers=args.max_workers,
+                        incremental=args.incremental, stream=args.stream)
@@ -0,0 +1,104 @@
+# cache.py - 有上限的 LRU + TTL 記憶體快取，支援 stale-while-revalidate
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LRUTTLCache:
+    """
+    Thread-safe in-memory cache bounded by entry count.
+
+    Each entry has its own TTL. After it expires the entry is still served for
+    `stale_ttl` more seconds while a single background refresh runs (stale-while-
+    revalidate); after that it counts as a miss.
+    """
+
+    def __init__(self, max_entries: int = 5000, default_ttl: float = 600, stale_ttl: float = 0,
+                 executor=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._executor = executor
+        self._entries = OrderedDict()  # key -> (value, expires_at, stale_until)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0,
+                       'expirations': 0, 'refreshes': 0, 'refresh_errors': 0}
+
+    def get(self, key: str, refresh: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Returns the cached value or None.
+        If the value is stale and `refresh` is given, schedules one background call
+        to refresh() (which is expected to set() the new value) and returns the stale value.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            value, expires_at, stale_until = entry
+            if now < expires_at:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return value
+            if now >= stale_until:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['stale_hits'] += 1
+            start_refresh = refresh is not None and self._executor is not None and key not in self._refreshing
+            if start_refresh:
+                self._refreshing.add(key)
+                self._stats['refreshes'] += 1
+
+        if start_refresh:
+            self._executor.submit(self._run_refresh, key, refresh)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Stores a value with its own TTL (default_ttl if not given), evicting LRU entries if full."""
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at, expires_at + self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Returns the hit/miss/eviction counters and the current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['refreshing'] = len(self._refreshing)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _run_refresh(self, key, refresh):
+        try:
+            refresh()
+        except Exception:
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+            logger.exception(f"[CACHE] Background refresh failed for {key}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,142 @@
+# course_store.py - 緊湊的課程資料存放：欄位式陣列、字串駐留、整數編碼
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List
+
+from .timeslots import compile_time, mask_to_time
+
+# acquire_all_courses 產生的欄位 (依原本的順序輸出)
+FIELDS = ("id", "department", "code", "dept_code", "grade", "class_type", "name", "credits", "type",
+          "limit", "confirmed", "online_count", "remaining", "teacher", "classroom", "time",
+          "prerequisites", "note")
+# 重複出現很多次的字串：存成共用字串表的索引
+CATEGORICAL = ("department", "dept_code", "grade", "class_type", "name", "type", "teacher", "classroom",
+               "prerequisites", "note")
+# 以十進位字串表示的整數
+INTEGER = ("credits", "limit", "confirmed", "online_count", "remaining")
+
+_NOT_INT = -2 ** 31  # INTEGER 欄位的原始字串不是標準整數寫法時的標記，實際值放在 _overrides
+_LOW_BITS = (1 << 64) - 1
+_FIELD_SET = frozenset(FIELDS)
+
+
+class CourseStore(Sequence):
+    """
+    Read-only, column-oriented store of the course catalogue.
+
+    Repeated strings (department, teacher, classroom, type, ...) are interned into one
+    shared table and stored as array('I') indexes, numeric strings as array('i'),
+    and the `time` dict as its 112-bit slot mask split over two array('Q') columns.
+    Only `code` is kept as a per-course string; `id` is rebuilt as "{code}-{teacher}"
+    when it follows that rule. Anything that does not round-trip exactly is kept in
+    a small per-course override dict, so store[i] always equals the original dict.
+
+    Indexing or iterating yields freshly built dicts, ready for jsonify.
+    """
+
+    def __init__(self, courses: Iterable[Dict]):
+        table: Dict[str, int] = {}
+        self._strings: List[str] = []
+        self._categorical = {field: array('I') for field in CATEGORICAL}
+        self._integer = {field: array('i') for field in INTEGER}
+        self._codes: List[str] = []
+        self._time_low = array('Q')
+        self._time_high = array('Q')
+        self._overrides: Dict[int, Dict] = {}  # doc_id -> {field: original value}
+        self._raw: Dict[int, Dict] = {}  # courses that do not follow the schema at all
+
+        def intern(value: str) -> int:
+            index = table.get(value)
+            if index is None:
+                index = table[value] = len(self._strings)
+                self._strings.append(value)
+            return index
+
+        for doc_id, course in enumerate(courses):
+            if set(course) != _FIELD_SET or not all(isinstance(course[f], str) for f in FIELDS if f != 'time'):
+                self._raw[doc_id] = course
+                course = dict.fromkeys(FIELDS, '')
+                course['time'] = {}
+            overrides = {}
+            for field in CATEGORICAL:
+                self._categorical[field].append(intern(course[field]))
+            for field in INTEGER:
+                value = course[field]
+                number = int(value) if value.isdecimal() and len(value) < 10 else None
+                if number is None or str(number) != value:
+                    overrides[field] = value
+                    number = _NOT_INT
+                self._integer[field].append(number)
+            self._codes.append(course['code'])
+            if course['id'] != f"{course['code']}-{course['teacher']}":
+                overrides['id'] = course['id']
+            mask = compile_time(course['time'])
+            if mask_to_time(mask) != course['time']:
+                overrides['time'] = course['time']
+            self._time_low.append(mask & _LOW_BITS)
+            self._time_high.append(mask >> 64)
+            if overrides:
+                self._overrides[doc_id] = overrides
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('course index out of range')
+        return self._build(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for doc_id in range(len(self)):
+            yield self._build(doc_id)
+
+    def field(self, doc_id: int, name: str):
+        """Reads one field without building the whole dict."""
+        if doc_id in self._raw:
+            return self._raw[doc_id].get(name)
+        overrides = self._overrides.get(doc_id)
+        if overrides and name in overrides:
+            return overrides[name]
+        if name in self._categorical:
+            return self._strings[self._categorical[name][doc_id]]
+        if name in self._integer:
+            return str(self._integer[name][doc_id])
+        if name == 'code':
+            return self._codes[doc_id]
+        if name == 'id':
+            return f"{self._codes[doc_id]}-{self.field(doc_id, 'teacher')}"
+        if name == 'time':
+            return mask_to_time(self.time_mask(doc_id))
+        return None
+
+    def time_mask(self, doc_id: int) -> int:
+        """The compiled slot mask of a course (see timeslots.compile_time)."""
+        if doc_id in self._raw:
+            return compile_time(self._raw[doc_id].get('time'))
+        return self._time_high[doc_id] << 64 | self._time_low[doc_id]
+
+    def _build(self, doc_id: int) -> Dict:
+        raw = self._raw.get(doc_id)
+        if raw is not None:
+            return dict(raw)
+        strings = self._strings
+        course = {}
+        for name in FIELDS:
+            if name in self._categorical:
+                course[name] = strings[self._categorical[name][doc_id]]
+            elif name in self._integer:
+                course[name] = str(self._integer[name][doc_id])
+            elif name == 'code':
+                course[name] = self._codes[doc_id]
+            else:
+                course[name] = None  # id / time，下面填入
+        course['id'] = f"{course['code']}-{course['teacher']}"
+        course['time'] = mask_to_time(self.time_mask(doc_id))
+        overrides = self._overrides.get(doc_id)
+        if overrides:
+            course.update(overrides)
+        return course
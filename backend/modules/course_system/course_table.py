@@ -0,0 +1,115 @@
+# course_table.py - QueryResult.asp 課程表格的共用解析 (lxml)
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import lxml.html
+
+# QueryResult.asp 課程表格的欄位位置
+COL_DEPARTMENT = 0
+COL_CODE = 2
+COL_DEPT_CODE = 4
+COL_GRADE = 5
+COL_CLASS_TYPE = 6
+COL_NAME = 7
+COL_CREDITS = 8
+COL_TYPE = 9
+COL_LIMIT = 10
+COL_CONFIRMED = 11
+COL_ONLINE_COUNT = 12
+COL_REMAINING = 13
+COL_TEACHER = 14
+COL_CLASSROOM = 15
+COL_DAYS = 16  # 16-22: Mon ... Sun
+COL_PREREQUISITES = 23
+COL_NOTE = 24
+MIN_COLUMNS = 25
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+SEAT_COLUMNS = (COL_CODE, COL_CONFIRMED, COL_ONLINE_COUNT, COL_REMAINING)
+
+_TABLE_XPATH = '//table[@border="1" and @style="font-size: 10pt"]'
+
+
+def cell_text(cell, separator: str = '') -> str:
+    """Same result as BeautifulSoup's get_text(separator, strip=True)."""
+    return separator.join(part.strip() for part in cell.itertext() if part.strip())
+
+
+def _course_rows(html: str):
+    doc = lxml.html.fromstring(html)
+    tables = doc.xpath(_TABLE_XPATH)
+    if not tables:
+        raise ValueError("Server response did not contain the course table.")
+    # 前兩列是表頭
+    for row in tables[0].xpath('.//tr')[2:]:
+        cells = row.findall('.//td')
+        if len(cells) >= MIN_COLUMNS:
+            yield cells
+
+
+def iter_rows(html: str, columns: Optional[Sequence[int]] = None,
+              stop_at_code: Optional[str] = None) -> Iterator[List[str]]:
+    """
+    Yields the stripped cell texts of every course row (rows with fewer than 25 cells are skipped).
+    With `columns`, only those cells are read, in that order. With `stop_at_code`, iteration
+    ends after the first row whose code column matches. Raises ValueError if the table is missing.
+    """
+    for cells in _course_rows(html):
+        if stop_at_code is not None and cell_text(cells[COL_CODE]) != stop_at_code:
+            continue
+        if columns is None:
+            yield [cell_text(cell) for cell in cells]
+        else:
+            yield [cell_text(cells[i]) for i in columns]
+        if stop_at_code is not None:
+            return
+
+
+def parse_courses(html: str) -> List[Dict]:
+    """Parses every course row into the dict shape acquire_all_courses stores."""
+    courses = []
+    for cells in _course_rows(html):
+        cols = [cell_text(cell) for cell in cells]
+        teacher_names = cell_text(cells[COL_TEACHER], separator=', ')
+        courses.append({
+            "id": f"{cols[COL_CODE]}-{teacher_names}", "department": cols[COL_DEPARTMENT].upper(),
+            "code": cols[COL_CODE], "dept_code": cols[COL_DEPT_CODE], "grade": cols[COL_GRADE],
+            "class_type": cols[COL_CLASS_TYPE], "name": cols[COL_NAME], "credits": cols[COL_CREDITS],
+            "type": cols[COL_TYPE], "limit": cols[COL_LIMIT], "confirmed": cols[COL_CONFIRMED],
+            "online_count": cols[COL_ONLINE_COUNT], "remaining": cols[COL_REMAINING],
+            "teacher": teacher_names, "classroom": cols[COL_CLASSROOM],
+            "time": {day: [t.strip() for t in cols[COL_DAYS + i].split(',') if t.strip()]
+                     for i, day in enumerate(DAYS)},
+            "prerequisites": cols[COL_PREREQUISITES], "note": cols[COL_NOTE],
+        })
+    return courses
+
+
+def parse_seat_updates(html: str, stop_at_code: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Reads only the code and seat columns: {code: {"confirmed", "online_count", "remaining"}}.
+    With `stop_at_code`, parsing stops at that course and the dict holds at most that one entry.
+    """
+    updates = {}
+    for code, confirmed, online_count, remaining in iter_rows(html, SEAT_COLUMNS, stop_at_code):
+        updates[code] = {"confirmed": confirmed, "online_count": online_count, "remaining": remaining}
+    return updates
+
+
+def parse_hidden_inputs(html: str) -> Dict[str, str]:
+    """Collects name -> value of every <input type="hidden"> in a form page."""
+    doc = lxml.html.fromstring(html)
+    return {
+        hidden.get('name'): hidden.get('value', '')
+        for hidden in doc.xpath('//input[@type="hidden"]')
+        if hidden.get('name')
+    }
+
+
+def parse_page_numbers(html: str) -> List[int]:
+    """Returns the page numbers of the pager buttons on a QueryResult page."""
+    doc = lxml.html.fromstring(html)
+    return [
+        int(button.get('value'))
+        for button in doc.xpath('//input[@type="button"][@onclick]')
+        if button.get('value') and button.get('value').isdigit()
+    ]
@@ -0,0 +1,104 @@
+# disk_cache.py - SQLite (WAL) 磁碟快取，重啟後仍保留課程名額資料
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class SQLiteCache:
+    """
+    Second cache tier stored in one SQLite file in WAL mode.
+    Nothing is read at startup; rows are looked up per key on memory misses.
+    Each thread gets its own connection, and WAL plus a busy timeout lets several
+    worker processes on the same host share the file.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(_SCHEMA)
+        self._local.conn = conn
+        return conn
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """Returns (value, updated_at) for key, or None if missing, older than max_age or on error."""
+        try:
+            row = self._connect().execute(
+                'SELECT value, updated_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            logger.exception(f"[DISK CACHE] Read failed for {key}")
+            return None
+        if row is None:
+            return None
+        value, updated_at = row
+        if max_age is not None and time.time() - updated_at > max_age:
+            return None
+        return json.loads(value), updated_at
+
+    def set(self, key: str, value: Any, updated_at: Optional[float] = None):
+        self.set_many([(key, value)], updated_at=updated_at)
+
+    def set_many(self, items: Iterable[Tuple[str, Any]], updated_at: Optional[float] = None):
+        """Writes many (key, value) pairs in a single transaction."""
+        updated_at = time.time() if updated_at is None else updated_at
+        rows = [(key, json.dumps(value, ensure_ascii=False), updated_at) for key, value in items]
+        if not rows:
+            return
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'INSERT INTO cache (key, value, updated_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at '
+                    'WHERE excluded.updated_at >= cache.updated_at',
+                    rows,
+                )
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error:
+            logger.exception(f"[DISK CACHE] Write of {len(rows)} rows failed")
+
+    def purge(self, older_than: float) -> int:
+        """Deletes rows not updated in the last `older_than` seconds. Returns the number removed."""
+        try:
+            cursor = self._connect().execute(
+                'DELETE FROM cache WHERE updated_at < ?', (time.time() - older_than,)
+            )
+            return cursor.rowcount
+        except sqlite3.Error:
+            logger.exception("[DISK CACHE] Purge failed")
+            return 0
+
+    def stats(self) -> Dict:
+        try:
+            count, = self._connect().execute('SELECT COUNT(*) FROM cache').fetchone()
+        except sqlite3.Error:
+            count = None
+        return {'path': self.path, 'rows': count}
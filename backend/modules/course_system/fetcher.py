@@ -2,11 +2,16 @@
 import time
 import random
 import logging
+import threading
+from collections import deque, namedtuple
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Optional, Dict
 import requests
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from requests.cookies import RequestsCookieJar
+from .course_table import parse_hidden_inputs, parse_seat_updates
 
 logger = logging.getLogger(__name__)
 
@@ -17,87 +22,380 @@ USER_AGENTS = [
     'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0 Safari/537.36',
 ]
 
-def _make_session() -> requests.Session:
-    """Creates a requests session with automatic retries for server errors."""
+FORM_URL = "https://course.nuk.edu.tw/QueryCourse/QueryCourse.asp"
+LIST_URL = "https://course.nuk.edu.tw/QueryCourse/QueryResult.asp"
+
+UPSTREAM_DEADLINE = 20.0   # Max seconds one fetch (all attempts together) may take
+MAX_ATTEMPTS = 10
+RETRY_BUDGET_RATIO = 0.2   # Retries (and hedges) may be at most this share of upstream requests...
+RETRY_BUDGET_MIN = 5       # ...plus this many per window, so a quiet server can still be retried
+RETRY_BUDGET_WINDOW = 60.0 # Seconds
+HEDGE_MAX_FETCHES = 4      # Hedged fetches expected at once until configure_hedging() is called
+
+def _make_session(pool_maxsize: int = 10) -> requests.Session:
+    """
+    Creates a pooled requests session. Adapter-level retries are off; every retry goes
+    through fetch_sclass_updates_from_nuk so it counts against the deadline and budget.
+    """
     s = requests.Session()
-    # Retry on common server errors with increasing backoff time
-    retries = Retry(total=3, backoff_factor=0.8, status_forcelist=[429, 500, 502, 503, 504])
-    s.mount('https://', HTTPAdapter(max_retries=retries))
-    s.mount('http://', HTTPAdapter(max_retries=retries))
+    adapter = HTTPAdapter(max_retries=0, pool_connections=2, pool_maxsize=pool_maxsize)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
     s.verify = False # Ignore SSL certificate verification errors
     return s
 
+# 表單頁的 hidden inputs 與同一次取得的 cookie；generation 每次重新取得表單時加一
+_FormState = namedtuple('_FormState', ['generation', 'hidden_inputs', 'cookies', 'fetched_at'])
+
+class NukCourseClient:
+    """
+    Long-lived, thread-safe client for QueryCourse/QueryResult.
+
+    Keeps one pooled keep-alive session, and caches the form page's hidden inputs
+    (and the cookies that came with them) for `form_ttl` seconds. The form page
+    is fetched again only when the cache expires or a POST comes back without the
+    course table. Each form state carries its own cookie jar, so swapping in a new
+    state never changes the cookies of POSTs already in flight, and the session's
+    own jar stays empty.
+    """
+
+    def __init__(self, pool_size: int = 10, form_ttl: float = 300, timeout: float = 15):
+        self.form_ttl = form_ttl
+        self.timeout = timeout
+        self.session = _make_session(pool_maxsize=pool_size)
+        # cookie 隨表單狀態保存 (見 _FormState)，session 本身不保存也不送出任何 cookie
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.headers = {
+            'User-Agent': random.choice(USER_AGENTS),
+            'Referer': 'https://course.nuk.edu.tw/QueryCourse/QueryCourse.asp'
+        }
+        self._form_lock = threading.Lock()
+        self._form = None
+        self._form_generation = 0
+
+    def _request_timeout(self, timeout: Optional[float] = None, expires: Optional[float] = None,
+                         cancelled: Optional[threading.Event] = None) -> float:
+        """
+        Timeout for the next request: `timeout` (or the client default), cut to what is left
+        before `expires` (a time.monotonic() value). Raises TimeoutError once it has passed,
+        and CancelledError once `cancelled` is set.
+        """
+        if cancelled is not None and cancelled.is_set():
+            raise CancelledError("Attempt abandoned by its caller")
+        timeout = timeout or self.timeout
+        if expires is not None:
+            left = expires - time.monotonic()
+            if left <= 0:
+                raise TimeoutError("Deadline passed before the request could be sent")
+            timeout = min(timeout, left)
+        return timeout
+
+    def _form_state(self, stale_generation: Optional[int] = None, timeout: Optional[float] = None,
+                    expires: Optional[float] = None, cancelled: Optional[threading.Event] = None) -> _FormState:
+        """
+        Returns the cached form state, fetching the form page when there is none, it is
+        older than form_ttl, or it is still `stale_generation` (the state a POST just failed
+        with). If another thread has refreshed since, its state is reused as is.
+        """
+        with self._form_lock:
+            form = self._form
+            expired = form is None or time.monotonic() - form.fetched_at >= self.form_ttl
+            if not expired and (stale_generation is None or form.generation != stale_generation):
+                return form
+            logger.info("Fetching hidden inputs from form page...")
+            # 以新的 cookie jar 取得表單：驗證失敗時連 cookie 一起換新，不影響進行中的請求
+            form_resp = self.session.get(FORM_URL, headers=self.headers, cookies=RequestsCookieJar(),
+                                         timeout=self._request_timeout(timeout, expires, cancelled))
+            form_resp.raise_for_status()
+            form_resp.encoding = 'big5'
+            cookies = RequestsCookieJar()
+            for resp in form_resp.history + [form_resp]:
+                cookies.update(resp.cookies)
+            self._form_generation += 1
+            self._form = _FormState(self._form_generation, parse_hidden_inputs(form_resp.text),
+                                    cookies, time.monotonic())
+            return self._form
+
+    def invalidate_form_state(self):
+        with self._form_lock:
+            self._form = None
+
+    def query_sclass(self, year: str, semester: str, sclass: str,
+                     timeout: Optional[float] = None, expires: Optional[float] = None,
+                     cancelled: Optional[threading.Event] = None) -> Dict[str, Dict]:
+        """
+        POSTs the Sclass search with the cached form state and returns parse_seat_updates()
+        of the result. If the result has no course rows, the form state is refreshed and
+        the POST retried once; a second missing table raises ValueError.
+        One call may send up to four requests; each gets `timeout` seconds but none runs
+        past `expires` (time.monotonic()), after which TimeoutError is raised. Setting
+        `cancelled` stops the call before its next request.
+        """
+        payload = {
+            'OpenYear': year,
+            'Helf': semester,
+            'Pclass': 'A',
+            'Sclass': sclass,
+            'Page': '1'
+        }
+        failed_generation = None
+        for refresh in (False, True):
+            form = self._form_state(failed_generation, timeout=timeout, expires=expires, cancelled=cancelled)
+            data = dict(payload)
+            data.update(form.hidden_inputs)
+            r = self.session.post(LIST_URL, data=data, headers=self.headers, cookies=form.cookies,
+                                  timeout=self._request_timeout(timeout, expires, cancelled))
+            r.raise_for_status()
+            form.cookies.update(r.cookies)
+            r.encoding = 'utf-8' # Result page is utf-8
+            try:
+                updates = parse_seat_updates(r.text)
+            except ValueError:
+                if refresh:
+                    raise
+                updates = None
+            if updates or refresh:
+                return updates
+            logger.info("Result page had no course rows; refreshing form state.")
+            failed_generation = form.generation
+
+class RetryBudget:
+    """
+    Sliding-window retry budget: retries are allowed while they stay below
+    ratio * first attempts + min_retries within the last `window` seconds.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_retries: int = RETRY_BUDGET_MIN,
+                 window: float = RETRY_BUDGET_WINDOW):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    def _prune(self, now):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_retry(self) -> bool:
+        """Spends one retry if the budget allows it."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                self.denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._prune(time.monotonic())
+            return {'requests': len(self._requests), 'retries': len(self._retries), 'denied': self.denied}
+
+class LatencyTracker:
+    """Keeps the last `size` latencies (seconds) and answers percentile queries."""
+
+    def __init__(self, size: int = 500, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile, or None until min_samples have been recorded."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return {'samples': 0}
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] * 1000, 1)
+        return {'samples': len(ordered), 'p50_ms': pick(50), 'p95_ms': pick(95), 'p99_ms': pick(99),
+                'max_ms': round(ordered[-1] * 1000, 1)}
+
+_retry_budget = RetryBudget()
+_attempt_latency = LatencyTracker()   # 單次成功嘗試的延遲，用來決定何時送出 hedge
+_call_latency = LatencyTracker()      # 整個 fetch (含重試) 的延遲
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+_counters = {'calls': 0, 'failures': 0, 'deadline_exceeded': 0, 'budget_exhausted': 0,
+             'hedges': 0, 'hedge_wins': 0}
+_counters_lock = threading.Lock()
+
+def configure_hedging(max_concurrent_fetches: int):
+    """
+    Sizes the attempt pool for `max_concurrent_fetches` hedged fetches running at once
+    (e.g. the SingleFlight limit of the caller): two attempts each, so a fetch never
+    queues behind another fetch's attempts. Call it at startup, before the first fetch.
+    """
+    global _hedge_executor
+    with _hedge_executor_lock:
+        previous = _hedge_executor
+        _hedge_executor = ThreadPoolExecutor(max_workers=2 * max_concurrent_fetches, thread_name_prefix='nuk-hedge')
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=2 * HEDGE_MAX_FETCHES, thread_name_prefix='nuk-hedge')
+        return _hedge_executor
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+def upstream_stats() -> Dict:
+    """Latency percentiles, retry budget usage and hedge counters of upstream fetches."""
+    with _counters_lock:
+        stats = dict(_counters)
+    stats['attempt_latency'] = _attempt_latency.stats()
+    stats['call_latency'] = _call_latency.stats()
+    stats['retry_budget'] = _retry_budget.stats()
+    return stats
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_client() -> NukCourseClient:
+    """Returns the process-wide NukCourseClient, creating it on first use."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = NukCourseClient()
+    return _default_client
+
 def fetch_course_update_from_nuk(year: str, semester: str, sclass: str, cono: str) -> Optional[Dict]:
     """
     Fetches the enrollment status for a single course using a robust 2-step process.
     Returns a dict: {"confirmed":..., "online_count":..., "remaining":...} or None on failure.
     """
-    session = _make_session()
-    headers = {
-        'User-Agent': random.choice(USER_AGENTS),
-        'Referer': 'https://course.nuk.edu.tw/QueryCourse/QueryCourse.asp'
-    }
-
-    form_url = "https://course.nuk.edu.tw/QueryCourse/QueryCourse.asp"
-    list_url = "https://course.nuk.edu.tw/QueryCourse/QueryResult.asp"
-    
-    for attempt in range(10):
+    updates = fetch_sclass_updates_from_nuk(year, semester, sclass, expected_cono=cono)
+    if updates is None:
+        return None
+    return updates.get(cono)
+
+def _run_hedged(attempt, expires: float):
+    """
+    Runs attempt(expires, cancelled); if it has not answered by the p95 attempt latency and
+    the retry budget allows it, starts a second one and returns whichever succeeds first.
+    Attempts still queued or running when this returns (the loser, or both on timeout)
+    are cancelled: queued ones never start and running ones stop before their next request.
+    """
+    executor = _get_hedge_executor()
+    cancelled = threading.Event()
+    futures = [executor.submit(attempt, expires, cancelled)]
+    try:
+        remaining = expires - time.monotonic()
+        hedge_after = _attempt_latency.percentile(95)
+        if hedge_after is None or hedge_after >= remaining:
+            return futures[0].result(timeout=remaining)
         try:
-            # Step 1: Visit the form page to get session cookies and hidden inputs
-            logger.info(f"Attempt {attempt + 1}: Fetching hidden inputs from form page...")
-            form_resp = session.get(form_url, headers=headers, timeout=15)
-            form_resp.encoding = 'big5'
-            soup = BeautifulSoup(form_resp.text, 'html.parser')
-            
-            hidden_inputs = {}
-            inputs = soup.find_all('input', {'type': 'hidden'})
-            for hidden in inputs:
-                name = hidden.get('name')
-                if name:
-                    hidden_inputs[name] = hidden.get('value', '')
-            
-            # Step 2: Submit the search with the complete payload
-            payload = {
-                'OpenYear': year,
-                'Helf': semester,
-                'Pclass': 'A',
-                'Sclass': sclass,
-                'Page': '1'
-            }
-            payload.update(hidden_inputs)
-            
-            logger.info(f"Attempt {attempt + 1}: Submitting search for Sclass={sclass}...")
-            r = session.post(list_url, data=payload, headers=headers, timeout=15)
-            r.encoding = 'utf-8' # Result page is utf-8
-            soup = BeautifulSoup(r.text, 'html.parser')
-
-            table = soup.find('table', attrs={'border': '1', 'style': 'font-size: 10pt'})
-            if not table:
-                raise ValueError('No course table found in search result.')
-
-            rows = table.find_all('tr')[2:]
-            for row in rows:
-                cols = [c.get_text(strip=True) for c in row.find_all('td')]
-                if len(cols) >= 25 and cols[2] == cono:
-                    result = {
-                        "confirmed": cols[11],
-                        "online_count": cols[12],
-                        "remaining": cols[13]
-                    }
-                    logger.info(f"Successfully found course {cono}")
-                    return result # Success, exit the function
-
-            # If the loop finishes, the course was not found in the results for this attempt
-            raise ValueError(f"Course {cono} not found in search results on attempt {attempt + 1}")
-
-        except Exception as e:
-            logger.warning(f"Fetch attempt {attempt + 1} failed: {e}")
-            if attempt < 2: # If this was not the last attempt
-                sleep_time = (attempt + 1) * 2 + random.random()
-                logger.info(f"Waiting for {sleep_time:.1f} seconds before retrying...")
-                time.sleep(sleep_time)
-            continue # Go to the next attempt
-
-    # If all attempts fail, return None
-    logger.error(f"Failed to fetch data for course {cono} after multiple attempts.")
-    return None
\ No newline at end of file
+            return futures[0].result(timeout=hedge_after)
+        except FutureTimeoutError:
+            pass
+        if not _retry_budget.try_retry():
+            return futures[0].result(timeout=max(0.0, expires - time.monotonic()))
+
+        _count('hedges')
+        futures.append(executor.submit(attempt, expires, cancelled))
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, expires - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise FutureTimeoutError("Hedged attempts did not finish before the deadline.")
+            for future in done:
+                if future.exception() is None:
+                    if future is futures[1]:
+                        _count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        cancelled.set()
+        for future in futures:
+            future.cancel()
+
+def fetch_sclass_updates_from_nuk(year: str, semester: str, sclass: str,
+                                  expected_cono: Optional[str] = None,
+                                  deadline: float = UPSTREAM_DEADLINE,
+                                  hedge: bool = False) -> Optional[Dict[str, Dict]]:
+    """
+    Fetches the whole QueryResult table for one Sclass and returns the enrollment status
+    of every course on it: {cono: {"confirmed":..., "online_count":..., "remaining":...}}.
+    If expected_cono is given, a result without that course is treated as a failed attempt.
+
+    All attempts together stop after `deadline` seconds, and retries stop early when the
+    process-wide retry budget is spent. With hedge=True a slow attempt is raced by a
+    second one (see _run_hedged). Returns None on failure.
+    """
+    client = get_client()
+    started = time.monotonic()
+    expires = started + deadline
+    _count('calls')
+
+    def attempt(attempt_expires, cancelled=None):
+        attempt_started = time.monotonic()
+        updates = client.query_sclass(year, semester, sclass, expires=attempt_expires, cancelled=cancelled)
+        if not updates:
+            raise ValueError(f"Sclass {sclass} returned an empty table")
+        if expected_cono and expected_cono not in updates:
+            raise ValueError(f"Course {expected_cono} not found in search results")
+        _attempt_latency.record(time.monotonic() - attempt_started)
+        return updates
+
+    try:
+        for attempt_no in range(MAX_ATTEMPTS):
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                _count('deadline_exceeded')
+                logger.error(f"Deadline of {deadline:.0f}s exceeded fetching Sclass {sclass}.")
+                break
+            if attempt_no == 0:
+                _retry_budget.record_request()
+            elif not _retry_budget.try_retry():
+                _count('budget_exhausted')
+                logger.error(f"Retry budget exhausted; giving up on Sclass {sclass}.")
+                break
+
+            try:
+                logger.info(f"Attempt {attempt_no + 1}: Submitting search for Sclass={sclass}...")
+                updates = _run_hedged(attempt, expires) if hedge else attempt(expires)
+                logger.info(f"Successfully fetched {len(updates)} courses for Sclass={sclass}")
+                return updates # Success, exit the function
+
+            except Exception as e:
+                logger.warning(f"Fetch attempt {attempt_no + 1} failed: {e}")
+                # Exponential backoff with jitter, never past the deadline
+                sleep_time = min(2 ** attempt_no * 0.5 + random.random() * 0.5, expires - time.monotonic())
+                if sleep_time > 0:
+                    logger.info(f"Waiting for {sleep_time:.1f} seconds before retrying...")
+                    time.sleep(sleep_time)
+
+        # If all attempts fail, return None
+        _count('failures')
+        logger.error(f"Failed to fetch data for Sclass {sclass} after multiple attempts.")
+        return None
+    finally:
+        _call_latency.record(time.monotonic() - started)
@@ -0,0 +1,253 @@
+# schedule.py - 課程時段位元遮罩索引：空堂查詢與無衝堂課表產生器
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from .course_store import CourseStore
+from .timeslots import ALL_SLOTS, SLOT_COUNT, compile_time
+
+logger = logging.getLogger(__name__)
+
+
+class _Stop(Exception):
+    """Raised inside the search once the result limit or the deadline is reached."""
+
+
+class _ScheduleState:
+    """Everything a query needs; swapped as a whole on rebuild."""
+    __slots__ = ('courses', 'masks', 'credits', 'by_id', 'by_code',
+                 'slot_docs', 'untimed', 'by_department', 'by_credits', 'by_type')
+
+    def __init__(self, courses=(), masks=(), credits=(), by_id=None, by_code=None,
+                 slot_docs=None, untimed=0, by_department=None, by_credits=None, by_type=None):
+        self.courses = courses
+        self.masks = masks
+        self.credits = credits
+        self.by_id = by_id or {}
+        self.by_code = by_code or {}
+        # 以下皆為「課程集合」位元組 (第 doc_id 位元代表第 doc_id 門課)
+        self.slot_docs = slot_docs or [0] * SLOT_COUNT  # slot bit -> courses meeting in that slot
+        self.untimed = untimed  # courses without any known time slot
+        self.by_department = by_department or {}
+        self.by_credits = by_credits or {}
+        self.by_type = by_type or {}
+
+
+def _iter_bits(bits: int):
+    """Yields the positions of the set bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _credits(course: Dict) -> float:
+    try:
+        return float(course.get('credits') or 0)
+    except ValueError:
+        return 0.0
+
+
+class CourseScheduleIndex:
+    """
+    Compiled time masks of the course catalogue, a slot -> courses index for free-slot
+    queries, and a backtracking schedule generator.
+
+    A requested course is a course id or a course code; a code that matches several
+    catalogue entries (different teachers or classes) is a set of alternative sections,
+    exactly one of which goes into a schedule.
+    """
+
+    def __init__(self):
+        self._state = _ScheduleState()
+
+    def rebuild(self, data: Dict):
+        """Compiles every course's time into a bitmask, builds the slot index and swaps the new state in."""
+        started = time.perf_counter()
+        courses = data.get('courses', []) if data else []
+        if isinstance(courses, CourseStore):
+            masks = [courses.time_mask(doc_id) for doc_id in range(len(courses))]
+        else:
+            masks = [compile_time(course.get('time')) for course in courses]
+        credits = []
+        by_id, by_code = {}, {}
+        slot_docs = [0] * SLOT_COUNT
+        untimed = 0
+        by_department, by_credits, by_type = {}, {}, {}
+        for doc_id, course in enumerate(courses):
+            credits.append(_credits(course))
+            by_id[course.get('id')] = doc_id
+            by_code.setdefault(str(course.get('code', '')).upper(), []).append(doc_id)
+            doc_bit = 1 << doc_id
+            if not masks[doc_id]:
+                untimed |= doc_bit
+            for slot in _iter_bits(masks[doc_id]):
+                slot_docs[slot] |= doc_bit
+            for index, value in ((by_department, course.get('department', '').upper()),
+                                 (by_credits, str(course.get('credits', '')).strip()),
+                                 (by_type, course.get('type', ''))):
+                index[value] = index.get(value, 0) | doc_bit
+        self._state = _ScheduleState(courses, masks, credits, by_id, by_code,
+                                     slot_docs, untimed, by_department, by_credits, by_type)
+        logger.info(f"[SCHEDULE] Compiled time masks of {len(courses)} courses "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def sections(self, identifier: str) -> List[int]:
+        """Doc ids of the sections a course id or code refers to."""
+        state = self._state
+        if identifier in state.by_id:
+            return [state.by_id[identifier]]
+        return list(state.by_code.get(str(identifier).upper(), ()))
+
+    def mask_of(self, course_id: str) -> Optional[int]:
+        doc_id = self._state.by_id.get(course_id)
+        return None if doc_id is None else self._state.masks[doc_id]
+
+    def fits(self, free: int, departments: Optional[Sequence[str]] = None,
+             credits: Optional[Sequence[str]] = None, types: Optional[Sequence[str]] = None,
+             include_untimed: bool = False, page: int = 1, page_size: int = 50) -> Dict:
+        """
+        Returns courses whose time slots all lie inside the `free` slot mask, optionally
+        restricted to departments / credit values / course types (any of the given values).
+        Courses without a known time are left out unless `include_untimed`.
+        Result: {"total":..., "page":..., "page_size":..., "courses": [...]}
+        """
+        state = self._state
+        # 佔用任何非空堂時段的課程都不符合；只需 OR 非空堂時段的課程集合
+        excluded = 0 if include_untimed else state.untimed
+        for slot in _iter_bits(ALL_SLOTS & ~free):
+            excluded |= state.slot_docs[slot]
+        matches = ((1 << len(state.courses)) - 1) & ~excluded
+        for index, values in ((state.by_department, [v.upper() for v in departments or ()]),
+                              (state.by_credits, [str(v).strip() for v in credits or ()]),
+                              (state.by_type, list(types or ()))):
+            if values:
+                allowed = 0
+                for value in values:
+                    allowed |= index.get(value, 0)
+                matches &= allowed
+
+        doc_ids = list(_iter_bits(matches))
+        start = (page - 1) * page_size
+        return {
+            "total": len(doc_ids),
+            "page": page,
+            "page_size": page_size,
+            "courses": [state.courses[doc_id] for doc_id in doc_ids[start:start + page_size]],
+        }
+
+    def generate(self, required: Sequence[str], optional: Sequence[str] = (), blocked: int = 0,
+                 limit: int = 50, timeout: float = 2.0, maximal: bool = True) -> Dict:
+        """
+        Lists conflict-free schedules with one section of every required course and at
+        most one section of each optional course, avoiding the `blocked` slot mask.
+        Taking an optional course is tried before skipping it, so fuller schedules come
+        early. With `maximal`, schedules that could still take another optional course
+        are left out.
+        Stops after `limit` schedules or `timeout` seconds.
+        """
+        state = self._state
+        started = time.monotonic()
+        deadline = started + timeout
+        unknown = []
+
+        def build_groups(identifiers, seen):
+            groups = []
+            for identifier in identifiers:
+                doc_ids = self.sections(identifier)
+                if not doc_ids:
+                    unknown.append(identifier)
+                    continue
+                key = tuple(doc_ids)
+                if key in seen:
+                    continue
+                seen.add(key)
+                groups.append((identifier, [(state.masks[d], d) for d in doc_ids if not state.masks[d] & blocked]))
+            return groups
+
+        seen = set()
+        required_groups = build_groups(required, seen)
+        missing_required = bool(unknown)
+        optional_groups = build_groups(optional, seen)
+        unsatisfiable = [identifier for identifier, sections in required_groups if not sections]
+        # 選擇最少的課程先排，衝突越早發現、剪掉的分支越多
+        required_groups.sort(key=lambda group: len(group[1]))
+        optional_groups = [group for group in optional_groups if group[1]]
+        optional_groups.sort(key=lambda group: len(group[1]))
+        req = [sections for _, sections in required_groups]
+        opt = [sections for _, sections in optional_groups]
+        # later_slots[j]: 第 j 門之後所有可選課程會用到的時段聯集
+        later_slots = [0] * (len(opt) + 1)
+        for j in range(len(opt) - 1, -1, -1):
+            later_slots[j] = later_slots[j + 1]
+            for mask, _ in opt[j]:
+                later_slots[j] |= mask
+
+        schedules = []
+        chosen = []
+        skipped = []
+        explored = 0
+        timed_out = False
+
+        def tick():
+            nonlocal explored, timed_out
+            explored += 1
+            if explored & 0xFF == 0 and time.monotonic() > deadline:
+                timed_out = True
+                raise _Stop()
+
+        def emit(used):
+            if maximal and any(not used & mask for j in skipped for mask, _ in opt[j]):
+                return
+            schedules.append(list(chosen))
+            if len(schedules) >= limit:
+                raise _Stop()
+
+        def place_optional(j, used):
+            tick()
+            if j == len(opt):
+                emit(used)
+                return
+            for mask, doc_id in opt[j]:
+                if not used & mask:
+                    chosen.append(doc_id)
+                    place_optional(j + 1, used | mask)
+                    chosen.pop()
+            # 略過第 j 門時，若它有班別既不衝堂、之後也不可能被佔走，就不會是 maximal 課表
+            if maximal and any(not used & mask and not later_slots[j + 1] & mask for mask, _ in opt[j]):
+                return
+            skipped.append(j)
+            place_optional(j + 1, used)
+            skipped.pop()
+
+        def place_required(i, used):
+            tick()
+            if i == len(req):
+                place_optional(0, used)
+                return
+            for mask, doc_id in req[i]:
+                if not used & mask:
+                    chosen.append(doc_id)
+                    place_required(i + 1, used | mask)
+                    chosen.pop()
+
+        # 找不到的可選課程只回報，不影響產生
+        if not missing_required and not unsatisfiable:
+            try:
+                place_required(0, blocked)
+            except _Stop:
+                pass
+
+        return {
+            "schedules": [{
+                "course_ids": [state.courses[d].get('id') for d in schedule],
+                "credits": sum(state.credits[d] for d in schedule),
+            } for schedule in schedules],
+            "count": len(schedules),
+            "truncated": len(schedules) >= limit,
+            "timed_out": timed_out,
+            "explored": explored,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "unknown": unknown,
+            "unsatisfiable": unsatisfiable,
+        }
@@ -0,0 +1,140 @@
+# search.py - 課程搜尋用的記憶體反向索引 (中文以字元 bigram 建索引)
+import re
+import math
+import time
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 欄位權重：課號與課名的命中比備註更重要
+FIELD_WEIGHTS = {
+    'code': 5.0,
+    'name': 3.0,
+    'teacher': 3.0,
+    'department': 2.0,
+    'note': 1.0,
+}
+
+_CJK_RUN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+_WORD_RUN = re.compile(r'[0-9a-z]+')
+
+
+def tokenize(text: str, for_query: bool = False, infix: bool = False) -> List[str]:
+    """
+    Splits text into index terms.
+    CJK runs become character bigrams (a lone character stays a unigram); latin/digit
+    runs are kept whole and, when indexing, also as prefixes so partial codes like
+    "cs10" still match. With infix=True (used for course codes) every substring of a
+    latin/digit run is indexed, so "1001" finds "CS1001A".
+    """
+    if not text:
+        return []
+    text = text.lower()
+    tokens = []
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if not for_query:
+                # 單字查詢也要能命中，例如只輸入姓氏
+                tokens.extend(run)
+    for word in _WORD_RUN.findall(text):
+        if for_query:
+            tokens.append(word)
+        elif infix:
+            tokens.extend(word[i:j] for i in range(len(word)) for j in range(i + 1, len(word) + 1))
+        else:
+            tokens.extend(word[:i] for i in range(1, len(word) + 1))
+    return tokens
+
+
+class _IndexState:
+    """Everything a query needs; swapped as a whole on rebuild."""
+    __slots__ = ('courses', 'postings', 'by_department')
+
+    def __init__(self, courses, postings, by_department):
+        self.courses = courses
+        self.postings = postings
+        self.by_department = by_department
+
+
+class CourseSearchIndex:
+    """Inverted index over name/teacher/code/department/note of the course catalogue."""
+
+    def __init__(self):
+        self._state = _IndexState([], {}, {})
+
+    def rebuild(self, data: Dict):
+        """Builds a fresh index from a courses_final.json style dict and swaps it in."""
+        started = time.perf_counter()
+        courses = data.get('courses', []) if data else []
+        postings = {}
+        by_department = {}
+        for doc_id, course in enumerate(courses):
+            by_department.setdefault(course.get('department', ''), []).append(doc_id)
+            doc_terms = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(course.get(field, ''), infix=field == 'code'):
+                    if doc_terms.get(token, 0.0) < weight:
+                        doc_terms[token] = weight
+            for token, weight in doc_terms.items():
+                postings.setdefault(token, {})[doc_id] = weight
+        # 以單一指派替換整個索引，查詢中的執行緒仍使用舊的狀態
+        self._state = _IndexState(courses, postings, by_department)
+        logger.info(f"[SEARCH] Indexed {len(courses)} courses, {len(postings)} terms "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def search(self, query: str, departments: Optional[List[str]] = None,
+               page: int = 1, page_size: int = 50) -> Dict:
+        """
+        Returns ranked courses matching every term of the query.
+        Result: {"total":..., "page":..., "page_size":..., "courses": [...]}
+        """
+        state = self._state
+        n_docs = len(state.courses)
+
+        allowed = None
+        if departments:
+            allowed = set()
+            for dept in departments:
+                allowed.update(state.by_department.get(dept.upper(), ()))
+
+        terms = list(dict.fromkeys(tokenize(query, for_query=True)))
+        if not terms:
+            if allowed is None:
+                ranked = list(range(n_docs))
+            else:
+                ranked = sorted(allowed)
+        else:
+            term_postings = []
+            for term in terms:
+                posting = state.postings.get(term)
+                if not posting:
+                    term_postings = []
+                    break
+                term_postings.append(posting)
+            # 從最短的 posting 開始交集，減少比對次數
+            term_postings.sort(key=len)
+            scores = {}
+            if term_postings:
+                first = term_postings[0]
+                candidates = first.keys() if allowed is None else first.keys() & allowed
+                for posting in term_postings[1:]:
+                    candidates = candidates & posting.keys()
+                    if not candidates:
+                        break
+                for posting in term_postings:
+                    idf = math.log(1 + n_docs / len(posting))
+                    for doc_id in candidates:
+                        scores[doc_id] = scores.get(doc_id, 0.0) + posting[doc_id] * idf
+            ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+
+        start = (page - 1) * page_size
+        return {
+            "total": len(ranked),
+            "page": page,
+            "page_size": page_size,
+            "courses": [state.courses[doc_id] for doc_id in ranked[start:start + page_size]],
+        }
@@ -0,0 +1,108 @@
+# seat_stream.py - 名額變動的單一扇出中心 (供 SSE 訂閱者使用)
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+SEAT_FIELDS = ('confirmed', 'online_count', 'remaining')
+
+
+class SeatSubscription:
+    """
+    One subscriber's pending changes, merged per course key.
+    A slow reader never builds an unbounded queue: repeated changes of the same
+    course collapse into the latest values.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = frozenset(keys)
+        self.closed = False
+        self._pending: Dict[str, Dict[str, str]] = {}
+        self._cond = threading.Condition()
+
+    def push(self, key: str, changes: Dict[str, str]):
+        with self._cond:
+            self._pending.setdefault(key, {}).update(changes)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+        """Waits up to `timeout` seconds for changes and returns {key: changed fields} ({} on timeout)."""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            pending, self._pending = self._pending, {}
+            return pending
+
+
+class SeatHub:
+    """
+    Fans seat-count changes out to subscribers.
+
+    Fetchers call publish() with every update they cache; the hub diffs each
+    subscribed course against the last values it saw and pushes only the changed
+    fields. Subscribers block on their own condition until something changes,
+    so idle subscribers cost no work and only published updates wake them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[SeatSubscription]] = {}
+        self._last: Dict[str, Dict[str, str]] = {}  # only for keys that have subscribers
+        self._stats = {'published': 0, 'changes': 0, 'deliveries': 0}
+
+    def subscribe(self, keys: Iterable[str], initial: Optional[Dict[str, Dict]] = None) -> SeatSubscription:
+        """
+        Registers a subscription. `initial` ({key: update}) is what the subscriber
+        already has, so the first published values are diffed against it.
+        """
+        subscription = SeatSubscription(keys)
+        with self._lock:
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+                if initial and initial.get(key) and key not in self._last:
+                    self._last[key] = {f: initial[key].get(f) for f in SEAT_FIELDS}
+        return subscription
+
+    def unsubscribe(self, subscription: SeatSubscription):
+        subscription.close()
+        with self._lock:
+            for key in subscription.keys:
+                subscribers = self._subscribers.get(key)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+                    self._last.pop(key, None)
+
+    def publish(self, items: Iterable[Tuple[str, Dict]]) -> int:
+        """Diffs (key, update) pairs against the last seen values and notifies subscribers. Returns #changes."""
+        deliveries: List[Tuple[SeatSubscription, str, Dict[str, str]]] = []
+        changed = 0
+        with self._lock:
+            self._stats['published'] += 1
+            for key, update in items:
+                subscribers = self._subscribers.get(key)
+                if not subscribers:
+                    continue
+                values = {f: update.get(f) for f in SEAT_FIELDS}
+                previous = self._last.get(key, {})
+                changes = {f: v for f, v in values.items() if previous.get(f) != v}
+                if not changes:
+                    continue
+                self._last[key] = values
+                changed += 1
+                deliveries.extend((subscription, key, changes) for subscription in subscribers)
+            self._stats['changes'] += changed
+            self._stats['deliveries'] += len(deliveries)
+        for subscription, key, changes in deliveries:
+            subscription.push(key, changes)
+        return changed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subscriptions = {s for subscribers in self._subscribers.values() for s in subscribers}
+            return dict(self._stats, subscribers=len(subscriptions), courses=len(self._subscribers))
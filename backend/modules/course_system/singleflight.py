@@ -0,0 +1,62 @@
+# singleflight.py - 合併同一個 key 的並行請求，只向上游請求一次
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+
+class SingleFlight:
+    """
+    Thread-safe request coalescing.
+    The first caller for a key runs the function; concurrent callers for the same key
+    block on the leader's future and receive the same result (or exception).
+    With max_concurrent set, at most that many keys run at once; further leaders wait
+    for a free slot.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Runs fn once per key among concurrent callers and returns its result.
+        Waiters give up after `timeout` seconds with the builtin TimeoutError (before
+        Python 3.11 it is not the same class as concurrent.futures.TimeoutError); the
+        leader always runs fn to completion, but raises the same TimeoutError (shared
+        with its waiters) if no slot frees up within `timeout`.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                if future.done():  # fn itself raised it
+                    raise
+                raise TimeoutError(f"In-flight call for {key} did not finish within {timeout}s") from None
+
+        try:
+            if self._slots is not None and not self._slots.acquire(timeout=timeout):
+                raise TimeoutError(f"No free slot to run {key} within {timeout}s")
+            try:
+                result = fn()
+            finally:
+                if self._slots is not None:
+                    self._slots.release()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,88 @@
+# snapshot.py - 課程資料的記憶體快照 (預先序列化與壓縮)
+import json
+import gzip
+import time
+import hashlib
+import logging
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli 為選用套件，未安裝時只提供 gzip
+    brotli = None
+
+from .course_store import CourseStore
+from ..reloading import ReloadingFile
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotPayload:
+    """One immutable, fully serialized version of the course data file."""
+    __slots__ = ('data', 'body', 'gzip_body', 'br_body', 'etag', 'mtime')
+
+    def __init__(self, data, body, gzip_body, br_body, etag, mtime):
+        self.data = data
+        self.body = body
+        self.gzip_body = gzip_body
+        self.br_body = br_body
+        self.etag = etag
+        self.mtime = mtime
+
+    def encoded(self, accept_encodings):
+        """
+        Picks the best pre-compressed body for the client's Accept-Encoding.
+        Returns (body_bytes, content_encoding or None, etag). Each encoding is its own
+        representation with its own strong ETag ("<hash>-gzip", "<hash>-br", "<hash>").
+        """
+        if self.br_body is not None and accept_encodings['br']:
+            return self.br_body, 'br', f"{self.etag}-br"
+        if accept_encodings['gzip']:
+            return self.gzip_body, 'gzip', f"{self.etag}-gzip"
+        return self.body, None, self.etag
+
+
+class CourseSnapshot(ReloadingFile):
+    """
+    Loads courses_final.json once, serializes it once into raw/gzip/brotli bytes
+    and reloads automatically when the file's mtime changes (see ReloadingFile).
+    Listeners receive the data with `courses` as a CourseStore.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        super().__init__(path, check_interval)
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Registers callback(data) to be called after every (re)load."""
+        self._listeners.append(callback)
+        if self._value is not None:
+            callback(self._value.data)
+
+    def current(self) -> Optional[SnapshotPayload]:
+        """Returns the current payload, reloading first if the file changed. None if missing."""
+        return self._current()
+
+    def _load_failed(self, error):
+        # 檔案寫入到一半時可能解析失敗，保留舊快照，檔案再次改變時重新載入
+        logger.exception(f"Failed to load course data from {self.path}")
+
+    def _load(self, mtime) -> SnapshotPayload:
+        started = time.perf_counter()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        br_body = brotli.compress(body, quality=11) if brotli is not None else None
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # 序列化完成後，常駐的課程資料改存成緊湊的欄位式結構
+        data = dict(data, courses=CourseStore(data.get('courses', [])))
+        logger.info(
+            f"[SNAPSHOT] Loaded {self.path}: {len(body)} bytes raw, {len(gzip_body)} gzip"
+            f"{f', {len(br_body)} br' if br_body is not None else ''} "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        payload = SnapshotPayload(data, body, gzip_body, br_body, etag, mtime)
+        for callback in self._listeners:
+            callback(payload.data)
+        return payload
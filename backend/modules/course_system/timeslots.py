@@ -0,0 +1,70 @@
+# timeslots.py - 上課時段的整數位元遮罩表示 (7 天 x 16 節)
+from typing import Dict, Iterable, List, Union
+
+from .course_table import DAYS
+
+# 與前端課表相同的節次順序 (A/B/C/D 為中午與傍晚的節次)
+PERIODS = ['A', '1', '2', '3', '4', 'B', '5', '6', '7', '8', 'C', '9', '10', '11', '12', 'D']
+
+_DAY_INDEX = {day: i for i, day in enumerate(DAYS)}
+_PERIOD_INDEX = {period: i for i, period in enumerate(PERIODS)}
+SLOT_COUNT = len(DAYS) * len(PERIODS)
+DAY_MASK = (1 << len(PERIODS)) - 1
+ALL_SLOTS = (1 << SLOT_COUNT) - 1
+
+
+def slot_bit(day: str, period: str) -> int:
+    """Bit of one (day, period) slot. Raises KeyError for an unknown day or period."""
+    return 1 << (_DAY_INDEX[day] * len(PERIODS) + _PERIOD_INDEX[period])
+
+
+def compile_time(time: Dict[str, List[str]]) -> int:
+    """
+    Compiles a course's `time` dict (day -> period strings) into a bitmask.
+    Unknown days or periods are ignored, so two courses conflict iff `a & b` is non-zero.
+    """
+    mask = 0
+    for day, periods in (time or {}).items():
+        day_index = _DAY_INDEX.get(day)
+        if day_index is None:
+            continue
+        base = day_index * len(PERIODS)
+        for period in periods:
+            period_index = _PERIOD_INDEX.get(str(period).strip())
+            if period_index is not None:
+                mask |= 1 << (base + period_index)
+    return mask
+
+
+def mask_to_time(mask: int) -> Dict[str, List[str]]:
+    """Inverse of compile_time: {day: [periods in timetable order]} for every day."""
+    time = {}
+    for d, day in enumerate(DAYS):
+        day_bits = mask >> (d * len(PERIODS)) & DAY_MASK
+        time[day] = [period for p, period in enumerate(PERIODS) if day_bits >> p & 1] if day_bits else []
+    return time
+
+
+def parse_slots(slots: Iterable[Union[str, Dict]]) -> int:
+    """
+    Builds a mask from slots given as "Mon-1" strings (the frontend's timetable keys),
+    {"day": "Mon", "period": "1"} objects, or a bare day name ("Sat") for the whole day.
+    Raises ValueError on anything else.
+    """
+    mask = 0
+    for slot in slots:
+        if isinstance(slot, dict):
+            day, period = slot.get('day'), slot.get('period')
+        elif isinstance(slot, str):
+            day, _, period = slot.partition('-')
+        else:
+            raise ValueError(f"Invalid slot: {slot!r}")
+        if day not in _DAY_INDEX:
+            raise ValueError(f"Invalid day in slot: {slot!r}")
+        if not period:
+            mask |= DAY_MASK << (_DAY_INDEX[day] * len(PERIODS))
+        elif str(period) in _PERIOD_INDEX:
+            mask |= slot_bit(day, str(period))
+        else:
+            raise ValueError(f"Invalid period in slot: {slot!r}")
+    return mask
@@ -0,0 +1,210 @@
+# watcher.py - 背景名額監看：依關注人數與剩餘名額排程，主動更新課程快取
+import math
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GroupKey = Tuple[str, str, str]  # (year, semester, sclass)
+
+
+class _WatchGroup:
+    """Watched courses of one Sclass page; a single fetch refreshes all of them."""
+
+    __slots__ = ('leases', 'remaining', 'due', 'polling', 'failures', 'last_poll')
+
+    def __init__(self):
+        self.leases: Dict[str, Dict[str, float]] = {}  # cono -> {client: lease expires_at}
+        self.remaining: Dict[str, int] = {}  # cono -> last seen remaining seats
+        self.due: Optional[float] = None
+        self.polling = False
+        self.failures = 0
+        self.last_poll: Optional[float] = None
+
+    def clients(self) -> int:
+        return len({client for clients in self.leases.values() for client in clients})
+
+    def expire(self, now: float) -> int:
+        removed = 0
+        for cono in list(self.leases):
+            clients = self.leases[cono]
+            for client in [c for c, expires_at in clients.items() if expires_at <= now]:
+                del clients[client]
+                removed += 1
+            if not clients:
+                del self.leases[cono]
+                self.remaining.pop(cono, None)
+        return removed
+
+
+def _parse_remaining(update) -> Optional[int]:
+    try:
+        return int(str(update.get('remaining', '')).strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+class SeatWatcher:
+    """
+    Server-side watch list with a priority-queue poll scheduler.
+
+    Watched courses are grouped by Sclass so one upstream fetch refreshes every
+    course on the page. A group is polled sooner the more clients watch it and
+    the closer its remaining seats are to zero; failed polls back off
+    exponentially. Watches are leases that lapse unless renewed, and at most
+    `max_polls_per_minute` fetches are started per minute.
+
+    `fetch(year, semester, sclass)` must fetch the page and store it in the cache;
+    it returns {cono: update} or None on failure.
+    """
+
+    def __init__(self, fetch: Callable[[str, str, str], Optional[Dict[str, Dict]]], executor,
+                 min_interval: float = 15, max_interval: float = 300, lease: float = 600,
+                 scarce_seats: int = 10, max_polls_per_minute: int = 30):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.lease = lease
+        self.scarce_seats = scarce_seats
+        self.max_polls_per_minute = max_polls_per_minute
+        self._fetch = fetch
+        self._executor = executor
+        self._groups: Dict[GroupKey, _WatchGroup] = {}
+        self._heap = []  # (due, group key); entries whose due no longer matches the group are skipped
+        self._recent_polls = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {'polls': 0, 'poll_errors': 0, 'deferred': 0, 'expired_leases': 0}
+
+    def watch(self, year: str, semester: str, sclass: str, cono: str, client: str) -> float:
+        """Adds or renews a client's lease on a course. Returns the lease length in seconds."""
+        key = (year, semester, sclass)
+        now = time.monotonic()
+        with self._cond:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _WatchGroup()
+            group.leases.setdefault(cono, {})[client] = now + self.lease
+            if not group.polling:
+                # 新的群組立即抓取；多一位關注者可能讓下次抓取提前
+                due = now if group.last_poll is None else group.last_poll + self._interval(group)
+                if group.due is None or due < group.due:
+                    self._schedule(key, group, due)
+            self._cond.notify()
+        self._ensure_thread()
+        return self.lease
+
+    def unwatch(self, year: str, semester: str, sclass: str, cono: str, client: str):
+        key = (year, semester, sclass)
+        with self._cond:
+            group = self._groups.get(key)
+            if group is None:
+                return
+            clients = group.leases.get(cono)
+            if clients is not None:
+                clients.pop(client, None)
+                if not clients:
+                    del group.leases[cono]
+                    group.remaining.pop(cono, None)
+            if not group.leases and not group.polling:
+                del self._groups[key]
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        with self._cond:
+            groups = list(self._groups.values())
+            next_due = min((g.due for g in groups if g.due is not None and not g.polling), default=None)
+            return dict(self._stats,
+                        groups=len(groups),
+                        courses=sum(len(g.leases) for g in groups),
+                        leases=sum(len(c) for g in groups for c in g.leases.values()),
+                        polling=sum(1 for g in groups if g.polling),
+                        next_poll_in=None if next_due is None else round(max(0.0, next_due - now), 1))
+
+    def _interval(self, group: _WatchGroup) -> float:
+        """Seconds until the next poll: shorter with more watchers and fewer remaining seats."""
+        seats = [r for r in group.remaining.values() if r is not None]
+        scarcity = 1.0 if not seats else min(1.0, max(0, min(seats)) / self.scarce_seats)
+        popularity = 1 + math.log2(max(1, group.clients()))
+        interval = self.max_interval * (0.1 + 0.9 * scarcity) / popularity
+        interval *= 2 ** min(group.failures, 5)
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        return interval * random.uniform(0.9, 1.1)
+
+    def _schedule(self, key: GroupKey, group: _WatchGroup, due: float):
+        group.due = due
+        heapq.heappush(self._heap, (due, key))
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='seat-watch', daemon=True)
+                self._thread.start()
+
+    def _next_due_group(self) -> GroupKey:
+        """Blocks until a group is due and allowed to poll, then marks it as polling."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    due, key = heapq.heappop(self._heap)
+                    group = self._groups.get(key)
+                    if group is None or group.polling or group.due != due:
+                        continue
+                    self._stats['expired_leases'] += group.expire(now)
+                    if not group.leases:
+                        del self._groups[key]
+                        continue
+                    while self._recent_polls and self._recent_polls[0] <= now - 60:
+                        self._recent_polls.popleft()
+                    if len(self._recent_polls) >= self.max_polls_per_minute:
+                        # 超過每分鐘抓取上限，延到最早一次抓取滿一分鐘後
+                        self._stats['deferred'] += 1
+                        self._schedule(key, group, self._recent_polls[0] + 60)
+                        continue
+                    self._recent_polls.append(now)
+                    group.polling = True
+                    group.due = None
+                    return key
+                timeout = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(timeout)
+
+    def _run(self):
+        while True:
+            key = self._next_due_group()
+            try:
+                self._executor.submit(self._poll, key)
+            except RuntimeError:
+                logger.warning("[SEAT WATCH] Executor shut down, stopping scheduler")
+                return
+
+    def _poll(self, key: GroupKey):
+        try:
+            updates = self._fetch(*key)
+        except Exception:
+            logger.exception(f"[SEAT WATCH] Poll of Sclass {':'.join(key)} failed")
+            updates = None
+        now = time.monotonic()
+        with self._cond:
+            self._stats['polls'] += 1
+            group = self._groups.get(key)
+            if group is None:
+                return
+            group.polling = False
+            group.last_poll = now
+            if updates is None:
+                group.failures += 1
+                self._stats['poll_errors'] += 1
+            else:
+                group.failures = 0
+                for cono in group.leases:
+                    group.remaining[cono] = _parse_remaining(updates.get(cono))
+            if not group.leases:
+                del self._groups[key]
+                return
+            self._schedule(key, group, now + self._interval(group))
+            self._cond.notify()
@@ -0,0 +1,207 @@
+# batch.py
+
+"""
+批次學分分析：讀取一個目錄中另存的 ScoreQuery.asp 成績頁面，
+以多個行程平行執行 parse_grades_html → 學分分類 → 缺額計算，結果逐筆寫成 JSONL 或 CSV。
+
+用法 (在 backend 目錄下執行):
+    python -m modules.credit_system.batch transcripts/ -o report.jsonl
+    python -m modules.credit_system.batch transcripts/ -o report.csv --workers 8 --requirements data/score.json
+"""
+
+import os
+import sys
+import csv
+import json
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .parser import parse_grades_html
+from .calculator import analyze_grades
+from .credit_deficit_calculator import use_requirements_file
+
+DEFICIT_CATEGORIES = ['系必修', '領域選修', '校定必修', '通識選修']
+CSV_FIELDS = (['檔案', '狀態', '科系']
+              + [f'{category}_{key}' for category in DEFICIT_CATEGORIES for key in ('需要', '已修', '缺額')]
+              + ['總需求學分', '目前總學分', '總缺額', '畢業狀態', '訊息'])
+
+
+def find_transcripts(directory, pattern='*.htm*', recursive=False):
+    """列出目錄中符合檔名樣式的成績頁面 (依路徑排序)"""
+    if recursive:
+        pattern = os.path.join('**', pattern)
+    return sorted(path for path in glob.glob(os.path.join(directory, pattern), recursive=recursive)
+                  if os.path.isfile(path))
+
+
+def analyze_file(path, department_name=None):
+    """
+    分析一個成績頁面檔案；任何錯誤都只影響這個檔案
+
+    Returns:
+        dict: {"file", "status": "success", "department", "data"} 或 {"file", "status": "error", "message"}
+    """
+    try:
+        # 以位元組讀入，由 parser._parse_document 依頁面的 charset (如 Big5) 以 lxml 解碼
+        with open(path, 'rb') as f:
+            grades_data = parse_grades_html(f.read())
+        if not grades_data:
+            return {"file": path, "status": "error", "message": "找不到任何學期的成績資料"}
+        results = analyze_grades(grades_data, department_name)
+        return {"file": path, "status": "success",
+                "department": results['deficit_analysis'].get('department'), "data": results}
+    except Exception as e:
+        return {"file": path, "status": "error", "message": f"{type(e).__name__}: {e}"}
+
+
+def _init_worker(requirements_path):
+    if requirements_path:
+        use_requirements_file(requirements_path)
+
+
+def run_batch(paths, workers=None, department_name=None, requirements_path=None):
+    """
+    平行分析多個檔案，依完成順序逐筆產生 analyze_file 的結果
+
+    Args:
+        paths: 成績頁面檔案路徑
+        workers: 行程數 (預設為 CPU 核心數；1 表示在目前行程中依序執行)
+        department_name: 指定科系 (None 表示每個檔案各自推測)
+        requirements_path: 指定 score.json 路徑 (None 表示 data/score.json)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(requirements_path)
+        for path in paths:
+            yield analyze_file(path, department_name)
+        return
+
+    pending_paths = list(reversed(paths))
+    max_in_flight = workers * 4  # 只預先送出少量工作，結果可以邊算邊寫出
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(requirements_path,))
+    in_flight = {}
+    try:
+        while pending_paths or in_flight:
+            while pending_paths and len(in_flight) < max_in_flight:
+                path = pending_paths.pop()
+                in_flight[executor.submit(analyze_file, path, department_name)] = path
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    yield {"file": path, "status": "error", "message": "分析此檔案的工作行程異常結束"}
+                except Exception as e:
+                    yield {"file": path, "status": "error", "message": f"{type(e).__name__}: {e}"}
+            if broken:
+                # 行程池已無法使用：同批仍在執行的檔案標記為錯誤，其餘檔案改用新的行程池
+                for future, path in in_flight.items():
+                    yield {"file": path, "status": "error", "message": "分析此檔案的工作行程異常結束"}
+                in_flight = {}
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                               initargs=(requirements_path,))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def to_csv_row(record):
+    """把一筆分析結果攤平成 CSV_FIELDS 的欄位"""
+    row = {'檔案': record['file'], '狀態': record['status'], '訊息': record.get('message', '')}
+    if record['status'] != 'success':
+        return row
+    deficit = record['data']['deficit_analysis']
+    row['科系'] = deficit.get('department') or ''
+    if deficit.get('status') != 'success':
+        row['訊息'] = deficit.get('message', '')
+        return row
+    for category in DEFICIT_CATEGORIES:
+        details = deficit['deficit_details'].get(category, {})
+        for key in ('需要', '已修', '缺額'):
+            row[f'{category}_{key}'] = details.get(key, '')
+    summary = deficit['total_summary']
+    row.update({'總需求學分': summary['總需求學分'], '目前總學分': summary['目前總學分'],
+                '總缺額': summary['總缺額'], '畢業狀態': summary['畢業狀態']})
+    return row
+
+
+class _Progress:
+    """在 stderr 顯示進度 (最多每 0.2 秒更新一次)"""
+
+    def __init__(self, total, stream=None):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.done = self.errors = 0
+        self.started = self._shown = time.monotonic()
+
+    def update(self, record):
+        self.done += 1
+        if record['status'] != 'success':
+            self.errors += 1
+        now = time.monotonic()
+        if now - self._shown >= 0.2 or self.done == self.total:
+            self._shown = now
+            rate = self.done / max(now - self.started, 1e-9)
+            self.stream.write(f"\r已完成 {self.done}/{self.total} (失敗 {self.errors}) {rate:.1f} 檔/秒")
+            self.stream.flush()
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        self.stream.write(f"\n共 {self.done} 個檔案，失敗 {self.errors} 個，耗時 {elapsed:.1f} 秒\n")
+
+
+def write_report(records, output, output_format, progress=None):
+    """把分析結果逐筆寫入 output (檔案物件)，每筆寫完立即 flush"""
+    writer = None
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+    for record in records:
+        if writer:
+            writer.writerow(to_csv_row(record))
+        else:
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        output.flush()
+        if progress:
+            progress.update(record)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch credit analysis of saved ScoreQuery.asp pages")
+    parser.add_argument('directory', help="directory containing the saved transcript HTML files")
+    parser.add_argument('-o', '--output', default='-', help="output file (.jsonl or .csv); '-' for stdout")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help="output format (default: from the output file extension, otherwise jsonl)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument('--department', help="department name or prefix for every file (default: inferred per file)")
+    parser.add_argument('--requirements', help="path to score.json (default: data/score.json)")
+    parser.add_argument('--pattern', default='*.htm*', help="file name pattern (default: *.htm*)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="also search subdirectories")
+    args = parser.parse_args(argv)
+
+    paths = find_transcripts(args.directory, args.pattern, args.recursive)
+    if not paths:
+        print(f"在 {args.directory} 找不到符合 {args.pattern} 的檔案", file=sys.stderr)
+        return 1
+    output_format = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+    progress = _Progress(len(paths))
+    records = run_batch(paths, args.workers, args.department, args.requirements)
+    if args.output == '-':
+        write_report(records, sys.stdout, output_format, progress)
+    else:
+        # utf-8-sig 讓 Excel 能正確顯示 CSV 中的中文
+        encoding = 'utf-8-sig' if output_format == 'csv' else 'utf-8'
+        with open(args.output, 'w', encoding=encoding, newline='') as f:
+            write_report(records, f, output_format, progress)
+    progress.finish()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,76 @@
 # calculator.py
 
-from .config import CC_SUBCATEGORY_MAPPING, GENERAL_SUBCATEGORY_MAPPING, COURSE_CODE_MAPPING
-from .credit_deficit_calculator import calculate_credit_deficit
+from .config import CC_SUBCATEGORY_MAPPING, GENERAL_SUBCATEGORY_MAPPING, COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from .classifier import get_classifier
+from .credit_deficit_calculator import calculate_credit_deficit, get_department_from_course_prefix
 
-def categorize_and_calculate_credits(all_semesters_data, mapping):
+def place_semester_courses(courses, classifier):
+    """
+    計算一個學期中每門課的歸類位置與應計入的學分 (不修改任何分類資料)
+
+    Args:
+        courses: 該學期的課程列表
+        classifier: get_classifier 編譯的分類器
+
+    Returns:
+        tuple: (課程索引, 放入位置, 計入的學分或 None) 的 tuple，
+        位置是分類鍵字串或 (核心通識/博雅通識, 子分類, 必修/選修)
+    """
+    placements = []
+    for index, course in enumerate(courses):
+        course_id = course.get('id', '')
+        course_type = course.get('type', '').strip()
+        course_class = classifier.classify(course_id)
+        matched_category = course_class.category or '其他 (無法辨識)'
+        course_type_key = '必修' if course_type == '必修' else '選修'
+
+        if matched_category == '核心通識' and course_id.startswith('CC'):
+            # 核心通識依子分類放入階層結構 (無法辨識的子分類放入「其他」)
+            target = ('核心通識', course_class.cc_subcategory or '其他', course_type_key)
+        elif matched_category == '博雅通識' and course_class.general_subcategory:
+            # 博雅通識依課程代碼前綴決定子分類
+            target = ('博雅通識', course_class.general_subcategory, course_type_key)
+        elif matched_category in ('核心通識', '博雅通識'):
+            # 無法放入通識階層結構的課程 (沒有子分類的博雅通識、不以 CC 開頭的核心通識)
+            target = f"其他 (無法辨識) - {course_type_key}"
+        else:
+            target = f"{matched_category} - {course_type_key}"
+
+        credits = None
+        try:
+            if '棄選' not in course.get('remark', ''):
+                final_score = float(course.get('final_score', '0'))
+                if final_score >= 60:
+                    credits = float(course.get('credits', '0'))
+        except (ValueError, TypeError):
+            credits = None
+        placements.append((index, target, credits))
+    return tuple(placements)
+
+def apply_placements(categorized_data, courses, placements):
+    """依 place_semester_courses 的結果把課程與學分放入分類資料"""
+    for index, target, credits in placements:
+        if isinstance(target, tuple):
+            group, subcat, course_type_key = target
+            categorized_data[group]['subcategories'][subcat][course_type_key]['courses'].append(courses[index])
+            if credits is not None:
+                categorized_data[group]['subcategories'][subcat][course_type_key]['earned_credits'] += credits
+                categorized_data[group]['earned_credits'] += credits
+                categorized_data[group]['total_credits'][course_type_key] += credits
+        else:
+            categorized_data[target]['courses'].append(courses[index])
+            if credits is not None:
+                categorized_data[target]['earned_credits'] += credits
+
+def categorize_and_calculate_credits(all_semesters_data, mapping, cache=None):
+    """
+    依課程代碼對應表分類所有學期的課程並計算各分類已得學分
+
+    Args:
+        all_semesters_data: parse_grades_html 解析出的所有學期課程資料
+        mapping: 課程代碼對應表
+        cache: TranscriptCache，由它解析出且內容未變的學期沿用上次的歸類結果 (結果與完整重算相同)
+    """
     categorized_data = {}
     processed_categories = set()
     for category in mapping.values():
@@ -57,91 +124,17 @@ def categorize_and_calculate_credits(all_semesters_data, mapping):
     categorized_data['其他 (無法辨識) - 必修'] = {'courses': [], 'earned_credits': 0.0}
     categorized_data['其他 (無法辨識) - 選修'] = {'courses': [], 'earned_credits': 0.0}
     
-    sorted_prefixes = sorted(mapping.keys(), key=len, reverse=True)
-
-    all_courses = [course for semester in all_semesters_data for course in semester['courses']]
+    # 對應表編譯成前綴字典樹，一次查出分類、子分類與科系
+    classifier = get_classifier(mapping, DEPARTMENT_PREFIX_MAPPING)
 
-    for course in all_courses:
-        course_id = course.get('id', '')
-        course_type = course.get('type', '').strip()
-        matched_category = None
-
-        for prefix in sorted_prefixes:
-            if course_id.startswith(prefix):
-                matched_category = mapping[prefix]
-                break
-        
-        if not matched_category:
-            matched_category = '其他 (無法辨識)'
-        
-        # 特殊處理核心通識課程
-        if matched_category == '核心通識' and course_id.startswith('CC'):
-            # 檢查是否有子分類
-            subcategory_found = False
-            target_subcat = '其他'
-            
-            for subcode, subname in CC_SUBCATEGORY_MAPPING.items():
-                if len(course_id) > 2 and course_id[2:2+len(subcode)] == subcode:
-                    target_subcat = subname
-                    subcategory_found = True
-                    break
-            
-            # 決定課程類型
-            course_type_key = '必修' if course_type == '必修' else '選修'
-            
-            # 將課程添加到對應的子分類中
-            categorized_data['核心通識']['subcategories'][target_subcat][course_type_key]['courses'].append(course)
-            
-        # 特殊處理博雅通識課程
-        elif matched_category == '博雅通識':
-            # 根據課程代碼前綴確定子分類
-            target_subcat = None
-            for prefix, subname in GENERAL_SUBCATEGORY_MAPPING.items():
-                if course_id.startswith(prefix):
-                    target_subcat = subname
-                    break
-            
-            if target_subcat:
-                # 決定課程類型
-                course_type_key = '必修' if course_type == '必修' else '選修'
-                
-                # 將課程添加到對應的子分類中
-                categorized_data['博雅通識']['subcategories'][target_subcat][course_type_key]['courses'].append(course)
-            
+    # 逐學期取得各課程的歸類結果 (有快取時只重算內容變動的學期)，再依原本順序放入分類
+    for semester in all_semesters_data:
+        courses = semester['courses']
+        if cache is None:
+            placements = place_semester_courses(courses, classifier)
         else:
-            # 非核心通識課程的一般處理
-            if course_type == '必修':
-                category_key = f"{matched_category} - 必修"
-            elif course_type == '選修':
-                category_key = f"{matched_category} - 選修"
-            else:
-                category_key = f"{matched_category} - 選修"
-            
-            categorized_data[category_key]['courses'].append(course)
-
-        try:
-            if '棄選' in course.get('remark', ''):
-                continue
-                
-            final_score = float(course.get('final_score', '0'))
-            credits = float(course.get('credits', '0'))
-
-            if final_score >= 60:
-                if matched_category == '核心通識' and course_id.startswith('CC'):
-                    # 核心通識課程學分計算
-                    categorized_data['核心通識']['subcategories'][target_subcat][course_type_key]['earned_credits'] += credits
-                    categorized_data['核心通識']['earned_credits'] += credits
-                    categorized_data['核心通識']['total_credits'][course_type_key] += credits
-                elif matched_category == '博雅通識' and target_subcat:
-                    # 博雅通識課程學分計算
-                    categorized_data['博雅通識']['subcategories'][target_subcat][course_type_key]['earned_credits'] += credits
-                    categorized_data['博雅通識']['earned_credits'] += credits
-                    categorized_data['博雅通識']['total_credits'][course_type_key] += credits
-                else:
-                    # 其他課程學分計算
-                    categorized_data[category_key]['earned_credits'] += credits
-        except (ValueError, TypeError):
-            continue
+            placements = cache.placements(courses, classifier, semester)
+        apply_placements(categorized_data, courses, placements)
             
     # 過濾掉沒有課程的分類
     final_data = {}
@@ -206,7 +199,7 @@ def calculate_deficit_with_department(all_semesters_data, department_name, mappi
     
     Args:
         all_semesters_data: 所有學期的課程資料
-        department_name: 科系名稱
+        department_name: 科系名稱或科系代碼前綴 (學分要求由快取查詢)
         mapping: 課程代碼對應表
     
     Returns:
@@ -228,4 +221,41 @@ def calculate_deficit_with_department(all_semesters_data, department_name, mappi
         'deficit_analysis': deficit_info
     }
     
-    return result
\ No newline at end of file
+    return result
+
+def analyze_grades(all_semesters_data, department_name=None, mapping=COURSE_CODE_MAPPING, cache=None):
+    """
+    分析一份成績資料：未指定科系時依課程代碼推測科系，再計算學分缺額
+
+    Args:
+        all_semesters_data: parse_grades_html 解析出的所有學期課程資料
+        department_name: 科系名稱或前綴，None 表示自動推測
+        mapping: 課程代碼對應表
+        cache: TranscriptCache，只重算內容有變動的學期 (可省略)
+
+    Returns:
+        dict: 與 calculate_deficit_with_department 相同的結構；無法推測科系時 deficit_analysis 為 unknown_department
+    """
+    categorized_data = categorize_and_calculate_credits(all_semesters_data, mapping, cache)
+    if department_name is None:
+        department_name = get_department_from_course_prefix(categorized_data)
+
+    if not department_name:
+        return {
+            'categorized_credits': categorized_data,
+            'current_credits_summary': {},
+            'deficit_analysis': {
+                'status': 'unknown_department',
+                'message': '無法推測學生科系，請手動指定',
+                'department': '未知',
+                'deficit_details': {}
+            }
+        }
+
+    # 分類結果只算一次，直接用來計算缺額
+    current_credits = extract_current_credits_from_categorized_data(categorized_data)
+    return {
+        'categorized_credits': categorized_data,
+        'current_credits_summary': current_credits,
+        'deficit_analysis': calculate_credit_deficit(department_name, current_credits)
+    }
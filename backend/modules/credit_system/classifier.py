@@ -0,0 +1,90 @@
+# classifier.py
+
+from collections import namedtuple
+from functools import lru_cache
+
+from .config import CC_SUBCATEGORY_MAPPING, GENERAL_SUBCATEGORY_MAPPING
+
+# 單次查詢的結果：分類、核心通識子分類、博雅通識子分類、可能的科系 (依對應表順序)
+CourseClass = namedtuple('CourseClass', ['category', 'cc_subcategory', 'general_subcategory', 'departments'])
+
+# 各種前綴在字典樹節點上的標記
+_CATEGORY, _CC_SUB, _GENERAL_SUB, _DEPARTMENT = range(4)
+_END = None  # 節點上存放比對結果的鍵 (不會與字元衝突)
+
+
+class CourseClassifier:
+    """
+    把課程代碼對應表編譯成單一的前綴字典樹，一次走訪即可得到
+    分類 (最長前綴)、核心通識 / 博雅通識子分類 (依對應表順序的第一個符合者)
+    與科系 (不分大小寫，所有符合的前綴)。
+    結果與原本逐一掃描各對應表的作法相同。
+    """
+
+    def __init__(self, mapping, cc_mapping=CC_SUBCATEGORY_MAPPING,
+                 general_mapping=GENERAL_SUBCATEGORY_MAPPING, department_mapping=None):
+        self._root = {}
+        for order, (prefix, category) in enumerate(mapping.items()):
+            self._add(prefix, _CATEGORY, order, category, fold_case=False)
+        # 核心通識子分類：課號以 CC 開頭且第 3 碼起為子分類代碼
+        for order, (subcode, name) in enumerate(cc_mapping.items()):
+            self._add('CC' + subcode, _CC_SUB, order, name, fold_case=False)
+        for order, (prefix, name) in enumerate(general_mapping.items()):
+            self._add(prefix, _GENERAL_SUB, order, name, fold_case=False)
+        for order, (prefix, department) in enumerate((department_mapping or {}).items()):
+            self._add(prefix, _DEPARTMENT, order, department, fold_case=True)
+        self.classify = lru_cache(maxsize=8192)(self._classify)
+
+    def _add(self, prefix, kind, order, value, fold_case):
+        node = self._root
+        for ch in prefix.lower():
+            node = node.setdefault(ch, {})
+        # 字典樹以小寫建立；區分大小寫的前綴在比對時另外核對原字串
+        node.setdefault(_END, []).append((kind, order, prefix, value, fold_case))
+
+    def _classify(self, course_id):
+        category = None
+        cc_subcategory = cc_order = None
+        general_subcategory = general_order = None
+        departments = []
+        node = self._root
+        lowered = course_id.lower()
+        for depth in range(len(lowered) + 1):
+            entries = node.get(_END)
+            if entries:
+                for kind, order, prefix, value, fold_case in entries:
+                    if not fold_case and not course_id.startswith(prefix):
+                        continue
+                    if kind == _CATEGORY:
+                        category = value  # 越深越長，最後留下的就是最長前綴
+                    elif kind == _CC_SUB:
+                        if cc_order is None or order < cc_order:
+                            cc_subcategory, cc_order = value, order
+                    elif kind == _GENERAL_SUB:
+                        if general_order is None or order < general_order:
+                            general_subcategory, general_order = value, order
+                    else:
+                        departments.append((order, value))
+            if depth == len(lowered):
+                break
+            node = node.get(lowered[depth])
+            if node is None:
+                break
+        departments.sort()
+        return CourseClass(category, cc_subcategory, general_subcategory, tuple(d for _, d in departments))
+
+
+@lru_cache(maxsize=16)
+def _compile(mapping_items, department_items):
+    return CourseClassifier(dict(mapping_items), department_mapping=dict(department_items))
+
+
+def get_classifier(mapping, department_mapping=None):
+    """
+    取得對應表編譯後的分類器 (相同內容的對應表只編譯一次)
+
+    Args:
+        mapping: 課程代碼對應表 (如 COURSE_CODE_MAPPING)
+        department_mapping: 科系代碼前綴對應表 (如 DEPARTMENT_PREFIX_MAPPING)
+    """
+    return _compile(tuple(mapping.items()), tuple((department_mapping or {}).items()))
@@ -29,4 +29,30 @@ GENERAL_SUBCATEGORY_MAPPING = {
     'LI': '人文科學類',
     'SO': '社會科學類',
     'SC': '自然科學類'
-}
\ No newline at end of file
+}
+
+# 科系代碼前綴對應表
+DEPARTMENT_PREFIX_MAPPING = {
+    'cs': '資訊工程學系',
+    'ee': '電機工程學系',
+    'am': '應用數學系',
+    'ac': '應用化學系',
+    'ap': '應用物理學系',
+    'ce': '土木與環境工程學系',
+    'cm': '化學工程及材料工程學系',
+    'ls': '生命科學系',
+    'ae': '應用經濟學系',
+    'fi': '財務金融學系',
+    'im': '資訊管理學系',
+    'ab': '亞太工商管理學系',
+    'la': '法律學系',
+    'gl': '政治法律學系',
+    'fl': '財經法律學系',
+    'wl': '西洋語文學系',
+    'el': '東亞語文學系',
+    'kh': '運動健康與休閒學系',
+    'dap': '運動競技學系',
+    'da': '建築學系',
+    'ccd': '工藝與創意設計學系',
+    'cda': '創意設計與建築學系'
+}
@@ -1,8 +1,12 @@
 # credit_deficit_calculator.py
 
-import json
 import os
 import sys
+import threading
+
+from .classifier import get_classifier
+from .config import COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from .requirements import RequirementsRegistry
 
 def get_resource_path(relative_path):
     """獲取資源檔案的正確路徑，支援PyInstaller打包後的環境"""
@@ -15,59 +19,30 @@ def get_resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
+_requirements_registry = None
+_requirements_registry_lock = threading.Lock()
+
+def get_requirements_registry():
+    """取得共用的學分要求快取 (第一次使用時建立，score.json 修改後自動重新載入)"""
+    global _requirements_registry
+    if _requirements_registry is None:
+        with _requirements_registry_lock:
+            if _requirements_registry is None:
+                # 使用get_resource_path獲取正確的檔案路徑
+                _requirements_registry = RequirementsRegistry(get_resource_path('data/score.json'))
+    return _requirements_registry
+
+def use_requirements_file(path):
+    """改用指定的 score.json (例如批次分析時由命令列指定)"""
+    global _requirements_registry
+    with _requirements_registry_lock:
+        _requirements_registry = RequirementsRegistry(path)
+
 def load_department_requirements():
     """
-    從 score.json 讀取各科系的學分要求
+    從 score.json 讀取各科系的學分要求 (經由快取，不會每次重新讀檔)
     """
-    try:
-        # 使用get_resource_path獲取正確的檔案路徑
-        score_file_path = get_resource_path('data/score.json')
-        
-        with open(score_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        requirements = {}
-        for dept_info in data:
-            dept_name = dept_info.get('科系', '')
-            if dept_name:
-                requirements[dept_name] = {
-                    '系必修': dept_info.get('系必修', 0),
-                    '領域選修': dept_info.get('領域選修', 0),
-                    '校定必修': dept_info.get('校定必修', 0),
-                    '通識選修': dept_info.get('通識選修', 0),
-                    '總學分': dept_info.get('畢業學分', 0)
-                }
-        
-        return requirements
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"讀取學分要求檔案時發生錯誤: {e}")
-        return {}
-
-# 科系代碼前綴對應表
-DEPARTMENT_PREFIX_MAPPING = {
-    'cs': '資訊工程學系',
-    'ee': '電機工程學系',
-    'am': '應用數學系',
-    'ac': '應用化學系',
-    'ap': '應用物理學系',
-    'ce': '土木與環境工程學系',
-    'cm': '化學工程及材料工程學系',
-    'ls': '生命科學系',
-    'ae': '應用經濟學系',
-    'fi': '財務金融學系',
-    'im': '資訊管理學系',
-    'ab': '亞太工商管理學系',
-    'la': '法律學系',
-    'gl': '政治法律學系',
-    'fl': '財經法律學系',
-    'wl': '西洋語文學系',
-    'el': '東亞語文學系',
-    'kh': '運動健康與休閒學系',
-    'dap': '運動競技學系',
-    'da': '建築學系',
-    'ccd': '工藝與創意設計學系',
-    'cda': '創意設計與建築學系'
-}
+    return get_requirements_registry().all()
 
 def get_department_from_course_prefix(course_data):
     """
@@ -75,6 +50,7 @@ def get_department_from_course_prefix(course_data):
     優先級：系必修課程數量 > 系選修課程數量
     """
     department_scores = {}
+    classifier = get_classifier(COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING)
     
     # 統計各科系的相關課程數量
     for category, data in course_data.items():
@@ -82,17 +58,16 @@ def get_department_from_course_prefix(course_data):
             for course in data['courses']:
                 course_id = course.get('id', '')
                 
-                # 根據課程代碼前綴判斷可能的科系
-                for prefix, dept_name in DEPARTMENT_PREFIX_MAPPING.items():
-                    if course_id.lower().startswith(prefix.lower()):
-                        if dept_name not in department_scores:
-                            department_scores[dept_name] = {'必修': 0, '選修': 0}
-                        
-                        course_type = course.get('type', '選修')
-                        if '必修' in category and course_type == '必修':
-                            department_scores[dept_name]['必修'] += 1
-                        else:
-                            department_scores[dept_name]['選修'] += 1
+                # 根據課程代碼前綴判斷可能的科系 (不分大小寫)
+                for dept_name in classifier.classify(course_id).departments:
+                    if dept_name not in department_scores:
+                        department_scores[dept_name] = {'必修': 0, '選修': 0}
+                    
+                    course_type = course.get('type', '選修')
+                    if '必修' in category and course_type == '必修':
+                        department_scores[dept_name]['必修'] += 1
+                    else:
+                        department_scores[dept_name]['選修'] += 1
     
     # 找出最可能的科系（優先考慮必修課程數量）
     best_dept = None
@@ -112,16 +87,16 @@ def calculate_credit_deficit(department_name, current_credits):
     計算學分缺額
     
     Args:
-        department_name: 科系名稱
+        department_name: 科系名稱 (也可以是科系代碼前綴，如 'cs')
         current_credits: 目前各類別已修學分數
         
     Returns:
         dict: 包含缺額資訊的字典
     """
-    # 載入學分要求
-    requirements_data = load_department_requirements()
+    # 從快取取得學分要求
+    dept_name, requirements = get_requirements_registry().lookup(department_name)
     
-    if department_name not in requirements_data:
+    if requirements is None:
         return {
             'status': 'unknown_department',
             'message': f'未找到科系：{department_name} 的學分要求資料',
@@ -129,7 +104,7 @@ def calculate_credit_deficit(department_name, current_credits):
             'deficit_details': {}
         }
     
-    requirements = requirements_data[department_name]
+    department_name = dept_name
     deficit_details = {}
     total_deficit = 0
     
@@ -0,0 +1,140 @@
+# jobs.py
+
+import time
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 工作狀態：排隊中 → 執行中 → 完成 / 失敗
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(Exception):
+    """排隊中的工作已達上限"""
+
+
+class CreditAnalysisJobs:
+    """
+    學分分析的非同步工作佇列
+
+    每個工作在背景執行緒中執行 run(progress, **params)，最多同時執行 max_running 個
+    (也就是同時開啟的 Chrome 數量)，其餘排隊；HTTP 請求只需送出工作並取得 job id。
+    run 會收到 progress(stage, message) 回報進度，回傳值即為工作結果
+    ({"status": "success" | "error", ...})。完成的工作保留 result_ttl 秒後移除。
+    """
+
+    def __init__(self, run, max_running=2, max_queued=10, result_ttl=600):
+        self.run = run
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='credit-analysis')
+        self._jobs = {}
+        self._queue = []  # 排隊中的 job id (依送出順序)
+        self._cond = threading.Condition()
+
+    def submit(self, **params):
+        """
+        送出一個新工作
+
+        Args:
+            **params: 傳給 run 的參數
+
+        Returns:
+            dict: 工作目前的狀態 (見 get)
+
+        Raises:
+            JobQueueFull: 排隊中的工作已達 max_queued
+        """
+        with self._cond:
+            self._purge_expired()
+            if len(self._queue) >= self.max_queued:
+                raise JobQueueFull()
+            job_id = secrets.token_urlsafe(12)
+            self._jobs[job_id] = {
+                "job_id": job_id, "state": QUEUED, "stage": QUEUED, "message": '排隊等待中...',
+                "created_at": time.time(), "started_at": None, "finished_at": None,
+                "result": None, "version": 0,
+            }
+            self._queue.append(job_id)
+            snapshot = self._snapshot(job_id)
+        self._executor.submit(self._execute, job_id, params)
+        return snapshot
+
+    def get(self, job_id):
+        """回傳工作狀態的副本 (含 queue_position)，不存在或已過期時回傳 None"""
+        with self._cond:
+            self._purge_expired()
+            return self._snapshot(job_id)
+
+    def wait(self, job_id, version, timeout):
+        """
+        等待工作狀態變更 (供 SSE 推送使用)
+
+        Args:
+            job_id: 工作 id
+            version: 呼叫端目前看到的版本；狀態版本不同時立即回傳
+            timeout: 最多等待秒數
+
+        Returns:
+            dict | None: 最新狀態 (可能與原本相同，表示逾時)；工作不存在時回傳 None
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job['version'] != version or job['state'] in FINISHED_STATES:
+                    return self._snapshot(job_id)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._snapshot(job_id)
+                self._cond.wait(remaining)
+
+    def stats(self):
+        with self._cond:
+            self._purge_expired()
+            counts = {state: 0 for state in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+            for job in self._jobs.values():
+                counts[job['state']] += 1
+            return counts
+
+    def _snapshot(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = dict(job)
+        snapshot['queue_position'] = self._queue.index(job_id) + 1 if job['state'] == QUEUED else 0
+        return snapshot
+
+    def _update(self, job_id, **fields):
+        with self._cond:
+            job = self._jobs[job_id]
+            job.update(fields)
+            job['version'] += 1
+            self._cond.notify_all()
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['state'] in FINISHED_STATES and now - job['finished_at'] > self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _execute(self, job_id, params):
+        with self._cond:
+            self._queue.remove(job_id)
+            for queued_id in self._queue:  # 其他排隊工作的順位都往前移
+                self._jobs[queued_id]['version'] += 1
+        self._update(job_id, state=RUNNING, stage='starting', message='正在啟動瀏覽器...', started_at=time.time())
+
+        def progress(stage, message):
+            self._update(job_id, stage=stage, message=message)
+
+        try:
+            result = self.run(progress, **params)
+        except Exception as e:
+            result = {"status": "error", "message": f"發生未知錯誤: {e}"}
+        succeeded = isinstance(result, dict) and result.get('status') == 'success'
+        self._update(job_id, state=SUCCEEDED if succeeded else FAILED,
+                     stage=SUCCEEDED if succeeded else FAILED,
+                     message=(result or {}).get('message', ''), result=result, finished_at=time.time())
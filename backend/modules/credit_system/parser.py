@@ -1,29 +1,95 @@
 # parser.py
 
-from bs4 import BeautifulSoup
+from bs4 import ParserRejectedMarkup
+from bs4.dammit import EncodingDetector
+from lxml import etree
 
+# 每個學期的標題 <font face="標楷體" color="#0000FF"><b>學期名稱</b></font>
+_SEMESTER_TITLES = etree.XPath('//font[@face=$face and @color=$color]')
+# 與 BeautifulSoup 的 get_text 相同：不含註解，也不含 script / style / template 裡的文字
+_VISIBLE_TEXT = etree.XPath('.//text()[not(ancestor::script or ancestor::style or ancestor::template)]',
+                            smart_strings=False)
 
-def parse_grades_html(html_source):
-    soup = BeautifulSoup(html_source, 'lxml')
-    all_semesters_data = []
-    semester_titles = soup.find_all('font', {'face': '標楷體', 'color': '#0000FF'})
-    for title_tag in semester_titles:
-        semester_data = {"semester_name": title_tag.b.get_text(strip=True), "courses": [], "summary": {}}
-        courses_table = title_tag.find_parent('p').find_next_sibling('table')
-        if not courses_table: continue
-        course_rows = courses_table.find_all('tr')[1:]
+
+def _get_text(element, has_template=True):
+    """
+    等同 BeautifulSoup 的 element.get_text(strip=True)
+
+    Args:
+        element: lxml 元素
+        has_template: 文件中有 <template> 時為 True；沒有時，沒有子節點的儲存格直接取 .text
+    """
+    text = element.text
+    if not has_template and len(element) == 0:
+        return text.strip() if text else ''
+    return ''.join(text.strip() for text in _VISIBLE_TEXT(element))
+
+
+def _parse_document(html_source):
+    """
+    以 lxml 的 HTML 解析器建立文件樹，解碼方式與 BeautifulSoup(html_source, 'lxml') 相同：
+    str 直接解析；bytes 依 EncodingDetector 的順序 (BOM、頁面宣告的 charset、utf-8、windows-1252) 逐一嘗試
+
+    Returns:
+        lxml 的根元素；空白文件回傳 None
+    """
+    if isinstance(html_source, str):
+        if html_source[:1] == '\N{BYTE ORDER MARK}':
+            html_source = html_source[1:]
+        candidates = [(html_source, None), (html_source.encode('utf8'), 'utf8')]
+    else:
+        detector = EncodingDetector(html_source, is_html=True)
+        candidates = ((detector.markup, encoding) for encoding in detector.encodings)
+    for markup, encoding in candidates:
+        parser = etree.HTMLParser(recover=True, encoding=encoding)
+        try:
+            parser.feed(markup)
+            return parser.close()
+        except (UnicodeDecodeError, LookupError, etree.ParserError):
+            continue
+        except etree.XMLSyntaxError:
+            return None
+    raise ParserRejectedMarkup("無法解碼成績頁面")
+
+
+def iter_grades_html(html_source):
+    """
+    逐學期解析歷年成績頁面，結果與 parse_grades_html 相同
+
+    Args:
+        html_source: 成績頁面 (str 或 bytes)
+
+    Yields:
+        dict: {"semester_name", "courses", "summary"}
+    """
+    root = _parse_document(html_source)
+    if root is None:
+        return
+    # 沒有子節點的元素只要不在 <template> 裡 (<script>/<style> 內不會有元素)，文字就是它的 .text
+    has_template = root.find('.//template') is not None
+
+    def get_text(element):
+        return _get_text(element, has_template)
+
+    for title_tag in _SEMESTER_TITLES(root, face='標楷體', color='#0000FF'):
+        semester_data = {"semester_name": get_text(title_tag.find('.//b')), "courses": [], "summary": {}}
+        courses_table = next(next(title_tag.iterancestors('p'), None).itersiblings('table'), None)
+        if courses_table is None: continue
+        course_rows = list(courses_table.iterdescendants('tr'))[1:]
         for row in course_rows:
-            cells = row.find_all('td')
+            cells = list(row.iterdescendants('td'))
             if len(cells) == 7:
-                course_info = {"id": cells[0].get_text(strip=True), "name": cells[1].get_text(strip=True), "credits": cells[2].get_text(strip=True), "type": cells[3].get_text(strip=True), "midterm_score": cells[4].get_text(strip=True), "final_score": cells[5].get_text(strip=True), "remark": cells[6].get_text(strip=True)}
+                course_info = {"id": get_text(cells[0]), "name": get_text(cells[1]), "credits": get_text(cells[2]), "type": get_text(cells[3]), "midterm_score": get_text(cells[4]), "final_score": get_text(cells[5]), "remark": get_text(cells[6])}
                 semester_data["courses"].append(course_info)
-        summary_table = courses_table.find_next_sibling('p').find('table')
-        if summary_table:
-            summary_cells = summary_table.find_all('td')
-            for cell in summary_cells:
-                text = cell.get_text(strip=True)
+        summary_table = next(courses_table.itersiblings('p'), None).find('.//table')
+        if summary_table is not None:
+            for cell in summary_table.iterdescendants('td'):
+                text = get_text(cell)
                 if '：' in text:
                     key, value = text.split('：', 1)
                     semester_data["summary"][key] = value
-        all_semesters_data.append(semester_data)
-    return all_semesters_data
\ No newline at end of file
+        yield semester_data
+
+
+def parse_grades_html(html_source):
+    return list(iter_grades_html(html_source))
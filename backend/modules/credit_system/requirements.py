@@ -0,0 +1,111 @@
+# requirements.py
+
+import json
+
+from .config import DEPARTMENT_PREFIX_MAPPING
+from ..reloading import ReloadingFile
+
+# score.json 各欄位與內部使用的學分類別名稱
+REQUIREMENT_FIELDS = {
+    '系必修': '系必修',
+    '領域選修': '領域選修',
+    '校定必修': '校定必修',
+    '通識選修': '通識選修',
+    '總學分': '畢業學分',
+}
+
+
+def _to_number(value):
+    """學分數可能是數字或數字字串；空值視為 0，其他格式回傳 None"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def parse_requirements(data):
+    """
+    驗證 score.json 的內容並轉成 {科系: {類別: 學分}}
+
+    Returns:
+        (requirements, errors): 格式錯誤的科系不會放入 requirements，原因記在 errors
+    """
+    requirements, errors = {}, []
+    if not isinstance(data, list):
+        return requirements, ['score.json 應為科系資料的陣列']
+    for index, dept_info in enumerate(data):
+        if not isinstance(dept_info, dict):
+            errors.append(f'第 {index + 1} 筆不是物件')
+            continue
+        dept_name = dept_info.get('科系', '')
+        if not dept_name:
+            continue
+        entry = {}
+        for key, source in REQUIREMENT_FIELDS.items():
+            number = _to_number(dept_info.get(source, 0))
+            if number is None:
+                errors.append(f'{dept_name} 的「{source}」不是數字: {dept_info.get(source)!r}')
+                break
+            entry[key] = number
+        else:
+            requirements[dept_name] = entry
+    return requirements, errors
+
+
+class RequirementsRegistry(ReloadingFile):
+    """
+    畢業學分要求的記憶體快取：score.json 只在修改時間改變時重新讀取與驗證 (見 ReloadingFile)，
+    並可依科系名稱或 DEPARTMENT_PREFIX_MAPPING 的前綴查詢。可供多執行緒共用。
+    """
+
+    def __init__(self, path, check_interval=1.0, prefix_mapping=DEPARTMENT_PREFIX_MAPPING):
+        super().__init__(path, check_interval)
+        self.prefix_mapping = {prefix.lower(): dept for prefix, dept in prefix_mapping.items()}
+        self.errors = []
+        self._value = {}
+
+    def _load(self, mtime):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            requirements, errors = parse_requirements(json.load(f))
+        for error in errors:
+            print(f"學分要求檔案格式錯誤: {error}")
+        self.errors = errors
+        return requirements
+
+    def _missing(self, error):
+        print(f"讀取學分要求檔案時發生錯誤: {error}")
+        return {}
+
+    def _load_failed(self, error):
+        # 檔案寫入到一半時可能解析失敗，保留舊資料，檔案再次改變時重新讀取
+        print(f"讀取學分要求檔案時發生錯誤: {error}")
+
+    def all(self):
+        """回傳 {科系: 學分要求} (共用的快取資料，請勿修改)"""
+        return self._current()
+
+    def lookup(self, department):
+        """
+        依科系名稱或科系代碼前綴 (不分大小寫，如 'cs') 查詢學分要求
+
+        Returns:
+            (科系名稱, 學分要求)，找不到時為 (None, None)
+        """
+        requirements = self._current()
+        if department in requirements:
+            return department, requirements[department]
+        dept_name = self.prefix_mapping.get(str(department).lower())
+        if dept_name in requirements:
+            return dept_name, requirements[dept_name]
+        return None, None
+
+    def get(self, department):
+        """依科系名稱或前綴查詢學分要求，找不到回傳 None"""
+        return self.lookup(department)[1]
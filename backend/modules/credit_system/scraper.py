@@ -1,69 +1,129 @@
 # scraper.py
 
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
+from bs4 import UnicodeDammit
 from .parser import parse_grades_html
-from .calculator import calculate_deficit_with_department
+from .calculator import analyze_grades
 from .config import COURSE_CODE_MAPPING
-from .credit_deficit_calculator import get_department_from_course_prefix
+from .transcript_cache import TranscriptCache
+
+LOGIN_URL = "https://aca.nuk.edu.tw/Student2/login.asp"
+SUCCESS_URL_KEYWORD = "Menu.asp"
+SCORE_QUERY_URL = "https://aca.nuk.edu.tw/Student2/SO/ScoreQuery.asp"
+HTTP_TIMEOUT = (5, 20)  # (連線, 讀取) 秒
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+# 所有分析共用連線池；cookie 則每次分析各自一個 Session，不會混用
+_http_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+# 重新分析時只重新解析、歸類內容有變動的學期
+transcript_cache = TranscriptCache()
+
+
+def get_chromedriver_path():
+    """
+    取得 chromedriver 路徑：可用環境變數 CHROMEDRIVER_PATH 指定，
+    否則由 ChromeDriverManager 下載 / 檢查一次後，整個行程重複使用
+    """
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                _driver_path = os.getenv('CHROMEDRIVER_PATH') or ChromeDriverManager().install()
+    return _driver_path
+
+
+def session_from_driver(driver):
+    """把瀏覽器登入後的 cookie 與 User-Agent 交給 requests Session，之後的頁面不需再經過瀏覽器"""
+    session = requests.Session()
+    session.mount('https://', _http_adapter)
+    session.mount('http://', _http_adapter)
+    session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent")
+    session.headers['Referer'] = driver.current_url
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie['name'], cookie['value'],
+                            domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+    return session
+
+
+def fetch_grades(session, parse=parse_grades_html):
+    """
+    以已登入的 Session 讀取並解析歷年成績頁面
+
+    Args:
+        session: 已登入的 requests Session
+        parse: 解析函式，預設為 parse_grades_html
 
+    Returns:
+        list | None: 解析結果；未登入 (被導回登入頁) 或沒有任何學期資料時回傳 None
+    """
+    resp = session.get(SCORE_QUERY_URL, timeout=HTTP_TIMEOUT)
+    if not resp.ok or 'login.asp' in resp.url.lower():
+        return None
+    # 依頁面宣告的 charset (Big5) 解碼成字串，與瀏覽器的 page_source 相同
+    return parse(UnicodeDammit(resp.content, is_html=True).unicode_markup) or None
+
+
+def run_selenium_process(progress=None, student=None):
+    """
+    開啟 Chrome 讓使用者登入，抓取歷年成績並分析學分
+
+    Args:
+        progress: 進度回報函式 progress(stage, message)，可省略
+        student: 學生 (瀏覽器) 的識別字串；同一位學生重新分析時只重算有變動的學期
+    """
+    def report(stage, message):
+        print(message)
+        if progress:
+            progress(stage, message)
 
-def run_selenium_process():
-    LOGIN_URL = "https://aca.nuk.edu.tw/Student2/login.asp"
-    SUCCESS_URL_KEYWORD = "Menu.asp"
-    SCORE_QUERY_URL = "https://aca.nuk.edu.tw/Student2/SO/ScoreQuery.asp"
-    
     driver = None
     try:
-        
-        service = Service(ChromeDriverManager().install())
+
+        service = Service(get_chromedriver_path())
         driver = webdriver.Chrome(service=service)
         driver.get(LOGIN_URL)
+        report('waiting_login', '請在開啟的瀏覽器視窗中登入...')
 
         wait = WebDriverWait(driver, 300)
         wait.until(EC.url_contains(SUCCESS_URL_KEYWORD))
-        
-        print("使用者登入成功！")
-        driver.minimize_window()
-        print("瀏覽器視窗已最小化，繼續在背景執行...")
-
-        driver.get(SCORE_QUERY_URL)
-        print(f"背景已跳轉至：{SCORE_QUERY_URL}")
-
-        page_html = driver.page_source
-        
-        grades_data = parse_grades_html(page_html)
-        print("原始成績資料解析完成！")
-        
-        # 先進行初步分類以判斷科系
-        from .calculator import categorize_and_calculate_credits
-        initial_categorized = categorize_and_calculate_credits(grades_data, COURSE_CODE_MAPPING)
-        
-        # 推測學生科系
-        department = get_department_from_course_prefix(initial_categorized)
-        print(f"推測學生科系：{department}")
-        
-        # 使用科系資訊計算學分缺額
-        if department:
-            results = calculate_deficit_with_department(grades_data, department, COURSE_CODE_MAPPING)
-        else:
-            results = {
-                'categorized_credits': initial_categorized,
-                'current_credits_summary': {},
-                'deficit_analysis': {
-                    'status': 'unknown_department',
-                    'message': '無法推測學生科系，請手動指定',
-                    'department': '未知',
-                    'deficit_details': {}
-                }
-            }
-        
+
+        report('logged_in', "使用者登入成功！")
+        report('fetching', "正在讀取歷年成績...")
+
+        # 登入後改用 requests 讀取成績，成功就立刻關閉瀏覽器
+        grades_data = None
+        try:
+            grades_data = fetch_grades(session_from_driver(driver),
+                                       parse=lambda html: transcript_cache.parse(html, student=student))
+        except (requests.RequestException, WebDriverException) as e:
+            print(f"以 HTTP 讀取成績失敗，改用瀏覽器讀取: {e}")
+        if grades_data is None:
+            driver.get(SCORE_QUERY_URL)
+            print(f"背景已跳轉至：{SCORE_QUERY_URL}")
+            grades_data = transcript_cache.parse(driver.page_source, student=student)
+        driver.quit()
+        driver = None
+        print("瀏覽器已關閉。")
+
+        report('analyzing', "原始成績資料解析完成，正在分析學分...")
+
+        # 推測學生科系並計算學分缺額
+        results = analyze_grades(grades_data, mapping=COURSE_CODE_MAPPING, cache=transcript_cache)
+        print(f"推測學生科系：{results['deficit_analysis']['department']}")
+
         print("成績分類與學分統計完成！")
-        
+
         return {"status": "success", "message": "成績獲取與分類成功！", "data": results}
 
     except TimeoutException:
@@ -73,4 +133,4 @@ def run_selenium_process():
     finally:
         if driver:
             driver.quit()
-        print("瀏覽器已關閉，流程結束。")
\ No newline at end of file
+        print("流程結束。")
@@ -0,0 +1,188 @@
+# transcript_cache.py
+
+import re
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .parser import parse_grades_html
+from .calculator import place_semester_courses
+
+# 每個學期的標題 <font face="標楷體" color="#0000FF">；學期區塊從包住標題的 <p> 開始
+_TITLE_FONT = re.compile(r'<font\b[^>]*>', re.IGNORECASE)
+_PARAGRAPH = re.compile(r'<p[\s>]', re.IGNORECASE)
+
+
+def _is_title_font(tag):
+    # 與 parse_grades_html 相同，屬性值需完全相符
+    return (re.search(r'\sface\s*=\s*["\']?標楷體["\'\s>]', tag)
+            and re.search(r'\scolor\s*=\s*["\']?#0000FF["\'\s>]', tag))
+
+
+def split_semester_blocks(html):
+    """
+    把成績頁面切成每個學期一段 (從學期標題所在的 <p> 到下一個學期標題的 <p> 之前)
+
+    Returns:
+        list | None: 各學期的 HTML 片段；找不到學期標題或標題前沒有 <p> 時回傳 None
+    """
+    starts = []
+    for match in _TITLE_FONT.finditer(html):
+        if not _is_title_font(match.group(0)):
+            continue
+        paragraphs = list(_PARAGRAPH.finditer(html, starts[-1] if starts else 0, match.start()))
+        if not paragraphs:
+            return None
+        starts.append(paragraphs[-1].start())
+    if not starts:
+        return None
+    return [html[start:end] for start, end in zip(starts, starts[1:] + [len(html)])]
+
+
+def _copy_semester(semester):
+    """學期資料的副本 (呼叫端修改回傳值不會影響快取)"""
+    return {"semester_name": semester["semester_name"],
+            "courses": [dict(course) for course in semester["courses"]],
+            "summary": dict(semester["summary"])}
+
+
+def _estimate_size(obj):
+    """學期資料或歸類結果大約佔用的記憶體 (bytes)；字典的鍵多為共用字串，不計入"""
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_estimate_size(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_estimate_size(item) for item in obj)
+    return sys.getsizeof(obj)
+
+
+class _Block:
+    __slots__ = ('semester', 'placements', 'size')
+
+    def __init__(self, semester):
+        self.semester = semester
+        self.placements = {}  # id(classifier) -> (classifier, 歸類結果)
+        self.size = _estimate_size(semester)
+
+
+class TranscriptCache:
+    """
+    成績頁面的增量分析快取，以學生 (或瀏覽器工作階段) 為單位：每位學生保存上一次分析的
+    各學期解析結果與學分歸類結果 (place_semester_courses)，以該學期 HTML 片段的 SHA-1 摘要為鍵。
+
+    同一位學生重新分析時，通常只有最新的學期改變；其餘學期不需重新解析與歸類，
+    只有內容變動的學期才重算，再依原本順序合併。結果與完整重新解析、分類相同
+    (無法安全切分或逐段解析結果不一致的頁面會改為完整解析)。每次分析後只保留該學生
+    這份成績單的學期；所有學生合計超過 max_bytes 時，淘汰最久沒有分析的學生。
+    快取不保存原始 HTML，parse 回傳的是副本。可供多執行緒共用。
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._students = OrderedDict()  # 學生 -> {摘要: _Block}
+        self._sizes = {}  # 學生 -> bytes
+        self._bytes = 0
+        self._issued = {}  # id(parse 回傳的學期) -> (學期, _Block, 學生)；每位學生只保留最近一次的結果
+        self._issued_ids = {}  # 學生 -> 最近一次 parse 回傳的學期 id
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'full_parses': 0, 'evictions': 0}
+
+    def parse(self, html, student=None):
+        """
+        與 parse_grades_html(html) 相同，但該學生內容未變的學期直接取用上次的解析結果
+
+        Args:
+            html: 成績頁面 (str)；bytes 因編碼需由解析器判斷，直接完整解析
+            student: 學生或工作階段的識別字串 (省略時所有呼叫共用同一份快取)
+        """
+        blocks = split_semester_blocks(html) if isinstance(html, str) else None
+        if blocks is None:
+            return self._full_parse(html)
+        with self._lock:
+            previous = self._students.get(student, {})
+        current, issued, hits = {}, [], 0
+        for block in blocks:
+            digest = hashlib.sha1(block.encode('utf-8')).digest()
+            entry = current.get(digest) or previous.get(digest)
+            if entry is not None:
+                hits += 1
+            else:
+                try:
+                    parsed = parse_grades_html(block)
+                except Exception:
+                    parsed = None
+                # 單獨解析一段必須剛好得到一個學期，否則改為完整解析整份頁面
+                if not parsed or len(parsed) != 1:
+                    return self._full_parse(html)
+                entry = _Block(parsed[0])
+            current[digest] = entry
+            issued.append((_copy_semester(entry.semester), entry))
+        with self._lock:
+            self._stats['hits'] += hits
+            self._stats['misses'] += len(blocks) - hits
+            self._replace(student, current, issued)
+        return [semester for semester, _ in issued]
+
+    def placements(self, courses, classifier, semester=None):
+        """與 place_semester_courses 相同；semester 是 parse 回傳且課程未被修改的學期時沿用已計算的歸類結果"""
+        key = id(classifier)
+        entry = student = cached = None
+        with self._lock:
+            issued = self._issued.get(id(semester))
+            if issued is not None and issued[0] is semester and semester['courses'] is courses:
+                _, entry, student = issued
+                cached = entry.placements.get(key)
+        if entry is not None and courses != entry.semester['courses']:
+            entry = cached = None  # 呼叫端修改過課程
+        if cached is not None and cached[0] is classifier:
+            return cached[1]
+        result = place_semester_courses(courses, classifier)
+        if entry is not None:
+            with self._lock:
+                stored = entry.placements.get(key)
+                if stored is None or stored[0] is not classifier:
+                    # 保留分類器本身的參照，避免 id 被其他物件重複使用
+                    entry.placements[key] = (classifier, result)
+                    added = _estimate_size(result)
+                    entry.size += added
+                    if any(block is entry for block in self._students.get(student, {}).values()):
+                        self._sizes[student] += added
+                        self._bytes += added
+                        self._evict()
+        return result
+
+    def _full_parse(self, html):
+        with self._lock:
+            self._stats['full_parses'] += 1
+        return parse_grades_html(html)
+
+    def _replace(self, student, blocks, issued):
+        """以這次分析的學期取代該學生原本的快取 (需持有 lock)"""
+        self._drop(student)
+        self._students[student] = blocks
+        self._sizes[student] = sum(entry.size for entry in blocks.values())
+        self._bytes += self._sizes[student]
+        self._issued_ids[student] = [id(semester) for semester, _ in issued]
+        for semester, entry in issued:
+            self._issued[id(semester)] = (semester, entry, student)
+        self._evict()
+
+    def _drop(self, student):
+        if self._students.pop(student, None) is not None:
+            self._bytes -= self._sizes.pop(student)
+        for semester_id in self._issued_ids.pop(student, ()):
+            self._issued.pop(semester_id, None)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._students:
+            self._drop(next(iter(self._students)))
+            self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            for student in list(self._students):
+                self._drop(student)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, students=len(self._students), bytes=self._bytes)
@@ -0,0 +1,65 @@
+# reloading.py - 檔案內容的記憶體快取：修改時間改變時才重新載入 (課程快照與學分要求共用)
+import os
+import time
+import threading
+
+
+class ReloadingFile:
+    """
+    Base class for an in-memory value loaded from `path` and reloaded when the file's
+    mtime changes. The file is stat()ed at most once per `check_interval` seconds, and
+    a given mtime is loaded at most once: if loading it fails, the previous value is kept
+    and the next attempt waits for the file to change. Thread-safe.
+
+    Subclasses implement _load(mtime) and may override _missing(error) (value while the
+    file does not exist) and _load_failed(error).
+    """
+    load_errors = (OSError, ValueError)
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._value = None
+        self._mtime = None  # 最後一次嘗試載入的 mtime (成功或失敗)；檔案不存在時為 _MISSING
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        """Returns the loaded value, checking the file first if check_interval has passed."""
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return self._value
+
+        with self._lock:
+            # 其他執行緒可能已經完成檢查
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._value
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                if self._mtime is not _MISSING:
+                    self._mtime = _MISSING
+                    self._value = self._missing(e)
+            else:
+                if mtime != self._mtime:
+                    # 失敗也記下 mtime：寫到一半或格式錯誤的檔案不會在每次呼叫時重新解析
+                    self._mtime = mtime
+                    try:
+                        self._value = self._load(mtime)
+                    except self.load_errors as e:
+                        self._load_failed(e)
+            self._checked_at = now
+            return self._value
+
+    def _load(self, mtime):
+        raise NotImplementedError
+
+    def _missing(self, error):
+        return None
+
+    def _load_failed(self, error):
+        pass
+
+
+_MISSING = object()
@@ -0,0 +1,5 @@
+# conftest.py - 讓測試以 backend 目錄為根匯入 modules / benchmarks (與 benchmarks 腳本相同)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+# test_api_courses.py - /api/courses：每種編碼有自己的 ETag，If-None-Match 只比對將回傳的編碼
+import json
+
+import pytest
+
+import app as app_module
+from benchmarks.fixtures import make_catalogue
+from modules.course_system.snapshot import CourseSnapshot
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    data_file = tmp_path / 'courses_final.json'
+    data_file.write_text(json.dumps(make_catalogue(50), ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(app_module, 'DATA_FILE', str(data_file))
+    monkeypatch.setattr(app_module, 'course_snapshot', CourseSnapshot(str(data_file)))
+    monkeypatch.setattr(app_module.limiter, 'enabled', False)
+    return app_module.app.test_client()
+
+
+def get(client, encoding=None, etag=None):
+    headers = {'Accept-Encoding': encoding or 'identity'}
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get('/api/courses', headers=headers)
+
+
+def test_each_encoding_has_its_own_etag(client):
+    identity, gzipped = get(client), get(client, 'gzip')
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in identity.headers
+    assert identity.headers['ETag'] != gzipped.headers['ETag']
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+
+
+def test_revalidation_matches_only_the_served_encoding(client):
+    gzip_etag = get(client, 'gzip').headers['ETag']
+    identity_etag = get(client).headers['ETag']
+
+    assert get(client, 'gzip', gzip_etag).status_code == 304
+    assert get(client, None, identity_etag).status_code == 304
+    # 快取持有 gzip 版本時，不接受 gzip 的用戶端必須拿到完整的未壓縮內容
+    plain = get(client, None, gzip_etag)
+    assert plain.status_code == 200
+    assert 'Content-Encoding' not in plain.headers
+    assert json.loads(plain.get_data())['courses']
+    assert get(client, 'gzip', identity_etag).status_code == 200
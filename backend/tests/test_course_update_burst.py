@@ -0,0 +1,57 @@
+# test_course_update_burst.py - 同一課程的並行 /api/course-update：只向上游請求一次，沒有 503
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as app_module
+from modules.course_system.disk_cache import SQLiteCache
+
+CONCURRENCY = 100
+UPSTREAM_DELAY = 0.3
+
+
+@pytest.fixture
+def upstream_calls(tmp_path, monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_upstream(year, semester, sclass, expected_cono=None, **kwargs):
+        with lock:
+            calls.append((year, semester, sclass))
+        time.sleep(UPSTREAM_DELAY)
+        return {"CS101": {"confirmed": "40", "online_count": "3", "remaining": "5"}}
+
+    monkeypatch.setattr(app_module, 'fetch_sclass_updates_from_nuk', fake_upstream)
+    monkeypatch.setattr(app_module.limiter, 'enabled', False)
+    monkeypatch.setattr(app_module, 'DISK_CACHE', SQLiteCache(str(tmp_path / 'burst_cache.sqlite3')))
+    app_module.MEMORY_CACHE.clear()
+    yield calls
+    app_module.MEMORY_CACHE.clear()
+
+
+def burst(conos):
+    client = app_module.app.test_client()
+    barrier = threading.Barrier(len(conos))
+
+    def one(cono):
+        barrier.wait()
+        return client.get(f'/api/course-update?year=114&helf=1&sclass=CS&cono={cono}').status_code
+
+    with ThreadPoolExecutor(max_workers=len(conos)) as pool:
+        return Counter(pool.map(one, conos))
+
+
+def test_concurrent_requests_share_one_upstream_call(upstream_calls):
+    statuses = burst(['CS101'] * CONCURRENCY)
+    assert upstream_calls == [('114', '1', 'CS')]
+    assert statuses == {200: CONCURRENCY}
+
+
+def test_unknown_course_in_the_burst_only_fails_itself(upstream_calls):
+    # 第一個請求帶不存在的課號：共用的抓取不依賴任何一個請求的課號
+    statuses = burst(['CS999'] + ['CS101'] * (CONCURRENCY - 1))
+    assert len(upstream_calls) == 1
+    assert statuses == {200: CONCURRENCY - 1, 404: 1}
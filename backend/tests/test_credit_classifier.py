@@ -0,0 +1,39 @@
+# test_credit_classifier.py - CourseClassifier (前綴字典樹) 與原本逐一掃描對應表的結果相同
+import random
+
+import pytest
+
+from benchmarks.bench_credit_classifier import LegacyClassifier, make_transcript
+from modules.credit_system import calculator, credit_deficit_calculator
+from modules.credit_system.classifier import get_classifier
+from modules.credit_system.config import COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+
+SEEDS = range(50)
+COURSES = 200
+
+
+def legacy_classifier(mapping, department_mapping=None):
+    return LegacyClassifier(mapping, department_mapping)
+
+
+def analyse(transcript):
+    categorized = calculator.categorize_and_calculate_credits(transcript, COURSE_CODE_MAPPING)
+    return categorized, credit_deficit_calculator.get_department_from_course_prefix(categorized)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_classify_matches_linear_scans(seed):
+    transcript = make_transcript(COURSES, random.Random(seed))
+    legacy = LegacyClassifier(COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING)
+    trie = get_classifier(COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING)
+    for course_id in (course['id'] for semester in transcript for course in semester['courses']):
+        assert trie._classify(course_id) == legacy.classify(course_id), course_id
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_analysis_matches_linear_scans(seed, monkeypatch):
+    transcript = make_transcript(COURSES, random.Random(seed))
+    expected = analyse(transcript)
+    monkeypatch.setattr(calculator, 'get_classifier', legacy_classifier)
+    monkeypatch.setattr(credit_deficit_calculator, 'get_classifier', legacy_classifier)
+    assert analyse(transcript) == expected
@@ -0,0 +1,54 @@
+# test_fetcher.py - NukCourseClient 的表單狀態：並行的驗證失敗只重新取得一次表單
+import threading
+
+import pytest
+
+from benchmarks.fixtures import make_catalogue
+from benchmarks.stub_nuk import StubNukServer
+from modules.course_system import fetcher
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubNukServer(make_catalogue(200), latency=0.02, sessions=True).start()
+    monkeypatch.setattr(fetcher, 'FORM_URL', server.form_url)
+    monkeypatch.setattr(fetcher, 'LIST_URL', server.list_url)
+    yield server
+    server.stop()
+
+
+def test_query_uses_the_form_session(stub):
+    client = fetcher.NukCourseClient()
+    sclass = stub.courses[0]['department']
+    assert client.query_sclass('114', '1', sclass)
+    assert client.query_sclass('114', '1', sclass)
+    assert stub.requests == {'GET': 1, 'POST': 2}
+    assert len(client.session.cookies) == 0  # cookie 隨表單狀態保存，不放在共用的 session
+
+
+def test_concurrent_validation_failures_refresh_once(stub):
+    client = fetcher.NukCourseClient()
+    sclasses = sorted({course['department'] for course in stub.courses})
+    assert client.query_sclass('114', '1', sclasses[0])
+    stub.expire_sessions()
+
+    threads = 8
+    barrier = threading.Barrier(threads)
+    results, errors = [], []
+
+    def query(i):
+        barrier.wait()
+        try:
+            results.append(client.query_sclass('114', '1', sclasses[i % len(sclasses)]))
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=query, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert not errors
+    assert len(results) == threads and all(results)
+    assert stub.requests['GET'] == 2  # 第一次查詢 + 失效後只重新取得一次
@@ -0,0 +1,44 @@
+# test_grades_parser.py - parse_grades_html (lxml) 與原本 BeautifulSoup 實作的黃金輸出比對
+import random
+
+import pytest
+
+from benchmarks.bench_grades_parser import random_page, reference_parse
+from benchmarks.bench_incremental_analysis import malform, outcome
+from benchmarks.fixtures import render_score_page
+from modules.credit_system.parser import iter_grades_html, parse_grades_html
+
+SEEDS = range(100)
+
+
+def assert_matches_reference(source):
+    expected = outcome(reference_parse, source)
+    assert outcome(parse_grades_html, source) == expected
+    if isinstance(expected, list):
+        assert list(iter_grades_html(source)) == expected
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_random_page_matches_reference(seed):
+    rng = random.Random(seed)
+    charset = rng.choice(['utf-8', 'big5'])
+    html = render_score_page(random_page(rng, rng.randrange(10, 21)), charset)
+    if rng.random() < 0.3:
+        html = malform(rng, html)
+    assert_matches_reference(html)
+    try:
+        encoded = html.encode(charset)
+    except UnicodeEncodeError:
+        return
+    assert_matches_reference(encoded)
+
+
+@pytest.mark.parametrize('source', [
+    '', '  \n', b'', '\ufeff<p>x</p>', '<!-- x -->', '<html><body>歷年成績</body></html>',
+    '<p><font face="標楷體" color="#0000FF">x</font></p><table></table>',
+    '<div><font face="標楷體" color="#0000FF"><b>x</b></font></div>',
+    '<p><font face="標楷體" color="#0000FF"><b>x</b></font></p><table></table>',
+], ids=['empty', 'blank', 'empty bytes', 'bom', 'comment only', 'no titles', 'title without <b>',
+        'title outside <p>', 'no summary'])
+def test_edge_case_matches_reference(source):
+    assert outcome(parse_grades_html, source) == outcome(reference_parse, source)
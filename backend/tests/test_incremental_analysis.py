@@ -0,0 +1,126 @@
+# test_incremental_analysis.py - TranscriptCache 增量分析與完整重算的等價性 (固定亂數種子的性質檢查)
+import copy
+import random
+
+import pytest
+
+from benchmarks.bench_incremental_analysis import (UNPLACED_MAPPING, UNPLACED_PREFIXES, malform, mutate, outcome,
+                                                   random_semester)
+from benchmarks.fixtures import make_score_semesters, render_score_page
+from modules.credit_system import calculator
+from modules.credit_system.config import CC_SUBCATEGORY_MAPPING, COURSE_CODE_MAPPING, DEPARTMENT_PREFIX_MAPPING
+from modules.credit_system.parser import parse_grades_html
+from modules.credit_system.transcript_cache import TranscriptCache
+
+SEEDS = range(100)
+RERUNS = 6
+MAPPINGS = {'default': COURSE_CODE_MAPPING, 'unplaced': UNPLACED_MAPPING}
+
+
+def placed_courses(categorized):
+    """(分類, 課程) for every course in a categorize_and_calculate_credits result."""
+    placed = []
+    for key, value in categorized.items():
+        if 'subcategories' in value:
+            for subcat in value['subcategories'].values():
+                placed += [(key, course) for group in ('必修', '選修') for course in subcat[group]['courses']]
+        else:
+            placed += [(key, course) for course in value['courses']]
+    return placed
+
+
+def expected_credits(semesters):
+    total = 0.0
+    for course in (course for semester in semesters for course in semester['courses']):
+        try:
+            if '棄選' not in course['remark'] and float(course['final_score']) >= 60:
+                total += float(course['credits'])
+        except ValueError:
+            pass
+    return total
+
+
+def prefixes_for(mapping):
+    return (list(mapping) + list(DEPARTMENT_PREFIX_MAPPING)
+            + ['CC' + code for code in CC_SUBCATEGORY_MAPPING] + ['Q', 'C', 'cc', 'XY'])
+
+
+def student_reruns(seed, mapping):
+    """One random student re-analysed RERUNS times (new semesters, late grades, edits, removals, swaps)."""
+    rng = random.Random(seed)
+    prefixes = prefixes_for(mapping)
+    semesters = [random_semester(rng, prefixes, i) for i in range(rng.randrange(0, 9))]
+    for _ in range(RERUNS):
+        yield rng, semesters
+        semesters = mutate(rng, semesters, prefixes)
+
+
+@pytest.mark.parametrize('mapping', MAPPINGS.values(), ids=MAPPINGS.keys())
+@pytest.mark.parametrize('seed', SEEDS)
+def test_categorize_places_every_course_once_and_conserves_credits(seed, mapping):
+    for _, semesters in student_reruns(seed, mapping):
+        categorized = calculator.categorize_and_calculate_credits(semesters, mapping)
+        placed = placed_courses(categorized)
+        courses = [course for semester in semesters for course in semester['courses']]
+        assert sorted(id(course) for _, course in placed) == sorted(map(id, courses))
+        if mapping is UNPLACED_MAPPING:
+            # 無法放入通識階層結構的課程歸入「其他 (無法辨識)」
+            assert all(key.startswith('其他 (無法辨識)')
+                       for key, course in placed if course['id'].startswith(UNPLACED_PREFIXES))
+        earned = sum(value['earned_credits'] for value in categorized.values())
+        assert earned == pytest.approx(expected_credits(semesters))
+
+
+@pytest.mark.parametrize('mapping', MAPPINGS.values(), ids=MAPPINGS.keys())
+@pytest.mark.parametrize('seed', SEEDS)
+def test_incremental_analysis_matches_full_recomputation(seed, mapping):
+    cache = TranscriptCache()
+    for rng, semesters in student_reruns(seed, mapping):
+        html = render_score_page(semesters)
+        for page in (html, malform(rng, html)):
+            parsed = outcome(parse_grades_html, page)
+            cached = outcome(cache.parse, page)
+            assert cached == parsed
+            if isinstance(parsed, list):
+                assert (calculator.categorize_and_calculate_credits(cached, mapping, cache)
+                        == calculator.categorize_and_calculate_credits(parsed, mapping))
+
+
+@pytest.fixture
+def pages():
+    rng = random.Random(23)
+    prefixes = list(COURSE_CODE_MAPPING) + list(DEPARTMENT_PREFIX_MAPPING)
+    return [render_score_page(make_score_semesters(6, 9, prefixes, rng)) for _ in range(8)]
+
+
+def test_cache_is_scoped_per_student(pages):
+    cache = TranscriptCache()
+    for student, page in enumerate(pages):
+        cache.parse(page, student=student)
+    hits = cache.stats()['hits']
+    for student, page in enumerate(pages):
+        cache.parse(page, student=(student + 1) % len(pages))  # 其他學生的頁面不會命中
+    assert cache.stats()['hits'] == hits
+
+
+def test_mutating_a_result_does_not_touch_the_cache(pages):
+    cache = TranscriptCache()
+    parsed = cache.parse(pages[0], student='a')
+    parsed[0]['courses'][0]['credits'] = '99'
+    parsed[0]['courses'].append(dict(parsed[0]['courses'][0]))
+    parsed[1]['summary'].clear()
+    assert cache.parse(pages[0], student='a') == parse_grades_html(pages[0])
+    assert (calculator.categorize_and_calculate_credits(parsed, COURSE_CODE_MAPPING, cache)
+            == calculator.categorize_and_calculate_credits(copy.deepcopy(parsed), COURSE_CODE_MAPPING))
+
+
+def test_cache_stays_under_max_bytes(pages):
+    cache = TranscriptCache()
+    cache.parse(pages[0], student=0)
+    cache = TranscriptCache(max_bytes=cache.stats()['bytes'] * 2.5)  # 只放得下大約兩位學生
+    for student, page in enumerate(pages):
+        calculator.analyze_grades(cache.parse(page, student=student), cache=cache)
+        assert cache.stats()['bytes'] <= cache.max_bytes
+    stats = cache.stats()
+    assert stats['students'] <= 2
+    assert stats['evictions'] >= len(pages) - 2
@@ -0,0 +1,101 @@
+# test_reloading.py - ReloadingFile (課程快照、學分要求)：載入失敗後不會每次呼叫都重新讀檔
+import os
+import json
+
+import pytest
+
+from benchmarks.fixtures import make_catalogue
+from modules.course_system.snapshot import CourseSnapshot
+from modules.credit_system.requirements import RequirementsRegistry
+
+REQUIREMENTS = [{"科系": "資訊工程學系", "系必修": 60, "領域選修": 30, "校定必修": 10, "通識選修": 20, "畢業學分": 128}]
+
+
+def count_loads(watched, monkeypatch):
+    loads = []
+    load = watched._load
+
+    def counting(mtime):
+        loads.append(mtime)
+        return load(mtime)
+
+    monkeypatch.setattr(watched, '_load', counting)
+    return loads
+
+
+def touch(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def requirements_file(tmp_path):
+    return tmp_path / 'score.json'
+
+
+def test_failed_first_load_is_not_retried_until_the_file_changes(requirements_file, monkeypatch, capsys):
+    requirements_file.write_text('[{"科系": "資訊', encoding='utf-8')  # 寫到一半
+    registry = RequirementsRegistry(str(requirements_file), check_interval=0)
+    loads = count_loads(registry, monkeypatch)
+
+    for _ in range(5):
+        assert registry.lookup('資訊工程學系') == (None, None)
+    assert len(loads) == 1
+    assert capsys.readouterr().out.count('發生錯誤') == 1
+
+    requirements_file.write_text(json.dumps(REQUIREMENTS, ensure_ascii=False), encoding='utf-8')
+    touch(requirements_file, 2 * 10 ** 18)
+    assert registry.get('資訊工程學系')['總學分'] == 128
+    assert len(loads) == 2
+
+
+def test_failed_reload_keeps_the_previous_requirements(requirements_file, monkeypatch):
+    requirements_file.write_text(json.dumps(REQUIREMENTS, ensure_ascii=False), encoding='utf-8')
+    registry = RequirementsRegistry(str(requirements_file), check_interval=0)
+    assert registry.get('資訊工程學系')['總學分'] == 128
+    loads = count_loads(registry, monkeypatch)
+
+    requirements_file.write_text('{', encoding='utf-8')
+    touch(requirements_file, 2 * 10 ** 18)
+    for _ in range(5):
+        assert registry.get('資訊工程學系')['總學分'] == 128
+    assert len(loads) == 1
+
+
+def test_check_interval_limits_stat_calls(requirements_file, monkeypatch):
+    requirements_file.write_text(json.dumps(REQUIREMENTS, ensure_ascii=False), encoding='utf-8')
+    registry = RequirementsRegistry(str(requirements_file), check_interval=60)
+    registry.all()
+    stats = []
+    stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda path, *args, **kwargs: stats.append(path) or stat(path, *args, **kwargs))
+    for _ in range(5):
+        registry.all()
+    assert stats == []
+
+
+def test_missing_file_reports_once(requirements_file, capsys):
+    registry = RequirementsRegistry(str(requirements_file), check_interval=0)
+    for _ in range(3):
+        assert registry.all() == {}
+    assert capsys.readouterr().out.count('發生錯誤') == 1
+
+
+def test_snapshot_failed_first_load(tmp_path, monkeypatch):
+    data_file = tmp_path / 'courses_final.json'
+    data_file.write_text('{"courses": [', encoding='utf-8')
+    snapshot = CourseSnapshot(str(data_file), check_interval=0)
+    loads = count_loads(snapshot, monkeypatch)
+    rebuilt = []
+    snapshot.add_listener(rebuilt.append)
+
+    for _ in range(5):
+        assert snapshot.current() is None
+    assert len(loads) == 1
+
+    data_file.write_text(json.dumps(make_catalogue(10), ensure_ascii=False), encoding='utf-8')
+    touch(data_file, 2 * 10 ** 18)
+    assert len(snapshot.current().data['courses']) == 10
+    assert len(loads) == 2 and len(rebuilt) == 1
+
+    data_file.unlink()
+    assert snapshot.current() is None
@@ -0,0 +1,89 @@
+# test_seat_stream.py - SSE 串流數上限：超過 SSE_MAX_STREAMS 回 503，其他 API 不會因串流佔滿 worker 而卡住
+import time
+import threading
+import http.client
+
+import pytest
+from waitress.server import create_server
+
+import app as app_module
+from modules.course_system.disk_cache import SQLiteCache
+
+MAX_STREAMS = 2
+STREAM_PATH = '/api/stream/seats?year=114&helf=1&course=CS:CS1001'
+
+
+class IdleWatcher:
+    """Stands in for the seat-watch scheduler so no stream reaches the NUK site."""
+
+    def watch(self, *args):
+        pass
+
+    def unwatch(self, *args):
+        pass
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'SSE_MAX_STREAMS', MAX_STREAMS)
+    monkeypatch.setattr(app_module, 'stream_slots', threading.BoundedSemaphore(MAX_STREAMS))
+    monkeypatch.setattr(app_module, 'stream_counts', {'open': 0, 'rejected': 0})
+    monkeypatch.setattr(app_module, 'seat_watcher', IdleWatcher())
+    monkeypatch.setattr(app_module, 'DISK_CACHE', SQLiteCache(str(tmp_path / 'cache.sqlite3')))
+    monkeypatch.setattr(app_module.limiter, 'enabled', False)
+    monkeypatch.setattr(app_module, 'SSE_HEARTBEAT', 0.2)
+    # 與預設的 waitress 一樣只有 4 個 worker
+    wsgi = create_server(app_module.app, host='127.0.0.1', port=0, threads=4)
+    threading.Thread(target=wsgi.run, daemon=True).start()
+    yield wsgi.effective_port
+    wsgi.close()
+
+
+def open_stream(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('GET', STREAM_PATH)
+    response = conn.getresponse()
+    if response.status == 200:
+        response.readline()  # retry: 行，確認串流已開始
+    return conn, response
+
+
+def get_status(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('GET', path)
+    status = conn.getresponse().status
+    conn.close()
+    return status
+
+
+def test_streams_beyond_the_cap_get_503(server):
+    streams = [open_stream(server) for _ in range(MAX_STREAMS)]
+    assert [response.status for _, response in streams] == [200] * MAX_STREAMS
+
+    conn, rejected = open_stream(server)
+    assert rejected.status == 503
+    assert rejected.getheader('Retry-After')
+    conn.close()
+    # 其餘 worker 仍可服務一般請求
+    started = time.monotonic()
+    assert get_status(server, '/api/watch-stats') == 200
+    assert time.monotonic() - started < 1
+
+    for conn, response in streams:
+        response.close()
+        conn.close()
+
+
+def test_closed_streams_free_their_slot(server):
+    conn, response = open_stream(server)
+    assert response.status == 200
+    response.close()
+    conn.close()
+    # 伺服器在下一次寫入 (heartbeat) 失敗時才發現連線已關閉；這裡直接等名額釋放
+    deadline = time.monotonic() + 5
+    while app_module.stream_counts['open'] and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert app_module.stream_counts['open'] == 0
@@ -10,6 +10,10 @@ function initializeCourseSystem() {
     // --- (ICONS, Constants, State) ---
     const ICONS = { info: `<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 20 20" fill="currentColor" class="icon"><path fill-rule="evenodd" d="M18 10a8 8 0 11-16 0 8 8 0 0116 0zm-7-4a1 1 0 11-2 0 1 1 0 012 0zM9 9a.75.75 0 000 1.5h.253a.25.25 0 01.244.304l-.459 2.066A1.75 1.75 0 0010.747 15H11a.75.75 0 000-1.5h-.253a.25.25 0 01-.244-.304l.459-2.066A1.75 1.75 0 009.253 9H9z" clip-rule="evenodd" /></svg>` };
     const API_URL = '/api/courses';
+    const SEARCH_API_URL = '/api/courses/search', SEARCH_PAGE_SIZE = 500;
+    const WATCH_API_URL = '/api/watch', WATCH_RENEW_MS = 4 * 60 * 1000; // 租約 10 分鐘，每 4 分鐘續約
+    const SEAT_STREAM_URL = '/api/stream/seats';
+    const FITS_API_URL = '/api/courses/fits';
     const DEPT_MAP = { "MI": "通識微學分", "GR": "共同必修系列", "CC": "核心通識", "LI": "通識人文科學類", "SC": "通識自然科學類", "SO": "通識社會科學類", "CD": "全民國防教育類", "IN": "興趣選修", "WL": "西洋語文學系", "KH": "運動健康與休閒學系", "CCD": "工藝與創意設計學系", "DA": "建築學系", "CDA": "創意設計與建築學系", "EL": "東亞語文學系", "DAP": "運動競技學系", "CHS": "人文社會科學院共同課程", "LA": "法律學系", "GL": "政治法律學系", "FL": "財經法律學系", "CCL": "法學院共同課程", "AE": "應用經濟學系", "FI": "財務金融學系", "IM": "資訊管理學系", "CCM": "管理學院共同課程", "AM": "應用數學系", "AC": "應用化學系", "AP": "應用物理學系", "CCS": "理學院共同課程", "EE": "電機工程學系", "CE": "土木與環境工程學系", "CS": "資訊工程學系", "CM": "化學工程及材料工程學系", "CCE": "工學院共同課程", "LS": "生命科學系", "AB": "亞太工商管理學系", "ISP": "國際學生系", "CPP": "華語先修班", "FIN": "財務金融學系(停用)", "IFD": "創新學院不分系" };
     const periodOrder = ['A', '1', '2', '3', '4', 'B', '5', '6', '7', '8', 'C', '9', '10', '11', '12', 'D'];
     
@@ -17,8 +21,8 @@ function initializeCourseSystem() {
     const GOLDEN_RATIO_CONJUGATE = 0.61803398875;
     let lastHue = Math.random() * 360;
 
-    let allCourses = [], queryParams = {}, addedCourseIds = new Set(), timetableState = {};
-    const courseListContainer = document.getElementById('courseList'), searchInput = document.getElementById('searchInput'), deptFilter = document.getElementById('deptFilter'), courseCountSpan = document.getElementById('courseCount'), timetableBody = document.querySelector('#timetable tbody'), clearTimetableBtn = document.getElementById('clearTimetableBtn'), modal = document.getElementById('courseModal'), modalBody = document.getElementById('modalBody'), closeModalBtn = document.querySelector('.close-btn'), totalCreditsSpan = document.getElementById('totalCredits'), exportTimetableBtn = document.getElementById('exportTimetableBtn');
+    let allCourses = [], queryParams = {}, addedCourseIds = new Set(), timetableState = {}, seatStream = null;
+    const courseListContainer = document.getElementById('courseList'), searchInput = document.getElementById('searchInput'), deptFilter = document.getElementById('deptFilter'), courseCountSpan = document.getElementById('courseCount'), timetableBody = document.querySelector('#timetable tbody'), clearTimetableBtn = document.getElementById('clearTimetableBtn'), modal = document.getElementById('courseModal'), modalBody = document.getElementById('modalBody'), closeModalBtn = document.querySelector('.close-btn'), totalCreditsSpan = document.getElementById('totalCredits'), exportTimetableBtn = document.getElementById('exportTimetableBtn'), fitsFreeSlotsCheckbox = document.getElementById('fitsFreeSlots');
 
     async function main() {
         initializeTimetable();
@@ -29,6 +33,8 @@ function initializeCourseSystem() {
             allCourses = data.courses;
             queryParams = data.query_params;
             loadTimetable();
+            syncWatchList();
+            setInterval(syncWatchList, WATCH_RENEW_MS);
             populateDeptFilter(allCourses);
             applyFilters();
         } catch (error) {
@@ -53,6 +59,64 @@ function initializeCourseSystem() {
         }
     }
 
+    // --- 名額關注：課表中的課程由伺服器定期更新名額，點開課程時直接讀到快取 ---
+    function getWatchClientId() {
+        let clientId = localStorage.getItem('watchClientId');
+        if (!clientId) {
+            clientId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+            localStorage.setItem('watchClientId', clientId);
+        }
+        return clientId;
+    }
+
+    function toWatchItem(course) {
+        return { year: queryParams.OpenYear, helf: queryParams.Helf, sclass: course.department, cono: course.code };
+    }
+
+    async function sendWatchRequest(method, courses) {
+        if (courses.length === 0) return;
+        try {
+            await fetch(WATCH_API_URL, {
+                method,
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ client: getWatchClientId(), courses: courses.map(toWatchItem) })
+            });
+        } catch (error) {
+            console.error("Watch request failed:", error);
+        }
+    }
+
+    function syncWatchList() {
+        const courses = Array.from(addedCourseIds).map(id => allCourses.find(c => c.id === id)).filter(Boolean);
+        sendWatchRequest('POST', courses);
+    }
+
+    // --- 即時名額：課程詳細視窗開啟時訂閱該課程的名額變動 (SSE) ---
+    function openSeatStream(course) {
+        closeSeatStream();
+        if (!window.EventSource) return;
+        const params = new URLSearchParams({ year: queryParams.OpenYear, helf: queryParams.Helf, course: `${course.department}:${course.code}` });
+        seatStream = new EventSource(`${SEAT_STREAM_URL}?${params}`);
+        seatStream.addEventListener('seats', event => { JSON.parse(event.data).changes.forEach(applySeatChange); });
+    }
+
+    function applySeatChange(change) {
+        const cellIds = { confirmed: 'modal-confirmed', online_count: 'modal-online-count', remaining: 'modal-remaining' };
+        for (const field in cellIds) {
+            const cell = document.getElementById(cellIds[field]);
+            if (cell && change[field] !== undefined && change[field] !== null) cell.textContent = change[field];
+        }
+    }
+
+    function closeSeatStream() {
+        if (seatStream) { seatStream.close(); seatStream = null; }
+    }
+
+    function closeModal() {
+        modal.style.display = "none";
+        closeSeatStream();
+    }
+
     function openModalWithCourseDetails(course) {
         const deptName = DEPT_MAP[course.department] || course.department;
         const detailUrl = `https://course.nuk.edu.tw/QueryCourse/tcontent.asp?OpenYear=${queryParams.OpenYear}&Helf=${queryParams.Helf}&Sclass=${course.department}&Cono=${course.code}`;
@@ -81,6 +145,7 @@ function initializeCourseSystem() {
         modal.style.display = "block";
         document.getElementById('copyCodeBtn').addEventListener('click', () => copyRegistrationCode(registrationCode));
         fetchCourseUpdate(course);
+        openSeatStream(course);
     }
 
     async function fetchCourseUpdate(course) {
@@ -114,7 +179,14 @@ function initializeCourseSystem() {
     
     function populateDeptFilter(courses) { const depts = [...new Set(courses.map(course => course.department))]; depts.sort((a, b) => (DEPT_MAP[a] || a).localeCompare(DEPT_MAP[b] || b, 'zh-Hant')); depts.forEach(deptCode => { const option = document.createElement('option'); option.value = deptCode; option.textContent = DEPT_MAP[deptCode] || deptCode; deptFilter.appendChild(option); }); }
     function applyFilters() { const searchTerm = searchInput.value.toLowerCase().trim(); const selectedDept = deptFilter.value; let filteredCourses = allCourses; if (selectedDept) { filteredCourses = filteredCourses.filter(c => c.department === selectedDept); } if (searchTerm) { filteredCourses = filteredCourses.filter(c => c.name.toLowerCase().includes(searchTerm) || c.teacher.toLowerCase().includes(searchTerm) || c.code.toLowerCase().includes(searchTerm)); } renderCourseList(filteredCourses); }
-    function renderCourseList(courses) { courseListContainer.innerHTML = ''; courseCountSpan.textContent = `共 ${courses.length} 筆`; if (courses.length === 0) { courseListContainer.innerHTML = '<p>沒有找到符合條件的課程。</p>'; return; } const fragment = document.createDocumentFragment(); courses.forEach(course => { const courseItem = document.createElement('div'); courseItem.className = 'course-item'; courseItem.id = `course-item-${course.id}`; const deptName = DEPT_MAP[course.department] || course.department; const courseTime = formatCourseTime(course.time); courseItem.innerHTML = `<div class="add-btn-container"><button class="add-btn" data-course-id="${course.id}">${addedCourseIds.has(course.id) ? '取消' : '加入'}</button></div><h3 class="course-title" data-course-id="${course.id}">${course.name}</h3><p><strong>系所:</strong> ${deptName}</p><p><strong>教師:</strong> ${course.teacher} | <strong>課號:</strong> ${course.code}</p><p><strong>時間:</strong> ${courseTime}</p> `; if (addedCourseIds.has(course.id)) { courseItem.querySelector('.add-btn').classList.add('added'); } fragment.appendChild(courseItem); }); courseListContainer.appendChild(fragment); }
+    // 有關鍵字時改用後端索引搜尋；失敗時退回本地篩選
+    let searchRequestSeq = 0, searchDebounceTimer = null;
+    function scheduleSearch() { clearTimeout(searchDebounceTimer); searchDebounceTimer = setTimeout(searchCourses, 150); }
+    function matchesSearchTerm(course, searchTerm) { return course.name.toLowerCase().includes(searchTerm) || course.teacher.toLowerCase().includes(searchTerm) || course.code.toLowerCase().includes(searchTerm); }
+    // 空堂模式：由後端時段索引找出不與課表衝堂的課程，再於本地套用關鍵字
+    async function searchFreeSlotCourses() { const searchTerm = searchInput.value.toLowerCase().trim(); const selectedDept = deptFilter.value; const seq = ++searchRequestSeq; const params = new URLSearchParams({ page_size: SEARCH_PAGE_SIZE }); const busySlots = Object.keys(timetableState); if (busySlots.length) params.append('busy', busySlots.join(',')); if (selectedDept) params.append('dept', selectedDept); try { let page = 1, fitting = [], total = 0; do { params.set('page', page); const response = await fetch(`${FITS_API_URL}?${params}`); if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`); const data = await response.json(); if (seq !== searchRequestSeq) return; fitting = fitting.concat(data.courses); total = data.total; page++; } while (searchTerm && fitting.length < total); const courses = searchTerm ? fitting.filter(c => matchesSearchTerm(c, searchTerm)) : fitting; renderCourseList(courses, searchTerm ? courses.length : total); } catch (error) { console.error("Free-slot API failed:", error); if (seq === searchRequestSeq) courseListContainer.innerHTML = '<p style="color: red;">無法查詢空堂課程。</p>'; } }
+    async function searchCourses() { if (fitsFreeSlotsCheckbox && fitsFreeSlotsCheckbox.checked) { searchFreeSlotCourses(); return; } const searchTerm = searchInput.value.trim(); const selectedDept = deptFilter.value; if (!searchTerm) { searchRequestSeq++; applyFilters(); return; } const seq = ++searchRequestSeq; const params = new URLSearchParams({ q: searchTerm, page_size: SEARCH_PAGE_SIZE }); if (selectedDept) params.append('dept', selectedDept); try { const response = await fetch(`${SEARCH_API_URL}?${params}`); if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`); const data = await response.json(); if (seq !== searchRequestSeq) return; renderCourseList(data.courses, data.total); } catch (error) { console.error("Search API failed, falling back to local filter:", error); if (seq === searchRequestSeq) applyFilters(); } }
+    function renderCourseList(courses, total = courses.length) { courseListContainer.innerHTML = ''; courseCountSpan.textContent = `共 ${total} 筆`; if (courses.length === 0) { courseListContainer.innerHTML = '<p>沒有找到符合條件的課程。</p>'; return; } const fragment = document.createDocumentFragment(); courses.forEach(course => { const courseItem = document.createElement('div'); courseItem.className = 'course-item'; courseItem.id = `course-item-${course.id}`; const deptName = DEPT_MAP[course.department] || course.department; const courseTime = formatCourseTime(course.time); courseItem.innerHTML = `<div class="add-btn-container"><button class="add-btn" data-course-id="${course.id}">${addedCourseIds.has(course.id) ? '取消' : '加入'}</button></div><h3 class="course-title" data-course-id="${course.id}">${course.name}</h3><p><strong>系所:</strong> ${deptName}</p><p><strong>教師:</strong> ${course.teacher} | <strong>課號:</strong> ${course.code}</p><p><strong>時間:</strong> ${courseTime}</p> `; if (addedCourseIds.has(course.id)) { courseItem.querySelector('.add-btn').classList.add('added'); } fragment.appendChild(courseItem); }); courseListContainer.appendChild(fragment); }
     function initializeTimetable() { timetableBody.innerHTML = ''; periodOrder.forEach(period => { const row = document.createElement('tr'); if (['A', 'B', 'C', 'D'].includes(period)) { row.classList.add('break-period'); } row.innerHTML = `<td class="time-slot">${period}</td>`; for (let i = 0; i < 6; i++) { const day = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"][i]; row.innerHTML += `<td data-day="${day}" data-period="${period}"></td>`; } timetableBody.appendChild(row); }); }
     
     function getNextDistinctColor() {
@@ -176,6 +248,8 @@ function initializeCourseSystem() {
         updateTotalCredits();
         if (!isLoading) {
             saveTimetable();
+            sendWatchRequest('POST', [course]);
+            if (fitsFreeSlotsCheckbox && fitsFreeSlotsCheckbox.checked) searchCourses();
         }
     }
     
@@ -198,6 +272,9 @@ function initializeCourseSystem() {
         updateAddButtonState(courseId, false);
         updateTotalCredits();
         saveTimetable();
+        const course = allCourses.find(c => c.id === courseId);
+        if (course) sendWatchRequest('DELETE', [course]);
+        if (fitsFreeSlotsCheckbox && fitsFreeSlotsCheckbox.checked) searchCourses();
     }
     
     function updateTotalCredits() {
@@ -217,8 +294,9 @@ function initializeCourseSystem() {
     function exportTimetable() { const exportBtn = document.getElementById('exportTimetableBtn'); const timetableElement = document.getElementById('timetable'); if (addedCourseIds.size === 0) { alert("您的課表是空的"); return; } exportBtn.textContent = "正在產生..."; exportBtn.disabled = true; html2canvas(timetableElement, { useCORS: true, scale: 2, backgroundColor: '#ffffff' }).then(canvas => { const imageUrl = canvas.toDataURL("image/png"); const a = document.createElement('a'); a.href = imageUrl; a.download = '我的課表.png'; document.body.appendChild(a); a.click(); document.body.removeChild(a); exportBtn.textContent = "匯出課表"; exportBtn.disabled = false; }).catch(error => { console.error("匯出錯誤:", error); alert("圖片產生失敗"); exportBtn.textContent = "匯出課表"; exportBtn.disabled = false; }); }
 
     // --- Event Listeners ---
-    searchInput.addEventListener('input', applyFilters);
-    deptFilter.addEventListener('change', applyFilters);
+    searchInput.addEventListener('input', scheduleSearch);
+    deptFilter.addEventListener('change', searchCourses);
+    if (fitsFreeSlotsCheckbox) fitsFreeSlotsCheckbox.addEventListener('change', searchCourses);
     courseListContainer.addEventListener('click', e => { const courseId = e.target.dataset.courseId; if (!courseId) return; const course = allCourses.find(c => c.id === courseId); if (!course) return; if (e.target.classList.contains('add-btn')) { if (addedCourseIds.has(courseId)) { removeCourseFromTimetable(courseId); } else { addCourseToTimetable(course); } } else if (e.target.classList.contains('course-title')) { openModalWithCourseDetails(course); } });
     timetableBody.addEventListener('click', e => { const target = e.target; if (target.classList.contains('remove-btn')) { removeCourseFromTimetable(target.dataset.courseId); } const contentCell = target.closest('.course-cell-content'); if (contentCell) { const courseId = target.closest('.course-cell').dataset.courseGroupId; const course = allCourses.find(c => c.id === courseId); if (course) { openModalWithCourseDetails(course); } } });
     timetableBody.addEventListener('mouseenter', e => { const cell = e.target.closest('.course-cell'); if (cell && cell.dataset.courseGroupId) { const courseId = cell.dataset.courseGroupId; document.querySelectorAll(`[data-course-group-id="${courseId}"]`).forEach(c => { c.classList.add('hover-highlight'); }); const removeBtn = document.querySelector(`.remove-btn[data-course-id="${courseId}"]`); if (removeBtn) { removeBtn.classList.add('show'); } } }, true);
@@ -232,8 +310,8 @@ function initializeCourseSystem() {
     });
 
     exportTimetableBtn.addEventListener('click', exportTimetable);
-    closeModalBtn.onclick = () => { modal.style.display = "none"; };
-    window.onclick = (event) => { if (event.target == modal) { modal.style.display = "none"; } };
+    closeModalBtn.onclick = closeModal;
+    window.onclick = (event) => { if (event.target == modal) { closeModal(); } };
 
     // 啟動主要功能
     main();
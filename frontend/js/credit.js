@@ -13,28 +13,88 @@ function initializeCreditSystem() {
         startButton.addEventListener('click', startCreditAnalysis);
     }
 
+    // 同一個瀏覽器重新分析時，伺服器只需重算有變動的學期
+    function getCreditClientId() {
+        let clientId = localStorage.getItem('creditClientId');
+        if (!clientId) {
+            clientId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+            localStorage.setItem('creditClientId', clientId);
+        }
+        return clientId;
+    }
+
     async function startCreditAnalysis() {
         startButton.disabled = true;
         resultsContainer.innerHTML = '';
-        showMessage(statusDiv, '處理中，請在開啟的瀏覽器視窗中登入...', 'processing');
+        showMessage(statusDiv, '正在送出分析工作...', 'processing');
 
         try {
-            const data = await apiRequest('/api/start-credit-analysis', { method: 'POST' });
-            
-            if (data.status === 'success') {
-                showMessage(statusDiv, data.message, 'success');
-                renderCreditResults(data.data);
+            // 分析在伺服器背景執行，這裡只取得 job id，再追蹤進度
+            const job = await apiRequest('/api/credit-analysis', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ client: getCreditClientId() })
+            });
+            const finished = await followCreditJob(job);
+            const result = finished.result || {};
+
+            if (finished.state === 'succeeded') {
+                showMessage(statusDiv, result.message, 'success');
+                renderCreditResults(result.data);
             } else {
-                showMessage(statusDiv, '錯誤：' + data.message, 'error');
+                showMessage(statusDiv, '錯誤：' + (result.message || finished.message), 'error');
             }
         } catch (error) {
             console.error('Credit analysis error:', error);
-            showMessage(statusDiv, '前端請求失敗，請檢查網路連線。', 'error');
+            showMessage(statusDiv, '前端請求失敗，請檢查網路連線或稍後再試。', 'error');
         } finally {
             startButton.disabled = false;
         }
     }
 
+    function showJobProgress(job) {
+        const message = job.state === 'queued'
+            ? `排隊等待中 (前面還有 ${job.queue_position - 1} 位)...`
+            : job.message;
+        showMessage(statusDiv, message, 'processing');
+    }
+
+    // 以 SSE 追蹤工作進度；瀏覽器不支援或串流中斷時改為定期查詢
+    function followCreditJob(job) {
+        return new Promise((resolve, reject) => {
+            showJobProgress(job);
+            if (!window.EventSource) {
+                pollCreditJob(job.status_url).then(resolve, reject);
+                return;
+            }
+            const source = new EventSource(job.stream_url);
+            source.addEventListener('progress', event => showJobProgress(JSON.parse(event.data)));
+            source.addEventListener('done', event => {
+                source.close();
+                resolve(JSON.parse(event.data));
+            });
+            source.addEventListener('expired', () => {
+                source.close();
+                reject(new Error('Credit analysis job expired'));
+            });
+            source.onerror = () => {
+                source.close();
+                pollCreditJob(job.status_url).then(resolve, reject);
+            };
+        });
+    }
+
+    async function pollCreditJob(statusUrl) {
+        while (true) {
+            const job = await apiRequest(statusUrl);
+            if (job.state === 'succeeded' || job.state === 'failed') {
+                return job;
+            }
+            showJobProgress(job);
+            await new Promise(resolve => setTimeout(resolve, 2000));
+        }
+    }
+
     function renderCreditResults(data) {
         resultsContainer.innerHTML = '';
         